@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the weather dashboard.
+
+Imports the dashboard's packages with ``python -X importtime`` in fresh
+interpreters and reports how long its own modules take to import, plus
+total wall time.
+
+Run with: python benchmarks/import_time.py [--runs N] [--modules weather display ...]
+                                           [--save FILE] [--compare FILE]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Sequence, Tuple
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGES = ("weather", "display", "utils")
+DEFAULT_MODULES = ("weather", "display")
+
+# "import time:       123 |        456 |   weather.models"
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Parse ``-X importtime`` output.
+    
+    Args:
+        stderr: Captured stderr of the interpreter
+    
+    Returns:
+        Mapping of module name to (nesting depth, cumulative microseconds)
+    """
+    times = {}
+    for line in stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            times[match.group(4)] = (depth, int(match.group(2)))
+    return times
+
+
+def run_once(modules: Sequence[str]) -> Dict[str, float]:
+    """
+    Start a fresh interpreter that imports ``modules`` and time it.
+    
+    Args:
+        modules: Dotted module names, imported in order
+    
+    Returns:
+        Wall time and project import time in milliseconds, plus per-module times
+    """
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=PROJECT_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    wall = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{proc.stderr[-2000:]}")
+    
+    times = parse_importtime(proc.stderr)
+    project = {name: entry for name, entry in times.items() if name.split(".")[0] in PACKAGES}
+    # Nested entries are already counted in their importer's cumulative time
+    roots = [us for depth, us in project.values() if depth == 0]
+    return {
+        "wall_ms": wall,
+        "import_ms": sum(roots) / 1000,
+        "modules": {name: us / 1000 for name, (_, us) in project.items()},
+    }
+
+
+def summarize(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    """Reduce repeated runs to medians and spread."""
+    wall = [r["wall_ms"] for r in runs]
+    imports = [r["import_ms"] for r in runs]
+    modules = {}
+    for name in runs[-1]["modules"]:
+        modules[name] = statistics.median(r["modules"].get(name, 0.0) for r in runs)
+    return {
+        "runs": len(runs),
+        "wall_ms_median": statistics.median(wall),
+        "wall_ms_min": min(wall),
+        "import_ms_median": statistics.median(imports),
+        "import_ms_min": min(imports),
+        "modules_ms": dict(sorted(modules.items(), key=lambda kv: -kv[1])),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="number of cold starts")
+    parser.add_argument("--modules", nargs="+", default=list(DEFAULT_MODULES), help="modules to import")
+    parser.add_argument("--save", help="write results as JSON baseline")
+    parser.add_argument("--compare", help="compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown before --compare fails (0.25 = 25%%)")
+    args = parser.parse_args()
+    
+    result = summarize([run_once(args.modules) for _ in range(args.runs)])
+    
+    print(f"import {', '.join(args.modules)}: {result['runs']} cold starts")
+    print(f"  wall time     median {result['wall_ms_median']:8.2f} ms   min {result['wall_ms_min']:8.2f} ms")
+    print(f"  project import median {result['import_ms_median']:8.2f} ms   min {result['import_ms_min']:8.2f} ms")
+    for name, ms in list(result["modules_ms"].items())[:10]:
+        print(f"    {name:<24} {ms:8.3f} ms")
+    
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        failed = False
+        for key in ("wall_ms_median", "import_ms_median"):
+            change = (result[key] - baseline[key]) / baseline[key] if baseline[key] else 0.0
+            flag = "REGRESSION" if change > args.threshold else "ok"
+            failed |= change > args.threshold
+            print(f"  {key:<18} {baseline[key]:8.2f} -> {result[key]:8.2f} ms ({change:+.1%}) {flag}")
+        return 1 if failed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Seeded load generator for the weather subsystem.
+
+Drives WeatherAPI (and through it the cache) and the dashboard renderer at a
+target request rate and reports latency percentiles per operation. Requests
+are scheduled open-loop: latency is measured from when a request was due, so
+a stall shows up in every request it delays.
+
+Run with: python benchmarks/load_generator.py [--rate 2000] [--duration 5] [--seed 0]
+     or:  python benchmarks/load_generator.py generate --cities 1000 --steps 24
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from weather.api import WeatherAPI  # noqa: E402
+from weather.source import SyntheticWeather  # noqa: E402
+from display.renderer import DashboardRenderer  # noqa: E402
+
+
+OPERATIONS = ("current", "forecast", "render")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """Summarize latencies (seconds) as milliseconds."""
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p90_ms": percentile(ordered, 90) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "p999_ms": percentile(ordered, 99.9) * 1000,
+        "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+    }
+
+
+def city_names(count: int) -> List[str]:
+    return [f"City {i:05d}" for i in range(count)]
+
+
+def run_load(args) -> Dict:
+    """Run the request-rate workload and return its report."""
+    rng = random.Random(args.seed)
+    api = WeatherAPI(seed=args.seed, cache_ttl=args.ttl)
+    renderer = DashboardRenderer()
+    cities = city_names(args.cities)
+    # Zipf-like popularity: a few hot cities take most of the traffic
+    weights = [1.0 / (rank + 1) ** args.skew for rank in range(len(cities))]
+    mix = [args.current, args.forecast, args.render]
+    sink = io.StringIO()
+    prefetcher = api.start_prefetch(budget=args.prefetch) if args.prefetch else None
+    
+    def render(city: str) -> None:
+        current = api.get_current_weather(city)
+        forecast = api.get_forecast(city, days=5)
+        with contextlib.redirect_stdout(sink):
+            renderer.render_dashboard(current, forecast)
+        sink.seek(0)
+        sink.truncate()
+    
+    handlers = {
+        "current": api.get_current_weather,
+        "forecast": lambda city: api.get_forecast(city, days=5),
+        "render": render,
+    }
+    total = int(args.rate * args.duration)
+    plan = list(zip(
+        rng.choices(OPERATIONS, weights=mix, k=total),
+        rng.choices(cities, weights=weights, k=total),
+    ))
+    
+    latencies = {op: [] for op in OPERATIONS}
+    interval = 1.0 / args.rate
+    start = time.perf_counter()
+    for i, (op, city) in enumerate(plan):
+        due = start + i * interval
+        now = time.perf_counter()
+        if now < due:
+            time.sleep(due - now)
+        handlers[op](city)
+        latencies[op].append(time.perf_counter() - due)
+    elapsed = time.perf_counter() - start
+    if prefetcher is not None:
+        prefetcher.stop()
+    
+    everything = [v for samples in latencies.values() for v in samples]
+    return {
+        "seed": args.seed,
+        "target_rate": args.rate,
+        "achieved_rate": total / elapsed if elapsed else 0.0,
+        "requests": total,
+        "cities": args.cities,
+        "prefetched": prefetcher.fetches if prefetcher is not None else 0,
+        "overall": latency_summary(everything),
+        "operations": {op: latency_summary(samples) for op, samples in latencies.items() if samples},
+    }
+
+
+def run_generate(args) -> Dict:
+    """Time bulk synthetic data generation."""
+    source = SyntheticWeather(seed=args.seed)
+    cities = city_names(args.cities)
+    report = {"seed": args.seed, "cities": args.cities, "steps": args.steps}
+    
+    start = time.perf_counter()
+    count = sum(1 for _ in source.series(cities, args.steps))
+    elapsed = time.perf_counter() - start
+    report["series_readings_per_s"] = count / elapsed if elapsed else 0.0
+    
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return report
+    start = time.perf_counter()
+    frame = source.frame(cities, args.steps)
+    elapsed = time.perf_counter() - start
+    report["frame_readings_per_s"] = len(frame) / elapsed if elapsed else 0.0
+    return report
+
+
+def print_report(report: Dict) -> None:
+    if "operations" not in report:
+        for key, value in report.items():
+            print(f"  {key:<24} {value:,.0f}" if isinstance(value, float) else f"  {key:<24} {value}")
+        return
+    print(f"seed {report['seed']}: {report['requests']} requests over {report['cities']} cities")
+    print(f"  target {report['target_rate']:,.0f} req/s, achieved {report['achieved_rate']:,.0f} req/s")
+    if report["prefetched"]:
+        print(f"  {report['prefetched']} entries refreshed in the background")
+    print(f"  {'operation':<10} {'count':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'p99.9':>9} {'max':>9}  (ms)")
+    rows = list(report["operations"].items()) + [("overall", report["overall"])]
+    for op, s in rows:
+        print(
+            f"  {op:<10} {s['count']:>7} {s['p50_ms']:>9.3f} {s['p90_ms']:>9.3f} "
+            f"{s['p99_ms']:>9.3f} {s['p999_ms']:>9.3f} {s['max_ms']:>9.3f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("mode", nargs="?", choices=("load", "generate"), default="load")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cities", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=2000.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of load")
+    parser.add_argument("--ttl", type=float, default=300.0, help="WeatherAPI cache TTL in seconds")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of city popularity")
+    parser.add_argument("--prefetch", type=float, default=0.0,
+                        help="background prefetch budget in fetches/s (0 disables)")
+    parser.add_argument("--current", type=float, default=0.5, help="weight of current-weather requests")
+    parser.add_argument("--forecast", type=float, default=0.3, help="weight of forecast requests")
+    parser.add_argument("--render", type=float, default=0.2, help="weight of full dashboard renders")
+    parser.add_argument("--steps", type=int, default=24, help="timesteps for generate mode")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+    
+    report = run_generate(args) if args.mode == "generate" else run_load(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,14 @@
-# Display package - rendering components
-from display.renderer import DashboardRenderer
-from display.widgets import TemperatureWidget, ForecastWidget, GaugeWidget
+# Display package - rendering components, loaded on first use
+from utils._lazy import lazy_exports
+
+_EXPORTS = {
+    "DashboardRenderer": "display.renderer",
+    "TemperatureWidget": "display.widgets",
+    "ForecastWidget": "display.widgets",
+    "GaugeWidget": "display.widgets",
+    "GridRenderer": "display.grid",
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS, globals())
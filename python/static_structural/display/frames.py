@@ -0,0 +1,151 @@
+"""
+Pre-rendered dashboard frames for serving to many viewers.
+"""
+import hashlib
+import html
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+
+from display.renderer import DashboardRenderer
+from utils.colors import Colors
+
+
+VARIANTS = {
+    "plain": "text/plain; charset=utf-8",
+    "ansi": "text/plain; charset=utf-8",
+    "html": "text/html; charset=utf-8",
+}
+
+# Colors codes mapped to CSS for the HTML variant
+CSS_COLORS = {
+    Colors.RED: "color:#e06c75",
+    Colors.GREEN: "color:#98c379",
+    Colors.YELLOW: "color:#e5c07b",
+    Colors.BLUE: "color:#61afef",
+    Colors.MAGENTA: "color:#c678dd",
+    Colors.CYAN: "color:#56b6c2",
+    Colors.WHITE: "color:#ffffff",
+    Colors.BOLD: "font-weight:bold",
+}
+ANSI_TOKEN_RE = re.compile(r"(\x1b\[[0-9;]*m)")
+
+
+def ansi_to_html(text: str) -> str:
+    """Convert Colors escape codes in text to HTML spans."""
+    out = []
+    open_spans = 0
+    for token in ANSI_TOKEN_RE.split(text):
+        if token == Colors.RESET:
+            out.append("</span>" * open_spans)
+            open_spans = 0
+        elif token in CSS_COLORS:
+            out.append(f'<span style="{CSS_COLORS[token]}">')
+            open_spans += 1
+        elif not ANSI_TOKEN_RE.fullmatch(token):
+            out.append(html.escape(token))
+    out.append("</span>" * open_spans)
+    return "".join(out)
+
+
+@dataclass
+class Frame:
+    """One rendered variant of a city's dashboard."""
+    body: bytes
+    etag: str
+    content_type: str
+
+
+@dataclass
+class CityFrames:
+    """Every variant of a city's dashboard from a single data refresh."""
+    frames: Dict[str, Frame]
+    rendered_at: float
+    expires_at: float
+
+
+class FrameCache:
+    """
+    Renders each city's dashboard once per data refresh.
+    
+    All variants are rendered together from the same data and kept with an
+    ETag derived from their content, so any number of viewers between two
+    refreshes are served from memory.
+    """
+    
+    def __init__(self, api, cities: Sequence[str], refresh_interval: Optional[float] = None):
+        """
+        Initialize frame cache.
+        
+        Args:
+            api: Weather API client
+            cities: Cities that may be served
+            refresh_interval: Seconds a rendered frame stays current,
+                defaults to the API's cache TTL, or 60 without one
+        """
+        self.api = api
+        self.cities = list(cities)
+        self.refresh_interval = refresh_interval or getattr(api, "cache_ttl", None) or 60.0
+        self.renderer = DashboardRenderer()
+        self.renders = 0
+        self._entries: Dict[str, CityFrames] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, city: str, variant: str = "plain") -> Frame:
+        """
+        Return a rendered frame, rendering it if it is missing or stale.
+        
+        Args:
+            city: City name (must be one of ``cities``)
+            variant: "plain", "ansi" or "html"
+        
+        Raises:
+            KeyError: If the city or variant is not served
+        """
+        if city not in self.cities or variant not in VARIANTS:
+            raise KeyError(f"{city}/{variant}")
+        entry = self._entries.get(city)
+        if entry is None or entry.expires_at <= time.time():
+            # One render per refresh even when many viewers arrive at once
+            with self._lock:
+                entry = self._entries.get(city)
+                if entry is None or entry.expires_at <= time.time():
+                    entry = self._render(city)
+                    self._entries[city] = entry
+        return entry.frames[variant]
+    
+    def max_age(self, city: str) -> int:
+        """Seconds until the city's frame is due for a refresh."""
+        entry = self._entries.get(city)
+        if entry is None:
+            return 0
+        return max(0, int(entry.expires_at - time.time()))
+    
+    def refresh(self) -> None:
+        """Re-render every city now."""
+        for city in self.cities:
+            entry = self._render(city)
+            with self._lock:
+                self._entries[city] = entry
+    
+    def _render(self, city: str) -> CityFrames:
+        current = self.api.get_current_weather(city)
+        forecast = self.api.get_forecast(city, days=5)
+        plain = "\n".join(self.renderer.build_dashboard(current, forecast)) + "\n"
+        ansi = "\n".join(self.renderer.build_dashboard(current, forecast, color=True)) + "\n"
+        page = (
+            "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+            f"<title>Weather - {html.escape(city)}</title></head>\n"
+            "<body style=\"background:#1e1e1e;color:#d4d4d4\"><pre>"
+            f"{ansi_to_html(ansi)}</pre></body></html>\n"
+        )
+        frames = {}
+        for variant, text in (("plain", plain), ("ansi", ansi), ("html", page)):
+            body = text.encode("utf-8")
+            etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+            frames[variant] = Frame(body, etag, VARIANTS[variant])
+        self.renders += 1
+        now = time.time()
+        return CityFrames(frames, now, now + self.refresh_interval)
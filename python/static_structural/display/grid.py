@@ -0,0 +1,166 @@
+"""
+Grid renderer - virtualized multi-city tile layout.
+"""
+import math
+from typing import Dict, List, Sequence
+
+from weather.models import WeatherData, Forecast
+from display.widgets import TemperatureWidget, ForecastWidget, GaugeWidget
+from utils.width import pad
+
+
+class GridRenderer:
+    """
+    Renders many cities as a scrollable grid of compact tiles.
+    
+    Only the cities inside the viewport are fetched and rendered. Tiles that
+    stay on screen across a scroll are reused, so the cost of a frame depends
+    on the viewport size rather than on the number of cities.
+    """
+    
+    TILE_WIDTH = 26
+    TILE_HEIGHT = 6
+    
+    def __init__(self, api, cities: Sequence[str], width: int = 80, height: int = 24):
+        """
+        Initialize grid renderer.
+        
+        Args:
+            api: Weather API client used to fetch visible cities
+            cities: All cities in display order
+            width: Viewport width in columns
+            height: Viewport height in lines
+        """
+        self.api = api
+        self.cities = list(cities)
+        self.temp_widget = TemperatureWidget()
+        self.forecast_widget = ForecastWidget()
+        self.gauge_widget = GaugeWidget()
+        self.offset = 0
+        self.tiles_rendered = 0
+        self._tiles: Dict[str, List[str]] = {}
+        self.resize(width, height)
+    
+    def resize(self, width: int, height: int) -> None:
+        """
+        Resize the viewport.
+        
+        Args:
+            width: Viewport width in columns
+            height: Viewport height in lines (one line is used for status)
+        """
+        self.width = width
+        self.height = height
+        self.columns = max(1, width // self.TILE_WIDTH)
+        self.rows = max(1, (height - 1) // self.TILE_HEIGHT)
+        self.scroll(0)
+    
+    @property
+    def total_rows(self) -> int:
+        """Return number of tile rows needed for all cities."""
+        return math.ceil(len(self.cities) / self.columns)
+    
+    @property
+    def page_size(self) -> int:
+        """Return number of tiles that fit in the viewport."""
+        return self.rows * self.columns
+    
+    def visible_cities(self) -> List[str]:
+        """Return the cities currently inside the viewport."""
+        start = self.offset * self.columns
+        return self.cities[start:start + self.page_size]
+    
+    def scroll(self, rows: int) -> None:
+        """
+        Scroll the viewport.
+        
+        Args:
+            rows: Number of tile rows to move (negative scrolls up)
+        """
+        max_offset = max(0, self.total_rows - self.rows)
+        self.offset = min(max_offset, max(0, self.offset + rows))
+    
+    def page_down(self) -> None:
+        """Scroll down by one full page."""
+        self.scroll(self.rows)
+    
+    def page_up(self) -> None:
+        """Scroll up by one full page."""
+        self.scroll(-self.rows)
+    
+    def invalidate(self, city: str = None) -> None:
+        """
+        Drop rendered tiles so they are fetched again on the next frame.
+        
+        Args:
+            city: City to refresh, or None to refresh every visible tile
+        """
+        if city is None:
+            self._tiles.clear()
+        else:
+            self._tiles.pop(city, None)
+    
+    def build_frame(self) -> List[str]:
+        """
+        Build the lines of the current frame.
+        
+        Returns:
+            Frame lines, tile rows followed by a status line
+        """
+        visible = self.visible_cities()
+        tiles = {}
+        for city in visible:
+            tile = self._tiles.get(city)
+            if tile is None:
+                tile = self._fetch_tile(city)
+            tiles[city] = tile
+        # Anything that scrolled offscreen is dropped rather than kept current
+        self._tiles = tiles
+        
+        lines = []
+        for start in range(0, len(visible), self.columns):
+            row = visible[start:start + self.columns]
+            for i in range(self.TILE_HEIGHT):
+                lines.append("".join(tiles[city][i] for city in row))
+        
+        first = self.offset * self.columns + 1 if visible else 0
+        last = self.offset * self.columns + len(visible)
+        lines.append(f" Cities {first}-{last} of {len(self.cities)}")
+        return lines
+    
+    def render(self) -> None:
+        """Render the current frame to terminal."""
+        print("\n".join(self.build_frame()))
+    
+    def render_tile(self, current: WeatherData, forecast: List[Forecast]) -> List[str]:
+        """
+        Render a compact tile for a single city.
+        
+        Args:
+            current: Current weather data
+            forecast: Forecast data, only the first day is shown
+        
+        Returns:
+            Tile lines, each TILE_WIDTH characters wide
+        """
+        inner = self.TILE_WIDTH - 2
+        body = [
+            f" {current.city}",
+            " " + self.temp_widget.render_compact(current.temperature, current.condition),
+            " " + self.forecast_widget.render_compact(forecast[0]) if forecast else "",
+            " " + self.gauge_widget.render_compact(
+                current.humidity, current.wind_speed, current.wind_direction
+            ),
+        ]
+        lines = ["┌" + "─" * inner + "┐"]
+        for text in body:
+            lines.append(f"│{pad(text, inner)}│")
+        lines.append("└" + "─" * inner + "┘")
+        return lines
+    
+    def _fetch_tile(self, city: str) -> List[str]:
+        """Fetch data for a city and render its tile."""
+        current = self.api.get_current_weather(city)
+        forecast = self.api.get_forecast(city, days=1)
+        self.tiles_rendered += 1
+        return self.render_tile(current, forecast)
@@ -5,7 +5,8 @@ from typing import List
 
 from weather.models import WeatherData, Forecast
 from display.widgets import TemperatureWidget, ForecastWidget, GaugeWidget
-from utils.colors import
+from utils.colors import Colors
+from utils.width import pad
 
 
 class DashboardRenderer:
@@ -27,51 +28,77 @@ class DashboardRenderer:
             current: Current weather data
             forecast: List of forecast data
         """
-        self._render_header(current.city)
-        self._render_current(current)
-        self._render_forecast(forecast)
-        self._render_gauges(current)
-        self._render_footer()
+        print("\n".join(self.build_dashboard(current, forecast)))
     
-    def _render_header(self, city: str) -> None:
+    def build_dashboard(self, current: WeatherData, forecast: List[Forecast], color: bool = False) -> List[str]:
+        """
+        Build the dashboard as a list of lines without printing it.
+        
+        Args:
+            current: Current weather data
+            forecast: List of forecast data
+            color: Include ANSI color codes
+        
+        Returns:
+            Dashboard lines
+        """
+        return (
+            self._render_header(current.city, color)
+            + self._render_current(current, color)
+            + self._render_forecast(forecast)
+            + self._render_gauges(current)
+            + self._render_footer()
+        )
+    
+    def _line(self, text: str) -> str:
+        """Pad text into a bordered dashboard row."""
+        return f"║{pad(text, self.WIDTH - 2)}║"
+    
+    def _render_header(self, city: str, color: bool = False) -> List[str]:
         """Render dashboard header."""
-        print("╔" + "═" * (self.WIDTH - 2) + "╗")
         title = f"🌤️  WEATHER DASHBOARD - {city}"
-        padding = (self.WIDTH - 2 - len(title)) // 2
-        print(f"║{' ' * padding}{title}{' ' * (self.WIDTH - 2 - padding - len(title))}║")
-        print("╠" + "═" * (self.WIDTH - 2) + "╣")
+        title = pad(title, self.WIDTH - 2, '^')
+        if color:
+            title = f"{Colors.BOLD}{title}{Colors.RESET}"
+        return [
+            "╔" + "═" * (self.WIDTH - 2) + "╗",
+            f"║{title}║",
+            "╠" + "═" * (self.WIDTH - 2) + "╣",
+        ]
     
-    def _render_current(self, weather: WeatherData) -> None:
+    def _render_current(self, weather: WeatherData, color: bool = False) -> List[str]:
         """Render current weather section."""
         temp_str = self.temp_widget.render(weather.temperature, weather.condition)
+        if color:
+            temp_str = f"{Colors.temperature_color(weather.temperature)}{temp_str}{Colors.RESET}"
         line = f"  CURRENT: {temp_str}"
-        print(f"║{line:<{self.WIDTH - 2}}║")
-        print(f"║{' ' * (self.WIDTH - 2)}║")
+        return [self._line(line), self._line("")]
     
-    def _render_forecast(self, forecast: List[Forecast]) -> None:
+    def _render_forecast(self, forecast: List[Forecast]) -> List[str]:
         """Render 5-day forecast section."""
-        print(f"║  5-DAY FORECAST:{' ' * (self.WIDTH - 19)}║")
+        lines = [self._line("  5-DAY FORECAST:")]
         
         # First row of forecasts
         row1 = "  "
         for f in forecast[:3]:
             row1 += self.forecast_widget.render_compact(f) + "   "
-        print(f"║{row1:<{self.WIDTH - 2}}║")
+        lines.append(self._line(row1))
         
         # Second row
         row2 = "  "
         for f in forecast[3:]:
             row2 += self.forecast_widget.render_compact(f) + "   "
-        print(f"║{row2:<{self.WIDTH - 2}}║")
-        print(f"║{' ' * (self.WIDTH - 2)}║")
+        lines.append(self._line(row2))
+        lines.append(self._line(""))
+        return lines
     
-    def _render_gauges(self, weather: WeatherData) -> None:
+    def _render_gauges(self, weather: WeatherData) -> List[str]:
         """Render humidity and wind gauges."""
         humidity = self.gauge_widget.render_humidity(weather.humidity)
         wind = self.gauge_widget.render_wind(weather.wind_speed, weather.wind_direction)
         line = f"  💧 {humidity}  💨 {wind}"
-        print(f"║{line:<{self.WIDTH - 2}}║")
+        return [self._line(line)]
     
-    def _render_footer(self) -> None:
+    def _render_footer(self) -> List[str]:
         """Render dashboard footer."""
-        print("╚" + "═" * (self.WIDTH - 2) + "╝")
+        return ["╚" + "═" * (self.WIDTH - 2) + "╝"]
@@ -22,6 +22,21 @@ class TemperatureWidget:
         bar = "█" * filled + "░" * (20 - filled)
         condition_name = condition.value.replace("_", " ").title()
         return f"{temp}°F  {bar}  {condition_name}"
+    
+    def render_compact(self, temp: int, condition: WeatherCondition) -> str:
+        """
+        Render short temperature bar for grid tiles.
+        
+        Args:
+            temp: Temperature in Fahrenheit
+            condition: Weather condition
+            
+        Returns:
+            Compact temperature string
+        """
+        filled = min(10, max(0, temp // 10))
+        bar = "█" * filled + "░" * (10 - filled)
+        return f"{temp}°F {bar} {condition.icon}"
 
 
 class ForecastWidget:
@@ -74,3 +89,17 @@ class GaugeWidget:
             Formatted wind string
         """
         return f"Wind: {speed} mph {direction}"
+    
+    def render_compact(self, humidity: int, speed: int, direction: str) -> str:
+        """
+        Render humidity and wind on a single short line.
+        
+        Args:
+            humidity: Humidity percentage
+            speed: Wind speed in mph
+            direction: Wind direction
+            
+        Returns:
+            Compact gauge string
+        """
+        return f"H {humidity}%  W {speed}{direction}"
@@ -2,7 +2,12 @@
 """
 Weather Dashboard - Terminal-based weather display
 Run with: python main.py
+
+Set WEATHER_SNAPSHOT to a file path to keep a cache snapshot there: the next
+run restores it and renders without waiting on the API. Unset, nothing is
+written.
 """
+import os
 
 from api import WeatherAPI
 
@@ -20,7 +25,14 @@ def main():
     print(f"{Colors.CYAN}Initializing Weather Dashboard...{Colors.RESET}")
     
     # Initialize API client
-    api = WeatherAPI()
+    snapshot_path = os.environ.get("WEATHER_SNAPSHOT")
+    if snapshot_path:
+        # Restored results are only served from the cache, so snapshots need a TTL
+        api = WeatherAPI(cache_ttl=300.0)
+        snapshots = api.start_snapshots(snapshot_path)
+    else:
+        api = WeatherAPI()
+        snapshots = None
     
     # Fetch current weather (mock data)
     current_weather = api.get_current_weather("San Francisco")
@@ -32,6 +44,9 @@ def main():
     renderer = DashboardRenderer()
     renderer.render_dashboard(current_weather, forecast)
     
+    if snapshots is not None:
+        snapshots.stop()
+    
     print(f"\n{Colors.GREEN}Dashboard rendered successfully!{Colors.RESET}")
 
 
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Weather Dashboard - HTTP server mode
+Run with: python server.py [--port 8080] [--city "San Francisco" ...]
+                           [--snapshot PATH] [--snapshot-interval 60]
+
+Endpoints:
+    /                       list of served cities
+    /city/<name>            dashboard (?format=plain|ansi|html, default
+                            from the Accept header)
+"""
+import argparse
+import html
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from weather.api import WeatherAPI
+from display.frames import FrameCache, VARIANTS
+
+from utils.colors import Colors
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Return True if an If-None-Match header matches ``etag``."""
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    """Serves frames from the server's FrameCache."""
+    
+    server_version = "WeatherDashboard/1.0"
+    frames: FrameCache = None
+    
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == "/":
+            self._send_index()
+        elif url.path.startswith("/city/"):
+            city = unquote(url.path[len("/city/"):])
+            variant = parse_qs(url.query).get("format", [None])[0] or self._preferred_variant()
+            self._send_frame(city, variant)
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND)
+    
+    do_HEAD = do_GET
+    
+    def _preferred_variant(self) -> str:
+        accept = self.headers.get("Accept", "")
+        return "html" if "text/html" in accept else "plain"
+    
+    def _send_frame(self, city: str, variant: str) -> None:
+        try:
+            frame = self.frames.get(city, variant)
+        except KeyError:
+            self.send_error(HTTPStatus.NOT_FOUND, f"Unknown city or format: {city} ({variant})")
+            return
+        
+        if etag_matches(self.headers.get("If-None-Match"), frame.etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_cache_headers(city, frame.etag)
+            self.end_headers()
+            return
+        
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", frame.content_type)
+        self.send_header("Content-Length", str(len(frame.body)))
+        self._send_cache_headers(city, frame.etag)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(frame.body)
+    
+    def _send_cache_headers(self, city: str, etag: str) -> None:
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", f"max-age={self.frames.max_age(city)}")
+        self.send_header("Vary", "Accept")
+    
+    def _send_index(self) -> None:
+        links = "".join(
+            f'<li><a href="/city/{quote(city)}">{html.escape(city)}</a></li>' for city in self.frames.cities
+        )
+        body = f"<!DOCTYPE html><html><body><ul>{links}</ul></body></html>\n".encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", VARIANTS["html"])
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+    
+    def log_message(self, format: str, *args) -> None:
+        """Keep the console quiet; viewers poll frequently."""
+
+
+def make_server(host: str, port: int, frames: FrameCache) -> ThreadingHTTPServer:
+    """Create an HTTP server bound to a FrameCache."""
+    handler = type("BoundDashboardHandler", (DashboardHandler,), {"frames": frames})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    """Entry point for the dashboard HTTP server."""
+    parser = argparse.ArgumentParser(description="Serve pre-rendered weather dashboards over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--city", action="append", dest="cities", help="city to serve (repeatable)")
+    parser.add_argument("--refresh", type=float, default=60.0, help="seconds between re-renders")
+    parser.add_argument("--snapshot", metavar="PATH",
+                        help="cache snapshot restored at startup and rewritten periodically (default: none)")
+    parser.add_argument("--snapshot-interval", type=float, default=60.0, help="seconds between snapshots")
+    args = parser.parse_args()
+    
+    api = WeatherAPI(cache_ttl=args.refresh)
+    snapshots = api.start_snapshots(args.snapshot, args.snapshot_interval) if args.snapshot else None
+    frames = FrameCache(api, args.cities or ["San Francisco"], refresh_interval=args.refresh)
+    server = make_server(args.host, args.port, frames)
+    print(f"{Colors.CYAN}Serving weather dashboard on http://{args.host}:{args.port}/{Colors.RESET}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if snapshots is not None:
+            snapshots.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,830 @@
+"""
+Test suite for the weather dashboard subsystems.
+
+Run from this directory with: pytest test_dashboard.py
+"""
+import http.client
+import json
+import os
+import random
+import struct
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from display.frames import FrameCache
+from display.grid import GridRenderer
+from display.renderer import DashboardRenderer
+from server import etag_matches, make_server
+from utils._lazy import lazy_exports
+from utils.width import ANSI_RE, display_width, graphemes, pad, truncate
+from weather.alerts import AlertBroker
+from weather.api import WeatherAPI
+from weather.history import DAY, HOUR, MINUTE, HistoryStore, RingSeries
+from weather.models import Forecast, Station, WeatherCondition, WeatherData
+from weather.prefetch import Prefetcher
+from weather.source import SyntheticWeather
+from weather.stations import StationIndex, haversine_km
+from weather.snapshot import HEADER, SnapshotError, SnapshotWriter, WeatherSnapshot
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def api():
+    """Provide a seeded API client so data is reproducible."""
+    return WeatherAPI(seed=7)
+
+
+# ==================== Grid ====================
+
+class TestGridRenderer:
+    """Tests for the virtualized multi-city grid."""
+    
+    CITIES = [f"City {i}" for i in range(50)]
+    
+    def test_renders_only_viewport(self, api):
+        """A frame should fetch and draw just the visible tiles."""
+        grid = GridRenderer(api, self.CITIES, width=80, height=13)
+        assert (grid.columns, grid.rows, grid.page_size) == (3, 2, 6)
+        lines = grid.build_frame()
+        assert grid.tiles_rendered == 6
+        assert len(lines) == 2 * GridRenderer.TILE_HEIGHT + 1
+        assert all(display_width(line) == 3 * GridRenderer.TILE_WIDTH for line in lines[:-1])
+        assert "City 0" in lines[1] and "City 5" in lines[7]
+        assert lines[-1] == " Cities 1-6 of 50"
+    
+    def test_scroll_reuses_visible_tiles(self, api):
+        """Scrolling one row should render only the row that came into view."""
+        grid = GridRenderer(api, self.CITIES, width=80, height=13)
+        grid.build_frame()
+        grid.scroll(1)
+        lines = grid.build_frame()
+        assert grid.tiles_rendered == 9
+        assert grid.visible_cities() == self.CITIES[3:9]
+        assert lines[-1] == " Cities 4-9 of 50"
+        grid.invalidate("City 4")
+        grid.build_frame()
+        assert grid.tiles_rendered == 10
+    
+    def test_scroll_is_clamped(self, api):
+        """The viewport should not scroll past either end."""
+        grid = GridRenderer(api, self.CITIES, width=80, height=13)
+        grid.scroll(-5)
+        assert grid.offset == 0
+        for _ in range(20):
+            grid.page_down()
+        assert grid.offset == grid.total_rows - grid.rows
+        assert grid.visible_cities() == self.CITIES[45:]
+        assert grid.build_frame()[-1] == " Cities 46-50 of 50"
+        grid.resize(26, 7)
+        assert grid.page_size == 1
+
+
+# ==================== Dashboard ====================
+
+class TestDashboardRenderer:
+    """Tests for the full single-city dashboard."""
+    
+    CURRENT = WeatherData("Oslo", 72, 65, 12, "NW", WeatherCondition.SUNNY, datetime(2024, 3, 4, 9))
+    FORECAST = [
+        Forecast(datetime(2024, 3, 5 + i), 60 + 5 * i, 50 + 5 * i, WeatherCondition.RAINY, 10 * i)
+        for i in range(5)
+    ]
+    
+    def test_render_dashboard(self, capsys):
+        """The printed dashboard should be a closed 60-cell box with every section."""
+        DashboardRenderer().render_dashboard(self.CURRENT, self.FORECAST)
+        lines = capsys.readouterr().out.rstrip("\n").split("\n")
+        assert len(lines) == 11
+        assert lines[0] == "╔" + "═" * 58 + "╗"
+        assert lines[2] == "╠" + "═" * 58 + "╣"
+        assert lines[-1] == "╚" + "═" * 58 + "╝"
+        assert all(display_width(line) == 60 for line in lines)
+        assert all(line[0] == line[-1] == "║" for line in [lines[1]] + lines[3:-1])
+        assert lines[1].strip("║ ") == "🌤️  WEATHER DASHBOARD - Oslo"
+        assert lines[3] == "║" + pad("  CURRENT: 72°F  " + "█" * 14 + "░" * 6 + "  Sunny", 58) + "║"
+        assert lines[5] == "║" + pad("  5-DAY FORECAST:", 58) + "║"
+        assert lines[6].split() == ["║", "Tue:", "60°F", "▂▄", "Wed:", "65°F", "▂▄", "Thu:", "70°F", "▄▆", "║"]
+        assert lines[7].split() == ["║", "Fri:", "75°F", "▄▆", "Sat:", "80°F", "▆█", "║"]
+        assert lines[9] == "║" + pad("  💧 Humidity: 65%  💨 Wind: 12 mph NW", 58) + "║"
+    
+    def test_color_codes_take_no_cells(self):
+        """Colored output should differ only by escape codes."""
+        renderer = DashboardRenderer()
+        plain = renderer.build_dashboard(self.CURRENT, self.FORECAST)
+        colored = renderer.build_dashboard(self.CURRENT, self.FORECAST, color=True)
+        assert colored != plain
+        assert [ANSI_RE.sub("", line) for line in colored] == plain
+        assert all(display_width(line) == 60 for line in colored)
+
+
+# ==================== Display Width ====================
+
+class TestDisplayWidth:
+    """Tests for terminal display widths and padding."""
+    
+    @pytest.mark.parametrize("text, width", [
+        ("abc", 3),
+        ("東京", 4),             # East Asian wide
+        ("⛅", 2),               # wide emoji
+        ("🌤️", 2),              # emoji presentation selector
+        ("☀\ufe0e", 1),         # text presentation selector
+        ("e\u0301", 1),         # combining acute accent
+        ("👍🏽", 2),              # skin-tone modifier
+        ("👩\u200d👩\u200d👧", 2),  # ZWJ sequence
+        ("🇳🇴", 2),              # flag pair
+        ("\x1b[31mhot\x1b[0m", 3),
+    ])
+    def test_widths(self, text, width):
+        """Each grapheme should count the cells a terminal draws for it."""
+        assert display_width(text) == width
+    
+    def test_graphemes_and_truncation(self):
+        """Truncation and padding should never split a grapheme or a wide cell."""
+        assert graphemes("Zu\u0308rich 🇳🇴") == ["Z", "u\u0308", "r", "i", "c", "h", " ", "🇳🇴"]
+        assert truncate("東京都", 5) == "東京"
+        assert truncate("Zu\u0308rich", 2) == "Zu\u0308"
+        assert pad("東京", 5) == "東京 "
+        assert pad("⛅", 5, ">") == "   ⛅"
+        assert pad("⛅", 5, "^") == " ⛅  "
+        assert all(display_width(pad(text, 7)) == 7 for text in ("e\u0301", "👍🏽 ok", "東京東京"))
+    
+    def test_grid_tiles_line_up(self, api):
+        """Tiles for wide and combining city names should fill the grid exactly."""
+        grid = GridRenderer(api, ["東京", "Zu\u0308rich", "🇳🇴 Oslo"], width=80, height=13)
+        lines = grid.build_frame()
+        assert all(display_width(line) == 3 * GridRenderer.TILE_WIDTH for line in lines[:-1])
+        assert lines[1].count("│") == 6
+
+
+# ==================== History ====================
+
+class TestHistoryStore:
+    """Tests for bounded history rings and rollups."""
+    
+    START = datetime(2024, 3, 1)
+    
+    def at(self, seconds: float) -> datetime:
+        """Time ``seconds`` after START."""
+        return self.START + timedelta(seconds=seconds)
+    
+    def test_rollups_aggregate_buckets(self):
+        """Minute buckets should hold min, max, average and count."""
+        store = HistoryStore()
+        for i, value in enumerate([10, 20, 30, 40, 50, 60]):
+            store.record("Oslo", "temperature", value, self.at(i * 30))
+        points = store.query("Oslo", "temperature", self.at(0), self.at(180), step=MINUTE)
+        assert [(p.minimum, p.maximum, p.average, p.count) for p in points] == [
+            (10, 20, 15, 2), (30, 40, 35, 2), (50, 60, 55, 2),
+        ]
+        raw = store.query("Oslo", "temperature", self.at(0), self.at(180))
+        assert [p.average for p in raw] == [10, 20, 30, 40, 50, 60]
+        summary = store.summary("Oslo", "temperature", self.at(0), self.at(180))
+        assert (summary.minimum, summary.maximum, summary.average, summary.count) == (10, 60, 35, 6)
+    
+    def test_summary_of_sub_day_range(self):
+        """A short summary should count only readings inside the range."""
+        store = HistoryStore()
+        for i in range(2 * 24 * 60):
+            store.record("Oslo", "humidity", i % 100, self.at(i * 60))
+        # 30 minutes, answered from raw readings despite the day rollup
+        summary = store.summary("Oslo", "humidity", self.at(DAY + 10 * 60), self.at(DAY + 39 * 60))
+        assert (summary.minimum, summary.maximum, summary.count) == (50, 79, 30)
+        assert summary.timestamp == self.at(DAY + 10 * 60)
+        
+        # Raw ring too short: only the minute buckets inside the range count
+        store = HistoryStore(raw_capacity=10)
+        for i in range(600):
+            store.record("Oslo", "humidity", i % 100, self.at(i * 10))
+        summary = store.summary("Oslo", "humidity", self.at(45), self.at(215))
+        assert (summary.minimum, summary.maximum, summary.count) == (6, 17, 12)
+    
+    def test_select_falls_back_to_rollups(self):
+        """Ranges older than the raw ring should be answered from rollups."""
+        store = HistoryStore(raw_capacity=10, rollup_capacity={MINUTE: 5, HOUR: 48})
+        for i in range(600):
+            store.record("Oslo", "humidity", i % 100, self.at(i * 10))
+        points = store.query("Oslo", "humidity", self.at(0), self.at(6000))
+        assert [p.count for p in points] == [360, 240]
+        assert points[0].timestamp == self.START
+        recent = store.query("Oslo", "humidity", self.at(5910), self.at(6000))
+        assert len(recent) == 9 and all(p.count == 1 for p in recent)
+        assert store.query("Oslo", "wind_speed", self.at(0)) == []
+    
+    def test_late_and_out_of_order_readings(self):
+        """Late readings should land in time order instead of being lost."""
+        ring = RingSeries(0, 4)
+        for ts in (10, 30, 20, 20, 40):
+            ring.add(ts, ts)
+        assert list(ring.items()[0]) == [20, 20, 30, 40]
+        ring.add(5, 5)
+        assert ring.dropped == 1
+        
+        minutes = RingSeries(MINUTE, 10)
+        for ts, value in ((0, 1), (300, 2), (130, 3), (10, 4)):
+            minutes.add(ts, value)
+        starts, counts, mins, maxs, sums = minutes.items()
+        assert list(starts) == [0, 120, 300]
+        assert list(counts) == [2, 1, 1]
+        assert list(sums) == [5, 3, 2]
+        assert minutes.dropped == 0
+
+
+# ==================== Alerts ====================
+
+class TestAlertBroker:
+    """Tests for push-based alert subscriptions."""
+    
+    def test_unchanged_alerts_are_deduplicated(self):
+        """Publishing the same alerts again should not notify anyone."""
+        broker = AlertBroker()
+        subscription = broker.subscribe(["Oslo"])
+        assert broker.publish("Oslo", ["Wind", "Snow"]) is not None
+        assert broker.publish("Oslo", ["Snow", "Wind", "Snow"]) is None
+        assert broker.publish("Bergen", ["Rain"]) is not None
+        assert (broker.published, broker.deduplicated) == (3, 1)
+        events = subscription.drain()
+        assert [(e.city, e.alerts) for e in events] == [("Oslo", ("Wind", "Snow"))]
+    
+    def test_pending_updates_coalesce(self):
+        """A slow consumer should see one event per city, net of changes."""
+        broker = AlertBroker()
+        subscription = broker.subscribe()
+        broker.publish("Oslo", ["Wind"])
+        broker.publish("Oslo", ["Wind", "Snow"])
+        event = subscription.get(timeout=0)
+        assert (event.alerts, event.previous, event.added) == (("Wind", "Snow"), (), ["Wind", "Snow"])
+        assert subscription.coalesced == 1
+        
+        broker.publish("Oslo", ["Snow"])
+        broker.publish("Oslo", ["Wind", "Snow"])  # Back to what the consumer last saw
+        assert len(subscription) == 0
+        assert subscription.get(timeout=0) is None
+    
+    def test_max_pending_drops_oldest(self):
+        """A full buffer should drop its oldest city, not block the publisher."""
+        broker = AlertBroker()
+        subscription = broker.subscribe(max_pending=3)
+        for i in range(5):
+            broker.publish(f"City {i}", ["Heat"])
+        assert subscription.dropped == 2
+        assert [event.city for event in subscription.drain()] == ["City 2", "City 3", "City 4"]
+    
+    def test_api_replay_and_callbacks(self, api):
+        """Subscribers should get current alerts on join, and callbacks every change."""
+        api.push_alerts("Oslo", ["Flood"])
+        received = []
+        api.subscribe_alerts(["Oslo"], callback=received.append)
+        api.push_alerts("Oslo", [])
+        assert [(e.alerts, e.removed) for e in received] == [(("Flood",), []), ((), ["Flood"])]
+        assert api.refresh_alerts() == 0
+        assert api.get_alerts("Oslo") == []
+
+
+# ==================== Snapshots ====================
+
+class TestSnapshots:
+    """Tests for memory-mapped cache and history snapshots."""
+    
+    CITIES = ["Oslo", "Lima", "Perth"]
+    
+    @staticmethod
+    def fields(weather):
+        """Fields of a WeatherData that survive a snapshot exactly."""
+        return (weather.city, weather.temperature, weather.humidity, weather.wind_speed,
+                weather.wind_direction, weather.condition, weather.feels_like)
+    
+    def test_caching_is_opt_in(self):
+        """Without a cache_ttl every call should fetch a fresh reading."""
+        fresh = WeatherAPI(seed=3)
+        assert fresh.get_current_weather("Oslo") is not fresh.get_current_weather("Oslo")
+        cached = WeatherAPI(seed=3, cache_ttl=300)
+        assert cached.get_current_weather("Oslo") is cached.get_current_weather("Oslo")
+    
+    def test_round_trip(self, tmp_path):
+        """A loaded snapshot should serve the saved cache and history."""
+        path = str(tmp_path / "cache.snap")
+        api = WeatherAPI(seed=3, cache_ttl=300, history=HistoryStore())
+        for city in self.CITIES:
+            api.get_current_weather(city)
+            api.get_forecast(city, days=3)
+        api.save_snapshot(path)
+        
+        restored = WeatherAPI(seed=4, cache_ttl=300, history=HistoryStore())
+        assert restored.load_snapshot(path, refresh=False) == 6
+        for city in self.CITIES:
+            assert self.fields(restored.get_current_weather(city)) == self.fields(api.get_current_weather(city))
+            assert [(f.high_temp, f.condition) for f in restored.get_forecast(city, days=3)] == [
+                (f.high_temp, f.condition) for f in api.get_forecast(city, days=3)
+            ]
+        assert sorted(restored.history.keys()) == sorted(api.history.keys())
+        assert os.listdir(tmp_path) == ["cache.snap"]
+    
+    def test_replace_is_atomic(self, tmp_path, monkeypatch):
+        """Readers keep the old file, and a failed write leaves it in place."""
+        path = str(tmp_path / "cache.snap")
+        api = WeatherAPI(seed=3)
+        api.get_current_weather("Oslo")
+        api.save_snapshot(path)
+        with WeatherSnapshot.open(path) as old:
+            api.get_current_weather("Lima")
+            api.save_snapshot(path)
+            assert old.n_current == 1
+            with WeatherSnapshot.open(path) as new:
+                assert new.n_current == 2
+        
+        def fail(source, target):
+            raise OSError("disk full")
+        
+        monkeypatch.setattr(os, "replace", fail)
+        api.get_current_weather("Perth")
+        with pytest.raises(OSError):
+            api.save_snapshot(path)
+        assert os.listdir(tmp_path) == ["cache.snap"]
+        with WeatherSnapshot.open(path) as kept:
+            assert kept.n_current == 2
+    
+    def test_restore_keeps_live_readings(self, tmp_path):
+        """History recorded before a background restore should survive it."""
+        start = datetime(2024, 3, 1).timestamp()
+        path = str(tmp_path / "cache.snap")
+        before = WeatherAPI(history=HistoryStore())
+        for i in range(5):
+            before.history.record("Oslo", "temperature", i, datetime.fromtimestamp(start + i * 20))
+        before.save_snapshot(path)
+        
+        after = WeatherAPI(history=HistoryStore())
+        for i in range(5, 8):
+            after.history.record("Oslo", "temperature", i, datetime.fromtimestamp(start + i * 20))
+        after.load_snapshot(path, refresh=False)
+        raw = after.history.query("Oslo", "temperature", datetime.fromtimestamp(start),
+                                  datetime.fromtimestamp(start + 200))
+        assert [p.average for p in raw] == list(range(8))
+        minutes = after.history.query("Oslo", "temperature", datetime.fromtimestamp(start),
+                                      datetime.fromtimestamp(start + 200), step=MINUTE)
+        assert [p.count for p in minutes] == [3, 3, 2]
+    
+    def test_truncated_snapshots_are_rejected(self, tmp_path):
+        """Every truncation should raise SnapshotError and start cold."""
+        path = str(tmp_path / "cache.snap")
+        api = WeatherAPI(seed=3, history=HistoryStore())
+        for city in self.CITIES:
+            api.get_current_weather(city)
+            api.get_forecast(city, days=2)
+        api.save_snapshot(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        
+        for size in [0, 10, 80] + list(range(100, len(data), 7)):
+            with open(path, "wb") as f:
+                f.write(data[:size])
+            with pytest.raises(SnapshotError):
+                WeatherSnapshot.open(path)
+            cold = WeatherAPI(seed=5)
+            writer = cold.start_snapshots(path, interval=3600)
+            writer.stop(final=False)
+            assert cold.cache_entries() == []
+        
+        # A record naming a string past the end of the string table
+        current_off = HEADER.unpack_from(data)[9]
+        with open(path, "wb") as f:
+            f.write(data[:current_off] + b"\xff" * 4 + data[current_off + 4:])
+        with pytest.raises(SnapshotError, match="invalid current record"):
+            WeatherSnapshot.open(path)
+    
+    def test_writer_survives_errors(self, tmp_path):
+        """Any failed write should be recorded without ending the writer."""
+        path = str(tmp_path / "cache.snap")
+        api = WeatherAPI(seed=3)
+        writer = SnapshotWriter(api, path)
+        api.prime_cache(("current", "Oslo", 0), api.get_current_weather("Oslo"), 1e30)
+        api.get_current_weather("Oslo").temperature = 10 ** 6  # Does not fit the record
+        assert writer.write() is False
+        assert writer.failures == 1 and isinstance(writer.last_error, struct.error)
+        api.get_current_weather("Oslo").temperature = 70
+        assert writer.write() is True and writer.writes == 1
+    
+    def test_start_snapshots_restores_at_startup(self, tmp_path):
+        """start_snapshots should warm the cache and write on stop."""
+        path = str(tmp_path / "cache.snap")
+        first = WeatherAPI(seed=3)
+        writer = first.start_snapshots(path, interval=3600)
+        first.get_current_weather("Oslo")
+        writer.stop()
+        assert writer.writes == 1
+        
+        second = WeatherAPI(seed=4)
+        writer = second.start_snapshots(path, interval=3600)
+        assert [key for key, _, _ in second.cache_entries()] == [("current", "Oslo", 0)]
+        assert second.wait_for_refresh(timeout=5)
+        writer.stop(final=False)
+        
+        with open(path, "wb") as f:
+            f.write(b"not a snapshot")
+        with pytest.raises(SnapshotError):
+            WeatherAPI().load_snapshot(path)
+        third = WeatherAPI(seed=5)
+        third.start_snapshots(path, interval=3600).stop()
+        with WeatherSnapshot.open(path) as snapshot:
+            assert snapshot.n_current == 0
+
+
+# ==================== Frame Server ====================
+
+class TestFrameServer:
+    """Tests for pre-rendered frames and conditional HTTP responses."""
+    
+    def test_one_render_per_refresh(self, api):
+        """Every variant should come from a single render until it expires."""
+        frames = FrameCache(api, ["Oslo"], refresh_interval=3600)
+        plain = frames.get("Oslo", "plain")
+        assert frames.get("Oslo", "html").content_type.startswith("text/html")
+        assert frames.get("Oslo", "plain") is plain
+        assert frames.renders == 1
+        assert len({frames.get("Oslo", v).etag for v in ("plain", "ansi", "html")}) == 3
+        with pytest.raises(KeyError):
+            frames.get("Lima")
+        with pytest.raises(KeyError):
+            frames.get("Oslo", "pdf")
+    
+    def test_etag_changes_with_content(self):
+        """A refresh with new data should change the ETag; same data keeps it."""
+        api = WeatherAPI(seed=7, cache_ttl=300)
+        frames = FrameCache(api, ["Oslo"], refresh_interval=3600)
+        first = frames.get("Oslo").etag
+        frames.refresh()
+        assert frames.get("Oslo").etag == first
+        api.get_current_weather("Oslo").temperature += 1
+        frames.refresh()
+        assert frames.get("Oslo").etag != first
+        assert frames.renders == 3
+    
+    def test_etag_matches(self):
+        """If-None-Match lists, weak validators and * should all match."""
+        assert etag_matches('"abc"', '"abc"')
+        assert etag_matches('"x", W/"abc"', '"abc"')
+        assert etag_matches("*", '"abc"')
+        assert not etag_matches('"abcd"', '"abc"')
+        assert not etag_matches(None, '"abc"')
+        assert not etag_matches("", '"abc"')
+    
+    def test_conditional_get(self, api):
+        """A matching If-None-Match should get an empty 304."""
+        server = make_server("127.0.0.1", 0, FrameCache(api, ["San Francisco"], refresh_interval=3600))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+            conn.request("GET", "/city/San%20Francisco?format=plain")
+            response = conn.getresponse()
+            body = response.read()
+            etag = response.getheader("ETag")
+            assert response.status == 200
+            assert "San Francisco" in body.decode("utf-8")
+            assert response.getheader("Cache-Control").startswith("max-age=")
+            
+            conn.request("GET", "/city/San%20Francisco?format=plain", headers={"If-None-Match": etag})
+            response = conn.getresponse()
+            assert response.status == 304
+            assert response.read() == b""
+            assert response.getheader("ETag") == etag
+            
+            conn.request("GET", "/city/San%20Francisco", headers={"Accept": "text/html"})
+            response = conn.getresponse()
+            response.read()
+            assert response.getheader("Content-Type").startswith("text/html")
+            assert response.getheader("ETag") != etag
+            
+            conn.request("GET", "/city/Nowhere")
+            response = conn.getresponse()
+            response.read()
+            assert response.status == 404
+            conn.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+# ==================== Stations ====================
+
+class TestStationIndex:
+    """Tests for nearest-station and bounding-box queries against brute force."""
+    
+    @pytest.fixture
+    def stations(self):
+        """Seeded random stations plus poles and antimeridian cases."""
+        rng = random.Random(11)
+        stations = [
+            Station(f"S{i}", f"Station {i}", rng.uniform(-90, 90), rng.uniform(-180, 180))
+            for i in range(600)
+        ]
+        # Edge cases: poles, the antimeridian and a duplicate location
+        stations += [
+            Station("N", "North Pole", 90.0, 0.0),
+            Station("S", "South Pole", -90.0, 45.0),
+            Station("E", "East", 10.0, 180.0),
+            Station("W", "West", 10.0, -180.0),
+            Station("D", "Duplicate", 10.0, -180.0),
+        ]
+        return stations
+    
+    @pytest.fixture
+    def index(self, stations):
+        """Index over the stations fixture."""
+        return StationIndex(stations)
+    
+    QUERIES = [(0, 0), (10, 179.9), (-10, -179.9), (89.5, 120), (-89.9, -60), (51.5, -0.1), (35.7, 139.7)]
+    
+    def test_nearest_matches_brute_force(self, stations, index):
+        """Distances of the k nearest should equal the k smallest overall."""
+        for latitude, longitude in self.QUERIES:
+            expected = sorted(haversine_km((latitude, longitude), (s.latitude, s.longitude)) for s in stations)
+            for k in (1, 5, 40):
+                found = index.nearest(latitude, longitude, k)
+                assert [d for _, d in found] == pytest.approx(expected[:k], abs=1e-6)
+                for station, distance in found:
+                    assert distance == pytest.approx(
+                        haversine_km((latitude, longitude), (station.latitude, station.longitude)), abs=1e-6
+                    )
+    
+    def test_nearest_edge_cases(self, index):
+        """k beyond the index size returns everything; empty indexes return nothing."""
+        assert len(index.nearest(0, 0, k=10_000)) == len(index)
+        assert index.nearest(0, 0, k=0) == []
+        assert StationIndex([]).nearest(0, 0) == []
+        assert index.nearest_many([(90, 0), (10, -180)]) == [
+            index.nearest(90, 0), index.nearest(10, -180)
+        ]
+        assert index.get("N").name == "North Pole"
+        assert index.get("missing") is None
+    
+    def test_within_matches_brute_force(self, stations, index):
+        """Box results, including antimeridian wraps, should equal a full scan."""
+        boxes = [
+            (-10, -20, 10, 20),
+            (0.5, 10.25, 0.75, 10.5),
+            (-90, -180, 90, 180),
+            (5, 170, 15, -170),     # wraps the antimeridian
+            (10, 180, 10, 180),     # on the edges themselves
+            (80, -180, 90, 180),
+            (-33.3, 100, 12.7, 101),
+        ]
+        for south, west, north, east in boxes:
+            if west <= east:
+                inside = lambda lon: west <= lon <= east
+            else:
+                inside = lambda lon: lon >= west or lon <= east
+            expected = {s.id for s in stations if south <= s.latitude <= north and inside(s.longitude)}
+            found = index.within(south, west, north, east)
+            assert len(found) == len(expected)
+            assert {s.id for s in found} == expected
+        assert index.within(10, 180, 10, 180)[0].id == "E"
+        assert {s.id for s in index.within(10, 179, 10, -179)} == {"E", "W", "D"}
+
+
+# ==================== Prefetch ====================
+
+class TestPrefetcher:
+    """Tests for refreshing hot cache entries before they expire."""
+    
+    @staticmethod
+    def read(api, city, times):
+        """Read a city's current weather ``times`` times."""
+        for _ in range(times):
+            api.get_current_weather(city)
+    
+    @staticmethod
+    def expire_soon(api, city, seconds):
+        """Make a city's cached reading expire in ``seconds`` without counting a read."""
+        key = ("current", city, 0)
+        api.prime_cache(key, api.refresh(key), time.time() + seconds)
+    
+    def test_refreshes_hot_keys_before_expiry(self):
+        """Only keys read often enough and close to expiry should be refetched."""
+        api = WeatherAPI(seed=3, cache_ttl=300)
+        prefetcher = Prefetcher(api, interval=1.0, lead=10.0, min_hits=2)
+        self.read(api, "Oslo", 5)
+        self.read(api, "Lima", 5)
+        self.read(api, "Perth", 1)
+        self.expire_soon(api, "Oslo", 5)
+        self.expire_soon(api, "Perth", 5)
+        before = api.cache_entries()[0][2]
+        
+        assert prefetcher.run_once() == 1
+        assert [key for key, _ in prefetcher.hot_keys()] == [("current", "Oslo", 0), ("current", "Lima", 0)]
+        assert api.cache_entries()[0][2] is not before
+        assert api.cache_expiry(("current", "Oslo", 0)) > time.time() + 200
+        assert api.cache_expiry(("current", "Perth", 0)) < time.time() + 10  # Too cold
+        # Decayed scores: 5 reads become 2.5, then 1.25, below min_hits
+        assert prefetcher.run_once() == 0
+        assert prefetcher.hot_keys() == []
+    
+    def test_budget_defers_refreshes(self):
+        """A pass should refresh at most budget * interval keys, hottest first."""
+        api = WeatherAPI(seed=3, cache_ttl=300)
+        prefetcher = Prefetcher(api, interval=1.0, lead=10.0, budget=2)
+        for hits, city in enumerate(["Oslo", "Lima", "Perth", "Quito"], start=3):
+            self.read(api, city, hits)
+            self.expire_soon(api, city, 1)
+        assert prefetcher.run_once() == 2
+        assert (prefetcher.fetches, prefetcher.deferred) == (2, 2)
+        assert api.cache_expiry(("current", "Quito", 0)) > time.time() + 200
+        assert api.cache_expiry(("current", "Oslo", 0)) < time.time() + 10
+    
+    def test_start_and_stop(self):
+        """The thread should run passes until stopped, and survive errors."""
+        api = WeatherAPI(seed=3, cache_ttl=300)
+        prefetcher = api.start_prefetch(interval=0.01, lead=1000, min_hits=1)
+        self.read(api, "Oslo", 3)
+        deadline = time.time() + 5
+        while prefetcher.fetches == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        prefetcher.stop()
+        assert prefetcher._thread is None and prefetcher.fetches >= 1
+        fetches = prefetcher.fetches
+        time.sleep(0.05)
+        assert prefetcher.fetches == fetches  # Cancelled: no more passes
+        prefetcher.stop()  # Stopping twice is harmless
+        
+        def fail(key):
+            raise RuntimeError("upstream down")
+        
+        api.refresh = fail
+        prefetcher.start()
+        self.read(api, "Oslo", 3)
+        deadline = time.time() + 5
+        while prefetcher.last_error is None and time.time() < deadline:
+            time.sleep(0.01)
+        assert prefetcher._thread.is_alive()
+        prefetcher.stop()
+        assert isinstance(prefetcher.last_error, RuntimeError)
+
+
+# ==================== Synthetic Source ====================
+
+class TestSyntheticWeather:
+    """Tests for the seeded synthetic weather source."""
+    
+    CITIES = ["Oslo", "Lima", "Perth"]
+    
+    def test_readings_are_reproducible(self):
+        """Each reading should depend only on seed, city and timestep."""
+        first, second = SyntheticWeather(seed=5), SyntheticWeather(seed=5)
+        assert second.current("Lima", 7) == first.current("Lima", 7)
+        second.current("Oslo", 3)  # Call order does not matter
+        assert second.forecast("Lima", 3, t=7) == first.forecast("Lima", 3, t=7)
+        assert SyntheticWeather(seed=6).current("Lima", 7) != first.current("Lima", 7)
+        assert first.stations(20) == second.stations(20)
+        assert len({station.id for station in first.stations(20)}) == 20
+    
+    def test_series_without_numpy(self):
+        """The pure-Python series should be time-major readings from current."""
+        source = SyntheticWeather(seed=5)
+        readings = list(source.series(self.CITIES, 4))
+        assert len(readings) == 12
+        assert [(r.city, r.timestamp) for r in readings[3:6]] == [
+            (city, source.start + source.step) for city in self.CITIES
+        ]
+        assert readings[4] == source.current("Lima", 1)
+        assert all(0 <= r.humidity <= 100 and r.wind_speed >= 0 for r in readings)
+    
+    def test_frame_matches_series_layout(self):
+        """The NumPy frame should use the same rows as series and be reproducible."""
+        pytest.importorskip("numpy")
+        source = SyntheticWeather(seed=5)
+        frame = source.frame(self.CITIES, 4)
+        readings = list(source.series(self.CITIES, 4))
+        assert len(frame) == len(readings)
+        assert [(row.city, row.timestamp) for row in frame.to_records()] == [
+            (r.city, r.timestamp) for r in readings
+        ]
+        again = SyntheticWeather(seed=5).frame(self.CITIES, 4)
+        assert (again.temperature == frame.temperature).all()
+
+
+# ==================== Frames ====================
+
+class TestWeatherFrame:
+    """Tests for the columnar WeatherFrame and ForecastFrame containers."""
+    
+    CITIES = ["Oslo", "Lima", "Perth"]
+    
+    @pytest.fixture
+    def frame_module(self):
+        """weather.frame, which needs NumPy."""
+        return pytest.importorskip("weather.frame")
+    
+    @pytest.fixture
+    def records(self):
+        """Seeded readings for three cities over four timesteps."""
+        return list(SyntheticWeather(seed=2).series(self.CITIES, 4))
+    
+    def test_round_trip(self, frame_module, records):
+        """Records should survive from_records and to_records unchanged."""
+        frame = frame_module.WeatherFrame.from_records(records)
+        assert len(frame) == 12 and frame.cities == self.CITIES
+        assert frame.to_records() == records
+        forecasts = SyntheticWeather(seed=2).forecast("Lima", days=7)
+        assert frame_module.ForecastFrame.from_records(forecasts).to_records() == forecasts
+        # Computed columns should match the dataclass
+        generated = SyntheticWeather(seed=2).frame(self.CITIES, 4).to_records()
+        for record in generated:
+            fields = {name: getattr(record, name) for name in frame_module.WeatherFrame.FIELDS[:-1]}
+            assert WeatherData(**fields).feels_like == record.feels_like
+    
+    def test_for_city(self, frame_module, records):
+        """for_city should select one city's rows, or none for an unknown city."""
+        frame = frame_module.WeatherFrame.from_records(records)
+        lima = frame.for_city("Lima")
+        assert lima.to_records() == [r for r in records if r.city == "Lima"]
+        unknown = frame.for_city("Atlantis")
+        assert len(unknown) == 0 and unknown.to_records() == []
+        assert unknown.cities == self.CITIES
+    
+    def test_negative_indexing(self, frame_module, records):
+        """Negative indexes should count from the end; out of range should raise."""
+        frame = frame_module.WeatherFrame.from_records(records)
+        assert frame[-1].to_weather_data() == records[-1]
+        assert frame[-12].city == records[0].city
+        assert frame[-2].temperature == records[-2].temperature
+        for index in (12, -13):
+            with pytest.raises(IndexError):
+                frame[index]
+        with pytest.raises(AttributeError):
+            frame[0].pressure
+        assert frame[-4:].to_records() == records[-4:]
+    
+    def test_trend_bars_match_forecast(self, frame_module):
+        """Vectorized trend bars should equal Forecast.trend_bar, bucket edges included."""
+        forecasts = [
+            Forecast(datetime(2024, 3, 1), high, low, WeatherCondition.SUNNY, 10)
+            for high in range(40, 95, 3)
+            for low in (high - 10, high - 11, high - 20)
+        ]
+        assert {f.trend_bar for f in forecasts} == {"░▂", "▂▄", "▄▆", "▆█"}
+        frame = frame_module.ForecastFrame.from_records(forecasts)
+        assert frame.trend_bars().tolist() == [f.trend_bar for f in forecasts]
+
+
+# ==================== Lazy Imports ====================
+
+class TestLazyImports:
+    """Tests for lazily loaded package exports, in fresh interpreters."""
+    
+    @staticmethod
+    def python(*args):
+        """Run the interpreter in the project directory and return its stdout."""
+        proc = subprocess.run([sys.executable, *args], cwd=PROJECT_DIR,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        assert proc.returncode == 0, proc.stderr
+        return proc.stdout
+    
+    def test_lazy_exports(self):
+        """Names should resolve on first access and unknown names should raise."""
+        import math
+        namespace = {"__name__": "pkg"}
+        getattr_, dir_ = lazy_exports("pkg", {"sqrt": "math"}, namespace)
+        assert "sqrt" not in namespace and "sqrt" in dir_()
+        assert getattr_("sqrt") is math.sqrt
+        assert namespace["sqrt"] is math.sqrt
+        with pytest.raises(AttributeError, match="module 'pkg' has no attribute 'cbrt'"):
+            getattr_("cbrt")
+        
+        import utils
+        import weather
+        assert utils.display_width is display_width
+        with pytest.raises(AttributeError, match="has no attribute 'WeatherClient'"):
+            weather.WeatherClient
+        assert not hasattr(utils, "colour")
+    
+    def test_submodules_load_on_first_access(self):
+        """Importing a package should not import its submodules until a name is used."""
+        script = "; ".join([
+            "import sys, weather, display",
+            "loaded = lambda: sorted(m for m in sys.modules if m.startswith(('weather.', 'display.')))",
+            "print(loaded())",
+            "weather.WeatherAPI",
+            "print(loaded())",
+            "print('WeatherAPI' in vars(weather), 'GridRenderer' in dir(display))",
+        ])
+        before, after, cached = self.python("-c", script).splitlines()
+        assert before == "[]"
+        assert "'weather.api'" in after and "display." not in after
+        assert cached == "True True"
+    
+    def test_import_time_benchmark(self, tmp_path):
+        """The benchmark should time the packages and compare against a baseline."""
+        baseline = tmp_path / "baseline.json"
+        self.python("benchmarks/import_time.py", "--runs", "2", "--save", str(baseline))
+        result = json.loads(baseline.read_text())
+        assert result["runs"] == 2
+        assert {"weather", "display"} <= set(result["modules_ms"])
+        assert 0 < result["import_ms_min"] <= result["import_ms_median"] < result["wall_ms_median"]
+        output = self.python("benchmarks/import_time.py", "--runs", "1", "--modules", "weather.models",
+                             "--compare", str(baseline), "--threshold", "100")
+        assert output.startswith("import weather.models: 1 cold starts")
+        assert "REGRESSION" not in output
@@ -1,3 +1,13 @@
-# Utils package
-from utils.colors import Colors
-from utils.formatters import format_temperature, format_percentage
+# Utils package - submodules load on first attribute access
+from utils._lazy import lazy_exports
+
+_EXPORTS = {
+    "Colors": "utils.colors",
+    "format_temperature": "utils.formatters",
+    "format_percentage": "utils.formatters",
+    "display_width": "utils.width",
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS, globals())
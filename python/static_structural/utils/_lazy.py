@@ -0,0 +1,36 @@
+"""
+Lazy package exports shared by the weather, display and utils packages.
+"""
+import importlib
+from typing import Callable, Dict, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str], namespace: dict) -> Tuple[Callable, Callable]:
+    """
+    Build a package's module-level ``__getattr__`` and ``__dir__``.
+    
+    Each public name is imported from its submodule on first access and
+    then stored in the package namespace, so later lookups are plain
+    attribute reads.
+    
+    Args:
+        package: The package's ``__name__``
+        exports: Public name -> submodule that defines it
+        namespace: The package's ``globals()``
+    
+    Returns:
+        (__getattr__, __dir__) to assign in the package
+    """
+    def __getattr__(name):
+        """Import a public name from its submodule on first access."""
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module), name)
+        namespace[name] = value
+        return value
+    
+    def __dir__():
+        return sorted(set(namespace) | set(exports))
+    
+    return __getattr__, __dir__
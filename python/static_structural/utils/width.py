@@ -0,0 +1,159 @@
+"""
+Terminal display-width helpers.
+
+``len()`` counts code points, but terminals draw most emoji two cells wide
+and draw combining marks, variation selectors and ANSI color codes in zero
+cells. These helpers measure what the terminal actually shows so boxes line
+up. Widths are memoized per grapheme and per string, so redrawing the same
+frame costs a dictionary lookup per line.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import List
+
+ANSI_RE = re.compile(r"\x1b\[[0-9;?]*[ -/]*[@-~]")
+
+ZWJ = "\u200d"
+VS15 = "\ufe0e"  # text presentation
+VS16 = "\ufe0f"  # emoji presentation
+
+MAX_CACHED_STRINGS = 4096
+_width_cache = {}
+
+
+def _is_regional_indicator(ch: str) -> bool:
+    return "\U0001f1e6" <= ch <= "\U0001f1ff"
+
+
+def _is_skin_tone(ch: str) -> bool:
+    return "\U0001f3fb" <= ch <= "\U0001f3ff"
+
+
+def _extends(ch: str) -> bool:
+    """Return True if ``ch`` attaches to the preceding grapheme."""
+    return (
+        ch == ZWJ
+        or "\ufe00" <= ch <= "\ufe0f"
+        or _is_skin_tone(ch)
+        or unicodedata.category(ch) in ("Mn", "Me", "Mc")
+    )
+
+
+def graphemes(text: str) -> List[str]:
+    """
+    Split text into user-perceived characters.
+    
+    Handles the cases that matter for terminal layout: combining marks,
+    variation selectors, skin-tone modifiers, ZWJ emoji sequences and flag
+    pairs. It is not a full UAX #29 implementation.
+    """
+    clusters: List[str] = []
+    joined = False
+    for ch in text:
+        if clusters and (joined or _extends(ch)):
+            clusters[-1] += ch
+        elif (
+            clusters
+            and _is_regional_indicator(ch)
+            and len(clusters[-1]) == 1
+            and _is_regional_indicator(clusters[-1])
+        ):
+            clusters[-1] += ch
+        else:
+            clusters.append(ch)
+        joined = ch == ZWJ
+    return clusters
+
+
+@lru_cache(maxsize=None)
+def grapheme_width(cluster: str) -> int:
+    """
+    Return the number of terminal cells a single grapheme occupies.
+    
+    Args:
+        cluster: One grapheme as returned by ``graphemes``
+    
+    Returns:
+        0, 1 or 2
+    """
+    base = cluster[0]
+    if VS16 in cluster or _is_regional_indicator(base):
+        return 2
+    if VS15 in cluster:
+        return 1
+    category = unicodedata.category(base)
+    if category in ("Cc", "Cf", "Mn", "Me", "Zl", "Zp"):
+        return 0
+    if unicodedata.east_asian_width(base) in ("W", "F"):
+        return 2
+    return 1
+
+
+def display_width(text: str) -> int:
+    """
+    Return the number of terminal cells ``text`` occupies.
+    
+    ANSI escape sequences count as zero width.
+    """
+    width = _width_cache.get(text)
+    if width is not None:
+        return width
+    
+    if text.isascii() and "\x1b" not in text:
+        width = len(text)
+    else:
+        width = sum(grapheme_width(g) for g in graphemes(ANSI_RE.sub("", text)))
+    
+    if len(_width_cache) >= MAX_CACHED_STRINGS:
+        _width_cache.clear()
+    _width_cache[text] = width
+    return width
+
+
+def truncate(text: str, width: int) -> str:
+    """
+    Cut ``text`` to at most ``width`` cells without splitting a grapheme.
+    
+    Text that already fits is returned unchanged; otherwise ANSI escape
+    sequences are dropped from the result.
+    """
+    if display_width(text) <= width:
+        return text
+    out = []
+    used = 0
+    for cluster in graphemes(ANSI_RE.sub("", text)):
+        cells = grapheme_width(cluster)
+        if used + cells > width:
+            break
+        out.append(cluster)
+        used += cells
+    return "".join(out)
+
+
+def pad(text: str, width: int, align: str = "<") -> str:
+    """
+    Pad ``text`` with spaces to exactly ``width`` cells.
+    
+    Args:
+        text: Text to pad (truncated if it is too wide)
+        width: Target width in terminal cells
+        align: "<" left, ">" right or "^" center
+    
+    Returns:
+        Padded text
+    """
+    text = truncate(text, width)
+    gap = width - display_width(text)
+    if align == ">":
+        return " " * gap + text
+    if align == "^":
+        left = gap // 2
+        return " " * left + text + " " * (gap - left)
+    return text + " " * gap
+
+
+def cache_clear() -> None:
+    """Drop all memoized widths."""
+    _width_cache.clear()
+    grapheme_width.cache_clear()
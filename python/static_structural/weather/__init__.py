@@ -1,3 +1,20 @@
 # Weather package
-from weather.api import WeatherAPI
-from weather.models import WeatherData, Forecast
+#
+# Public names are resolved lazily from their submodules, so importing
+# weather.models or weather.history does not drag in the API client.
+from utils._lazy import lazy_exports
+
+_EXPORTS = {
+    "WeatherAPI": "weather.api",
+    "WeatherData": "weather.models",
+    "Forecast": "weather.models",
+    "HistoryStore": "weather.history",
+    "AlertBroker": "weather.alerts",
+    "Prefetcher": "weather.prefetch",
+    "Station": "weather.models",
+    "StationIndex": "weather.stations",
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS, globals())
@@ -0,0 +1,248 @@
+"""
+Push-based weather alert subscriptions.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+@dataclass
+class AlertEvent:
+    """Change in the active alerts for a city."""
+    city: str
+    alerts: Tuple[str, ...]
+    previous: Tuple[str, ...] = ()
+    timestamp: datetime = field(default_factory=datetime.now)
+    
+    @property
+    def added(self) -> List[str]:
+        """Alerts that became active with this event."""
+        return [a for a in self.alerts if a not in self.previous]
+    
+    @property
+    def removed(self) -> List[str]:
+        """Alerts that are no longer active."""
+        return [a for a in self.previous if a not in self.alerts]
+
+
+class Subscription:
+    """
+    A consumer's view of the alert stream.
+    
+    Events are buffered per city: if a newer update for a city arrives before
+    the consumer has read the previous one, the two are coalesced into a
+    single event. A slow consumer therefore holds at most one pending event
+    per subscribed city, and ``max_pending`` caps wildcard subscriptions by
+    dropping the oldest event.
+    
+    Read events with ``get``/``drain``, or ``async for event in subscription``.
+    """
+    
+    def __init__(
+        self,
+        broker: "AlertBroker",
+        cities: Optional[Set[str]],
+        callback: Optional[Callable[[AlertEvent], None]] = None,
+        max_pending: int = 1000,
+    ):
+        self.broker = broker
+        self.cities = cities
+        self.callback = callback
+        self.max_pending = max_pending
+        self.dropped = 0
+        self.coalesced = 0
+        self.callback_errors = 0
+        self.closed = False
+        self._pending: "OrderedDict[str, AlertEvent]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._waiters = []
+    
+    def wants(self, city: str) -> bool:
+        """Return True if this subscription covers ``city``."""
+        return self.cities is None or city in self.cities
+    
+    def deliver(self, event: AlertEvent) -> None:
+        """Hand an event to the consumer (called by the broker)."""
+        if self.callback is not None:
+            try:
+                self.callback(event)
+            except Exception:
+                self.callback_errors += 1
+            return
+        
+        with self._cond:
+            if self.closed:
+                return
+            pending = self._pending.pop(event.city, None)
+            if pending is not None:
+                self.coalesced += 1
+                event = AlertEvent(event.city, event.alerts, pending.previous, event.timestamp)
+                if set(event.alerts) == set(event.previous):
+                    return
+            elif len(self._pending) >= self.max_pending:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            self._pending[event.city] = event
+            self._cond.notify()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+    
+    def get(self, timeout: Optional[float] = None) -> Optional[AlertEvent]:
+        """
+        Wait for the next event.
+        
+        Args:
+            timeout: Seconds to wait, or None to wait forever
+        
+        Returns:
+            The next event, or None on timeout or after close
+        """
+        with self._cond:
+            if not self._pending and not self.closed:
+                self._cond.wait(timeout)
+            if not self._pending:
+                return None
+            return self._pending.popitem(last=False)[1]
+    
+    def drain(self) -> List[AlertEvent]:
+        """Return every pending event without waiting."""
+        with self._cond:
+            events = list(self._pending.values())
+            self._pending.clear()
+            return events
+    
+    def __len__(self) -> int:
+        return len(self._pending)
+    
+    def close(self) -> None:
+        """Stop receiving events and wake any waiting consumer."""
+        self.broker.unsubscribe(self)
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self) -> AlertEvent:
+        # asyncio is only needed by async consumers, keep it off the import path
+        import asyncio
+        
+        while True:
+            with self._cond:
+                if self._pending:
+                    return self._pending.popitem(last=False)[1]
+                if self.closed:
+                    raise StopAsyncIteration
+                loop = asyncio.get_running_loop()
+                future = loop.create_future()
+                self._waiters.append((loop, future))
+            await future
+
+
+def _resolve(future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AlertBroker:
+    """
+    Fans out alert changes to subscribers.
+    
+    Each upstream update is published once; the broker compares it with the
+    last known alerts for the city and only notifies subscribers when the set
+    actually changed.
+    """
+    
+    def __init__(self):
+        self._subscriptions: List[Subscription] = []
+        self._current: Dict[str, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.deduplicated = 0
+    
+    def subscribe(
+        self,
+        cities: Optional[Iterable[str]] = None,
+        callback: Optional[Callable[[AlertEvent], None]] = None,
+        max_pending: int = 1000,
+        replay: bool = True,
+    ) -> Subscription:
+        """
+        Subscribe to alert changes.
+        
+        Args:
+            cities: Cities to watch, or None for every city
+            callback: Called for each event instead of buffering it
+            max_pending: Maximum buffered events before the oldest is dropped
+            replay: Deliver the currently active alerts immediately
+        
+        Returns:
+            New Subscription
+        """
+        subscription = Subscription(
+            self, set(cities) if cities is not None else None, callback, max_pending
+        )
+        with self._lock:
+            self._subscriptions.append(subscription)
+            current = [(c, a) for c, a in self._current.items() if a and subscription.wants(c)]
+        if replay:
+            for city, alerts in current:
+                subscription.deliver(AlertEvent(city, alerts))
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription."""
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+    
+    def cities(self) -> Optional[Set[str]]:
+        """
+        Return the cities anyone is subscribed to.
+        
+        Returns None if there is a wildcard subscription.
+        """
+        with self._lock:
+            watched = set()
+            for subscription in self._subscriptions:
+                if subscription.cities is None:
+                    return None
+                watched |= subscription.cities
+            return watched
+    
+    def current(self, city: str) -> List[str]:
+        """Return the last published alerts for ``city``."""
+        with self._lock:
+            return list(self._current.get(city, ()))
+    
+    def publish(self, city: str, alerts: Iterable[str]) -> Optional[AlertEvent]:
+        """
+        Publish the latest alerts for a city.
+        
+        Args:
+            city: City name
+            alerts: Alerts currently active for the city
+        
+        Returns:
+            The event delivered to subscribers, or None if nothing changed
+        """
+        alerts = tuple(dict.fromkeys(alerts))
+        with self._lock:
+            self.published += 1
+            previous = self._current.get(city, ())
+            if set(alerts) == set(previous):
+                self.deduplicated += 1
+                return None
+            self._current[city] = alerts
+            targets = [s for s in self._subscriptions if s.wants(city)]
+        event = AlertEvent(city, alerts, previous)
+        for subscription in targets:
+            subscription.deliver(event)
+        return event
@@ -2,12 +2,25 @@
 Weather API client - provides mock weather data for demonstration.
 """
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 import random
+import time
 from datetime import datetime, timedelta
 
 from weather.models import WeatherData, Forecast, WeatherCondition
 
+if TYPE_CHECKING:
+    import threading
+    
+    from weather.alerts import AlertBroker, Subscription
+    from weather.history import HistoryStore
+    from weather.prefetch import Prefetcher
+    from weather.snapshot import SnapshotWriter, WeatherSnapshot
+    from weather.stations import StationIndex
+
+# ("current", city, 0) or ("forecast", city, days)
+CacheKey = Tuple[str, str, int]
+
 
 class WeatherAPI:
     """Mock weather API client."""
@@ -20,31 +33,52 @@ class WeatherAPI:
         WeatherCondition.STORMY,
     ]
     
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize the weather API client."""
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        history: Optional["HistoryStore"] = None,
+        cache_ttl: Optional[float] = None,
+        seed: Optional[int] = None,
+        stations: Optional["StationIndex"] = None,
+    ):
+        """
+        Initialize the weather API client.
+        
+        Args:
+            api_key: API key for the upstream service
+            history: Optional store that records every current reading
+            cache_ttl: Seconds a fetched result is served from cache. The
+                default, None, fetches fresh data on every call; caching (and
+                with it prefetching and snapshot restores) needs a TTL
+            seed: Seed for the mock upstream; the same seed and call order
+                reproduce the same data
+            stations: Optional station catalog for location queries
+        """
         self.api_key = api_key or "mock_key"
-        self._cache = {}
+        self.history = history
+        self.cache_ttl = cache_ttl
+        self.stations = stations
+        self._random = random.Random(seed)
+        self._alerts: Optional["AlertBroker"] = None
+        self._cache: Dict[CacheKey, Tuple[float, object]] = {}
+        self._access_counts: Dict[CacheKey, int] = {}
+        self._pushed_alerts = {}
+        self._refresh_thread: Optional["threading.Thread"] = None
     
     def get_current_weather(self, city: str) -> WeatherData:
         """
         Fetch current weather for a city.
         
+        With a cache_ttl, a reading fetched within the last cache_ttl
+        seconds is returned instead of a fresh one.
+        
         Args:
             city: Name of the city
-            
+        
         Returns:
             WeatherData object with current conditions
         """
-        # Mock data generation for demo purposes
-        return WeatherData(
-            city=city,
-            temperature=random.randint(55, 85),
-            humidity=random.randint(30, 70),
-            wind_speed=random.randint(5, 25),
-            wind_direction=random.choice(["N", "NE", "E", "SE", "S", "SW", "W", "NW"]),
-            condition=random.choice(self.CONDITIONS),
-            timestamp=datetime.now()
-        )
+        return self._cached(("current", city, 0))
     
     def get_forecast(self, city: str, days: int = 5) -> List[Forecast]:
         """
@@ -53,30 +87,300 @@ class WeatherAPI:
         Args:
             city: Name of the city
             days: Number of days to forecast
-            
+        
         Returns:
             List of Forecast objects
         """
+        return list(self._cached(("forecast", city, days)))
+    
+    # Locations
+    
+    def weather_near(self, latitude: float, longitude: float, k: int = 1) -> List[WeatherData]:
+        """
+        Fetch current weather at the stations nearest a point.
+        
+        Args:
+            latitude: Degrees north
+            longitude: Degrees east
+            k: Number of stations
+        
+        Returns:
+            WeatherData per station (named after it), closest first
+        """
+        return [self.get_current_weather(station.name) for station, _ in self._station_index().nearest(latitude, longitude, k)]
+    
+    def weather_near_many(self, points: Iterable[Tuple[float, float]], k: int = 1) -> List[List[WeatherData]]:
+        """Run weather_near for each (latitude, longitude) point."""
+        return [
+            [self.get_current_weather(station.name) for station, _ in matches]
+            for matches in self._station_index().nearest_many(list(points), k)
+        ]
+    
+    def weather_in_box(self, south: float, west: float, north: float, east: float) -> List[WeatherData]:
+        """
+        Fetch current weather at every station inside a box.
+        
+        Args:
+            south, west, north, east: Box edges in degrees; west > east wraps
+                across the antimeridian
+        
+        Returns:
+            WeatherData per station, ordered by latitude
+        """
+        return [self.get_current_weather(station.name) for station in self._station_index().within(south, west, north, east)]
+    
+    def weather_in_boxes(self, boxes: Iterable[Tuple[float, float, float, float]]) -> List[List[WeatherData]]:
+        """Run weather_in_box for each (south, west, north, east) box."""
+        return [
+            [self.get_current_weather(station.name) for station in matches]
+            for matches in self._station_index().within_many(list(boxes))
+        ]
+    
+    def _station_index(self) -> "StationIndex":
+        if self.stations is None:
+            raise ValueError("WeatherAPI was created without a station catalog")
+        return self.stations
+    
+    # Cache
+    
+    def _cached(self, key: CacheKey):
+        """Return a cached result, fetching it if missing or expired."""
+        self._access_counts[key] = self._access_counts.get(key, 0) + 1
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > time.time():
+            return entry[1]
+        return self.refresh(key)
+    
+    def refresh(self, key: CacheKey):
+        """Fetch a result from upstream and store it in the cache."""
+        kind, city, days = key
+        if kind == "current":
+            value = self._fetch_current(city)
+        else:
+            value = self._fetch_forecast(city, days)
+        self._cache[key] = (time.time() + (self.cache_ttl or 0.0), value)
+        return value
+    
+    def cache_entries(self) -> List[Tuple[CacheKey, float, object]]:
+        """Return (key, expires_at, value) for every cached result."""
+        return [(key, expires, value) for key, (expires, value) in list(self._cache.items())]
+    
+    def cache_expiry(self, key: CacheKey) -> Optional[float]:
+        """Return when a cached result expires, or None if it is not cached."""
+        entry = self._cache.get(key)
+        return entry[0] if entry is not None else None
+    
+    def drain_access_counts(self) -> Dict[CacheKey, int]:
+        """Return reads per cache key since the previous call and reset them."""
+        counts, self._access_counts = self._access_counts, {}
+        return counts
+    
+    def start_prefetch(self, **kwargs) -> "Prefetcher":
+        """
+        Keep the most-read entries fresh on a background thread.
+        
+        Args:
+            **kwargs: Passed to Prefetcher (interval, lead, budget, min_hits, decay)
+        
+        Returns:
+            The started Prefetcher; call its stop() to end prefetching
+        """
+        from weather.prefetch import Prefetcher
+        
+        prefetcher = Prefetcher(self, **kwargs)
+        prefetcher.start()
+        return prefetcher
+    
+    def prime_cache(self, key: CacheKey, value, expires_at: float) -> None:
+        """
+        Insert a result into the cache.
+        
+        Args:
+            key: ("current", city, 0) or ("forecast", city, days)
+            value: WeatherData or list of Forecast
+            expires_at: POSIX time after which the entry is refetched
+        """
+        self._cache[key] = (expires_at, value)
+    
+    # Snapshots
+    
+    def save_snapshot(self, path: str) -> None:
+        """Atomically write the cache (and history, if any) to ``path``."""
+        from weather.snapshot import write_snapshot
+        
+        write_snapshot(path, self.cache_entries(), self.history)
+    
+    def load_snapshot(self, path: str, refresh: bool = True) -> int:
+        """
+        Warm the cache from a snapshot file.
+        
+        Cached results are decoded straight away so the first frame can be
+        drawn from them. With ``refresh``, history is restored and every
+        loaded entry refetched on a background thread; snapshot entries are
+        served, even if expired, until their refetch lands.
+        
+        Args:
+            path: Snapshot written by save_snapshot
+            refresh: Restore history and refetch entries in the background
+        
+        Returns:
+            Number of cache entries loaded
+        """
+        from weather.snapshot import WeatherSnapshot
+        
+        snapshot = WeatherSnapshot.open(path)
+        entries = snapshot.cache_entries()
+        grace = time.time() + (self.cache_ttl or 0.0)
+        for key, expires, value in entries:
+            self._cache.setdefault(key, (max(expires, grace) if refresh else expires, value))
+        
+        keys = [key for key, _, _ in entries]
+        if refresh:
+            import threading
+            
+            self._refresh_thread = threading.Thread(
+                target=self._finish_snapshot_load, args=(snapshot, keys),
+                name="weather-snapshot-refresh", daemon=True,
+            )
+            self._refresh_thread.start()
+        else:
+            self._finish_snapshot_load(snapshot, [])
+        return len(entries)
+    
+    def start_snapshots(self, path: str, interval: float = 60.0, restore: bool = True) -> "SnapshotWriter":
+        """
+        Restore the cache from a snapshot, then keep snapshotting it.
+        
+        Args:
+            path: Snapshot file, read at startup and rewritten every interval
+            interval: Seconds between snapshots
+            restore: Load ``path`` first if it holds a readable snapshot
+            
+        Returns:
+            The started SnapshotWriter; call its stop() to write a final
+            snapshot and end the thread
+        """
+        from weather.snapshot import SnapshotWriter
+        
+        writer = SnapshotWriter(self, path, interval)
+        if restore:
+            writer.restore()
+        writer.start()
+        return writer
+    
+    def wait_for_refresh(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a background snapshot refresh; True once it is done."""
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout)
+            return not self._refresh_thread.is_alive()
+        return True
+    
+    def _finish_snapshot_load(self, snapshot: "WeatherSnapshot", keys: List[CacheKey]) -> None:
+        """Restore history from a snapshot, close it, then refetch ``keys``."""
+        with snapshot:
+            if self.history is not None:
+                snapshot.restore_history(self.history)
+        for key in keys:
+            self.refresh(key)
+    
+    # Mock upstream
+    
+    def _fetch_current(self, city: str) -> WeatherData:
+        """Generate current conditions (mock data for demo purposes)."""
+        weather = WeatherData(
+            city=city,
+            temperature=self._random.randint(55, 85),
+            humidity=self._random.randint(30, 70),
+            wind_speed=self._random.randint(5, 25),
+            wind_direction=self._random.choice(["N", "NE", "E", "SE", "S", "SW", "W", "NW"]),
+            condition=self._random.choice(self.CONDITIONS),
+            timestamp=datetime.now()
+        )
+        if self.history is not None:
+            self.history.record_weather(weather)
+        return weather
+    
+    def _fetch_forecast(self, city: str, days: int) -> List[Forecast]:
+        """Generate a forecast (mock data for demo purposes)."""
         forecasts = []
-        base_temp = random.randint(60, 75)
+        base_temp = self._random.randint(60, 75)
         
         for i in range(days):
             date = datetime.now() + timedelta(days=i + 1)
-            temp_variation = random.randint(-5, 8)
+            temp_variation = self._random.randint(-5, 8)
             
             forecasts.append(Forecast(
                 date=date,
                 high_temp=base_temp + temp_variation + 5,
                 low_temp=base_temp + temp_variation - 5,
-                condition=random.choice(self.CONDITIONS),
-                precipitation_chance=random.randint(0, 100)
+                condition=self._random.choice(self.CONDITIONS),
+                precipitation_chance=self._random.randint(0, 100)
             ))
         
         return forecasts
     
+    # Alerts
+    
+    @property
+    def alerts(self) -> "AlertBroker":
+        """Alert broker, created on first use so startup skips weather.alerts."""
+        if self._alerts is None:
+            from weather.alerts import AlertBroker
+            
+            self._alerts = AlertBroker()
+        return self._alerts
+    
     def get_alerts(self, city: str) -> List[str]:
         """Fetch any weather alerts for the city."""
+        if city in self._pushed_alerts:
+            return list(self._pushed_alerts[city])
         # Mock - occasionally return alerts
-        if random.random() < 0.3:
+        if self._random.random() < 0.3:
             return ["Heat Advisory: Temperatures expected to exceed 90°F"]
         return []
+    
+    def subscribe_alerts(self, cities: Optional[Iterable[str]] = None, **kwargs) -> "Subscription":
+        """
+        Subscribe to alert changes instead of polling get_alerts.
+        
+        Args:
+            cities: Cities to watch, or None for every city
+            **kwargs: Passed to AlertBroker.subscribe (callback, max_pending, replay)
+        
+        Returns:
+            Subscription yielding AlertEvent objects
+        """
+        return self.alerts.subscribe(cities, **kwargs)
+    
+    def refresh_alerts(self, cities: Optional[Iterable[str]] = None) -> int:
+        """
+        Fetch alerts once per watched city and publish any changes.
+        
+        Args:
+            cities: Cities to refresh, defaults to the cities named by
+                subscriptions (wildcard subscribers need explicit cities)
+        
+        Returns:
+            Number of cities whose alerts changed
+        """
+        if cities is None:
+            cities = self.alerts.cities() or ()
+        changed = 0
+        for city in cities:
+            if self.alerts.publish(city, self.get_alerts(city)) is not None:
+                changed += 1
+        return changed
+    
+    def push_alerts(self, city: str, alerts: Iterable[str]) -> None:
+        """
+        Push an alert update from the backend to subscribers.
+        
+        The mock backend has no upstream feed, so tests and demos use this to
+        inject alerts; later get_alerts calls return the pushed value.
+        
+        Args:
+            city: City name
+            alerts: Alerts now active for the city (empty to clear)
+        """
+        self._pushed_alerts[city] = list(alerts)
+        self.alerts.publish(city, self._pushed_alerts[city])
@@ -0,0 +1,293 @@
+"""
+Columnar weather containers backed by NumPy arrays.
+"""
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from weather.models import WeatherData, Forecast, WeatherCondition
+from utils.formatters import celsius_to_fahrenheit, fahrenheit_to_celsius
+
+
+CONDITIONS = list(WeatherCondition)
+DIRECTIONS = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
+
+# Lower bounds of the Forecast.trend_bar buckets and their bars
+TREND_EDGES = np.array([55, 65, 75])
+TREND_BARS = np.array(["░▂", "▂▄", "▄▆", "▆█"])
+
+
+def compute_feels_like(temperature: np.ndarray, humidity: np.ndarray, wind_speed: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of the WeatherData feels-like approximation.
+    
+    Args:
+        temperature: Temperatures in Fahrenheit
+        humidity: Humidity percentages
+        wind_speed: Wind speeds in mph
+    
+    Returns:
+        Feels-like temperatures in Fahrenheit
+    """
+    heat = (temperature > 80) & (humidity > 60)
+    chill = ~heat & (temperature < 50) & (wind_speed > 10)
+    return temperature + 5 * heat - 5 * chill
+
+
+def trend_bars(high_temp: np.ndarray, low_temp: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of Forecast.trend_bar.
+    
+    Args:
+        high_temp: High temperatures in Fahrenheit
+        low_temp: Low temperatures in Fahrenheit
+    
+    Returns:
+        Array of trend bar strings
+    """
+    avg = (high_temp + low_temp) // 2
+    return TREND_BARS[np.searchsorted(TREND_EDGES, avg, side="right")]
+
+
+class WeatherRow:
+    """Read-only view of a single WeatherFrame row."""
+    
+    __slots__ = ("_frame", "_index")
+    
+    def __init__(self, frame: "WeatherFrame", index: int):
+        self._frame = frame
+        self._index = index
+    
+    def __getattr__(self, name: str):
+        """Read a field straight from the frame's columns."""
+        if name not in WeatherFrame.FIELDS:
+            raise AttributeError(name)
+        return self._frame.value(name, self._index)
+    
+    def __repr__(self) -> str:
+        return f"WeatherRow({self._frame.value('city', self._index)!r}, index={self._index})"
+    
+    def to_weather_data(self) -> WeatherData:
+        """Convert the row to a WeatherData object."""
+        return WeatherData(**{name: self._frame.value(name, self._index) for name in WeatherFrame.FIELDS})
+
+
+class WeatherFrame:
+    """
+    Columnar store of current-weather readings.
+    
+    Each WeatherData field is held in its own array. City, wind direction
+    and condition are stored as small integer codes into lookup tables,
+    so a frame of millions of readings stays a handful of flat arrays.
+    """
+    
+    FIELDS = (
+        "city", "temperature", "humidity", "wind_speed",
+        "wind_direction", "condition", "timestamp", "feels_like",
+    )
+    
+    def __init__(
+        self,
+        cities: Sequence[str],
+        city: np.ndarray,
+        temperature: np.ndarray,
+        humidity: np.ndarray,
+        wind_speed: np.ndarray,
+        wind_direction: np.ndarray,
+        condition: np.ndarray,
+        timestamp: np.ndarray,
+        feels_like: Optional[np.ndarray] = None,
+    ):
+        """
+        Initialize frame from column arrays.
+        
+        Args:
+            cities: Lookup table of city names
+            city: Index into ``cities`` for each row
+            temperature: Temperatures in Fahrenheit
+            humidity: Humidity percentages
+            wind_speed: Wind speeds in mph
+            wind_direction: Index into DIRECTIONS for each row
+            condition: Index into CONDITIONS for each row
+            timestamp: Reading times as datetime64 values
+            feels_like: Feels-like temperatures, computed when omitted
+        """
+        self.cities = list(cities)
+        self.city = np.asarray(city, dtype=np.int32)
+        self.temperature = np.asarray(temperature, dtype=np.int32)
+        self.humidity = np.asarray(humidity, dtype=np.int16)
+        self.wind_speed = np.asarray(wind_speed, dtype=np.int16)
+        self.wind_direction = np.asarray(wind_direction, dtype=np.int8)
+        self.condition = np.asarray(condition, dtype=np.int8)
+        self.timestamp = np.asarray(timestamp, dtype="datetime64[us]")
+        if feels_like is None:
+            feels_like = compute_feels_like(self.temperature, self.humidity, self.wind_speed)
+        self.feels_like = np.asarray(feels_like, dtype=np.int32)
+    
+    @classmethod
+    def from_records(cls, records: Iterable[WeatherData]) -> "WeatherFrame":
+        """
+        Build a frame from WeatherData objects.
+        
+        Args:
+            records: WeatherData objects
+        
+        Returns:
+            New WeatherFrame
+        """
+        records = list(records)
+        city_codes = {}
+        for record in records:
+            city_codes.setdefault(record.city, len(city_codes))
+        return cls(
+            cities=list(city_codes),
+            city=[city_codes[r.city] for r in records],
+            temperature=[r.temperature for r in records],
+            humidity=[r.humidity for r in records],
+            wind_speed=[r.wind_speed for r in records],
+            wind_direction=[DIRECTIONS.index(r.wind_direction) for r in records],
+            condition=[CONDITIONS.index(r.condition) for r in records],
+            timestamp=[np.datetime64(r.timestamp, "us") for r in records],
+            feels_like=[r.feels_like for r in records],
+        )
+    
+    def __len__(self) -> int:
+        return len(self.temperature)
+    
+    def __getitem__(self, key):
+        """
+        Index the frame.
+        
+        An integer returns a WeatherRow view. A slice, boolean mask or
+        index array returns a new frame; plain slices share memory with
+        this frame.
+        """
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += len(self)
+            if not 0 <= key < len(self):
+                raise IndexError("WeatherFrame index out of range")
+            return WeatherRow(self, int(key))
+        return WeatherFrame(
+            cities=self.cities,
+            city=self.city[key],
+            temperature=self.temperature[key],
+            humidity=self.humidity[key],
+            wind_speed=self.wind_speed[key],
+            wind_direction=self.wind_direction[key],
+            condition=self.condition[key],
+            timestamp=self.timestamp[key],
+            feels_like=self.feels_like[key],
+        )
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield WeatherRow(self, i)
+    
+    def value(self, name: str, index: int):
+        """
+        Return a single field as the type WeatherData uses.
+        
+        Args:
+            name: Field name
+            index: Row index
+        """
+        if name == "city":
+            return self.cities[self.city[index]]
+        if name == "wind_direction":
+            return DIRECTIONS[self.wind_direction[index]]
+        if name == "condition":
+            return CONDITIONS[self.condition[index]]
+        if name == "timestamp":
+            return self.timestamp[index].astype(datetime)
+        return int(getattr(self, name)[index])
+    
+    def for_city(self, city: str) -> "WeatherFrame":
+        """Return the rows for a single city."""
+        if city not in self.cities:
+            return self[np.zeros(len(self), dtype=bool)]
+        return self[self.city == self.cities.index(city)]
+    
+    def temperature_celsius(self) -> np.ndarray:
+        """Return temperatures converted to Celsius."""
+        return fahrenheit_to_celsius(self.temperature.astype(np.float64))
+    
+    def feels_like_celsius(self) -> np.ndarray:
+        """Return feels-like temperatures converted to Celsius."""
+        return fahrenheit_to_celsius(self.feels_like.astype(np.float64))
+    
+    def to_records(self) -> List[WeatherData]:
+        """Convert every row back to a WeatherData object."""
+        return [row.to_weather_data() for row in self]
+
+
+class ForecastFrame:
+    """Columnar store of daily forecasts."""
+    
+    def __init__(
+        self,
+        date: np.ndarray,
+        high_temp: np.ndarray,
+        low_temp: np.ndarray,
+        condition: np.ndarray,
+        precipitation_chance: np.ndarray,
+    ):
+        """
+        Initialize frame from column arrays.
+        
+        Args:
+            date: Forecast dates as datetime64 values
+            high_temp: High temperatures in Fahrenheit
+            low_temp: Low temperatures in Fahrenheit
+            condition: Index into CONDITIONS for each row
+            precipitation_chance: Precipitation percentages
+        """
+        self.date = np.asarray(date, dtype="datetime64[us]")
+        self.high_temp = np.asarray(high_temp, dtype=np.int32)
+        self.low_temp = np.asarray(low_temp, dtype=np.int32)
+        self.condition = np.asarray(condition, dtype=np.int8)
+        self.precipitation_chance = np.asarray(precipitation_chance, dtype=np.int16)
+    
+    @classmethod
+    def from_records(cls, records: Iterable[Forecast]) -> "ForecastFrame":
+        """Build a frame from Forecast objects."""
+        records = list(records)
+        return cls(
+            date=[np.datetime64(r.date, "us") for r in records],
+            high_temp=[r.high_temp for r in records],
+            low_temp=[r.low_temp for r in records],
+            condition=[CONDITIONS.index(r.condition) for r in records],
+            precipitation_chance=[r.precipitation_chance for r in records],
+        )
+    
+    @classmethod
+    def from_celsius(cls, date, high_celsius, low_celsius, condition, precipitation_chance) -> "ForecastFrame":
+        """Build a frame from Celsius temperatures."""
+        return cls(
+            date=date,
+            high_temp=np.rint(celsius_to_fahrenheit(np.asarray(high_celsius, dtype=np.float64))),
+            low_temp=np.rint(celsius_to_fahrenheit(np.asarray(low_celsius, dtype=np.float64))),
+            condition=condition,
+            precipitation_chance=precipitation_chance,
+        )
+    
+    def __len__(self) -> int:
+        return len(self.high_temp)
+    
+    def trend_bars(self) -> np.ndarray:
+        """Return the trend bar for every row."""
+        return trend_bars(self.high_temp, self.low_temp)
+    
+    def to_records(self) -> List[Forecast]:
+        """Convert every row back to a Forecast object."""
+        return [
+            Forecast(
+                date=self.date[i].astype(datetime),
+                high_temp=int(self.high_temp[i]),
+                low_temp=int(self.low_temp[i]),
+                condition=CONDITIONS[self.condition[i]],
+                precipitation_chance=int(self.precipitation_chance[i]),
+            )
+            for i in range(len(self))
+        ]
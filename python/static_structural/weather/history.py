@@ -0,0 +1,419 @@
+"""
+Historical weather storage with fixed-size ring buffers and rollups.
+"""
+import threading
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from weather.models import WeatherData
+
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+
+@dataclass
+class HistoryPoint:
+    """Aggregated value over one bucket (or a single raw reading)."""
+    timestamp: datetime
+    minimum: float
+    maximum: float
+    average: float
+    count: int
+
+
+class RingSeries:
+    """
+    Fixed-capacity series of aggregated buckets.
+    
+    Buckets are kept in time order in five parallel ``array('d')`` columns
+    (start, count, min, max, sum) that grow as buckets are added, up to
+    ``capacity``, so a ring costs 40 bytes per retained bucket; once it is
+    full the oldest bucket is overwritten. A resolution of 0 keeps every
+    reading as its own bucket.
+    
+    Late readings are folded into their bucket, or inserted in time order
+    if their bucket is missing. Only a reading older than every bucket of
+    a full ring is discarded, and counted in ``dropped``.
+    """
+    
+    def __init__(self, resolution: int, capacity: int):
+        """
+        Initialize ring.
+        
+        Args:
+            resolution: Bucket width in seconds (0 for raw readings)
+            capacity: Maximum number of buckets retained
+        """
+        self.resolution = resolution
+        self.capacity = capacity
+        self._start = array("d")
+        self._count = array("d")
+        self._min = array("d")
+        self._max = array("d")
+        self._sum = array("d")
+        self._head = 0  # Slot of the oldest bucket
+        self._size = 0
+        self.dropped = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    @property
+    def _columns(self) -> Tuple[array, ...]:
+        """The storage columns, in ``items`` order."""
+        return (self._start, self._count, self._min, self._max, self._sum)
+    
+    def _slot(self, i: int) -> int:
+        """Map logical position (0 = oldest) to a storage slot."""
+        return (self._head + i) % self.capacity
+    
+    def _bucket_start(self, ts: float) -> float:
+        if self.resolution:
+            return ts - ts % self.resolution
+        return ts
+    
+    @property
+    def oldest(self) -> Optional[float]:
+        """Start time of the oldest retained bucket."""
+        return self._start[self._head] if self._size else None
+    
+    @property
+    def newest(self) -> Optional[float]:
+        """Start time of the newest retained bucket."""
+        return self._start[self._slot(self._size - 1)] if self._size else None
+    
+    def add(self, ts: float, value: float) -> None:
+        """
+        Fold a reading into its bucket.
+        
+        Args:
+            ts: Reading time as a POSIX timestamp
+            value: Reading value
+        """
+        start = self._bucket_start(ts)
+        newest = self.newest
+        if newest is None or start > newest or (start == newest and not self.resolution):
+            self._insert(self._size, start, value)
+            return
+        
+        # Late reading: raw readings go after any with the same timestamp
+        i = self._lower_bound(start)
+        if i < self._size and self._start[self._slot(i)] == start:
+            if self.resolution:
+                slot = self._slot(i)
+                self._count[slot] += 1
+                self._sum[slot] += value
+                self._min[slot] = min(self._min[slot], value)
+                self._max[slot] = max(self._max[slot], value)
+                return
+            while i < self._size and self._start[self._slot(i)] == start:
+                i += 1
+        self._insert(i, start, value)
+    
+    def _insert(self, i: int, start: float, value: float) -> None:
+        """Insert a one-reading bucket at logical position ``i``."""
+        if self._size == self.capacity:
+            if i == 0:
+                self.dropped += 1
+                return
+            # Make room by dropping the oldest bucket
+            self._head = (self._head + 1) % self.capacity
+            self._size -= 1
+            i -= 1
+        elif self._size == len(self._start):
+            # Not full yet, so the oldest bucket is in slot 0
+            for column in self._columns:
+                column.append(0.0)
+        for j in range(self._size, i, -1):
+            to, source = self._slot(j), self._slot(j - 1)
+            for column in self._columns:
+                column[to] = column[source]
+        self._size += 1
+        slot = self._slot(i)
+        self._start[slot] = start
+        self._count[slot] = 1
+        self._sum[slot] = value
+        self._min[slot] = value
+        self._max[slot] = value
+    
+    def _lower_bound(self, ts: float) -> int:
+        """Logical position of the first bucket starting at or after ``ts``."""
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._start[self._slot(mid)] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def items(self) -> Tuple[array, ...]:
+        """Return copies of (starts, counts, mins, maxs, sums) from oldest to newest."""
+        head, end = self._head, self._head + self._size
+        if end <= self.capacity:
+            return tuple(column[head:end] for column in self._columns)
+        wrapped = end - self.capacity
+        return tuple(column[head:] + column[:wrapped] for column in self._columns)
+    
+    def merge_older(self, starts, counts, mins, maxs, sums) -> int:
+        """
+        Merge exported buckets that precede the ring's own.
+        
+        Restoring history can finish after new readings were recorded, so
+        live buckets are never replaced: buckets older than the oldest live
+        one are put in front of it, as many as there is room for (newest
+        first), and a rollup bucket with the same start as the oldest live
+        one is folded into it.
+        
+        Args:
+            starts, counts, mins, maxs, sums: Columns in ``items`` form
+            
+        Returns:
+            Number of exported buckets merged
+        """
+        oldest = self.oldest
+        older = len(starts) if oldest is None else bisect_left(starts, oldest)
+        merged = 0
+        if self.resolution and older < len(starts) and starts[older] == oldest:
+            slot = self._head
+            self._count[slot] += counts[older]
+            self._sum[slot] += sums[older]
+            self._min[slot] = min(self._min[slot], mins[older])
+            self._max[slot] = max(self._max[slot], maxs[older])
+            merged += 1
+        keep = min(older, self.capacity - self._size)
+        if keep:
+            live = self.items()
+            exported = (starts, counts, mins, maxs, sums)
+            for column, values, current in zip(self._columns, exported, live):
+                column[:keep + self._size] = array("d", values[older - keep:older]) + current
+            self._head = 0
+            self._size += keep
+            merged += keep
+        return merged
+    
+    def covers(self, ts: float) -> bool:
+        """Return True if the bucket containing ``ts`` is still retained."""
+        return self._size > 0 and self.oldest <= self._bucket_start(ts)
+    
+    def range(self, start: float, end: float, whole: bool = False) -> List[HistoryPoint]:
+        """
+        Return buckets overlapping ``[start, end]`` in time order.
+        
+        Args:
+            start: Range start as a POSIX timestamp
+            end: Range end as a POSIX timestamp
+            whole: Skip buckets that reach outside the range
+        """
+        points = []
+        for i in range(self._lower_bound(self._bucket_start(start)), self._size):
+            slot = self._slot(i)
+            if self._start[slot] > end:
+                break
+            if whole and (self._start[slot] < start or self._start[slot] + self.resolution > end):
+                continue
+            count = int(self._count[slot])
+            points.append(HistoryPoint(
+                timestamp=datetime.fromtimestamp(self._start[slot]),
+                minimum=self._min[slot],
+                maximum=self._max[slot],
+                average=self._sum[slot] / count,
+                count=count,
+            ))
+        return points
+
+
+class MetricHistory:
+    """Raw readings plus minute, hour and day rollups for one metric."""
+    
+    def __init__(self, raw_capacity: int, rollup_capacity: Dict[int, int]):
+        self.raw = RingSeries(0, raw_capacity)
+        self.rollups = [
+            RingSeries(resolution, capacity)
+            for resolution, capacity in sorted(rollup_capacity.items())
+        ]
+    
+    def add(self, ts: float, value: float) -> None:
+        """Record a reading at every resolution."""
+        self.raw.add(ts, value)
+        for series in self.rollups:
+            series.add(ts, value)
+    
+    def series(self) -> List[RingSeries]:
+        """Return the raw series followed by the rollups, finest first."""
+        return [self.raw] + self.rollups
+    
+    def select(self, start: float, step: int) -> RingSeries:
+        """
+        Choose the series to answer a query from.
+        
+        Picks the coarsest series no coarser than ``step`` that still holds
+        ``start``. If none of those reach back far enough, falls back to the
+        finest series that does, and finally to the coarsest one available.
+        """
+        candidates = self.series()
+        for series in reversed(candidates):
+            if series.resolution <= step and series.covers(start):
+                return series
+        for series in candidates:
+            if series.covers(start):
+                return series
+        return candidates[-1]
+
+
+class HistoryStore:
+    """
+    In-process time-series store for per-city weather metrics.
+    
+    Every (city, metric) pair gets fixed-size rings, so memory use is bounded
+    by the number of pairs no matter how long the dashboard runs.
+    """
+    
+    METRICS = ("temperature", "feels_like", "humidity", "wind_speed")
+    DEFAULT_ROLLUPS = {MINUTE: 1440, HOUR: 24 * 30, DAY: 365 * 2}
+    
+    def __init__(self, raw_capacity: int = 3600, rollup_capacity: Optional[Dict[int, int]] = None):
+        """
+        Initialize store.
+        
+        Args:
+            raw_capacity: Raw readings kept per city and metric
+            rollup_capacity: Buckets kept per rollup resolution (seconds)
+        """
+        self.raw_capacity = raw_capacity
+        self.rollup_capacity = dict(rollup_capacity or self.DEFAULT_ROLLUPS)
+        self._series: Dict[Tuple[str, str], MetricHistory] = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._series)
+    
+    def keys(self) -> List[Tuple[str, str]]:
+        """Return all (city, metric) pairs with recorded data."""
+        with self._lock:
+            return list(self._series)
+    
+    def record(self, city: str, metric: str, value: float, timestamp: Optional[datetime] = None) -> None:
+        """
+        Record a single reading.
+        
+        Args:
+            city: City name
+            metric: Metric name
+            value: Reading value
+            timestamp: Reading time, defaults to now
+        """
+        ts = (timestamp or datetime.now()).timestamp()
+        with self._lock:
+            history = self._series.get((city, metric))
+            if history is None:
+                history = MetricHistory(self.raw_capacity, self.rollup_capacity)
+                self._series[(city, metric)] = history
+            history.add(ts, value)
+    
+    def export_series(self) -> List[Tuple[str, str, int, Tuple[array, ...]]]:
+        """
+        Return (city, metric, resolution, columns) for every ring in the store.
+        
+        Columns are copies in RingSeries.items form, taken under the store
+        lock so concurrent readings cannot tear them.
+        """
+        with self._lock:
+            return [
+                (city, metric, series.resolution, series.items())
+                for (city, metric), history in self._series.items()
+                for series in history.series()
+            ]
+    
+    def import_series(self, city: str, metric: str, resolution: int, starts, counts, mins, maxs, sums) -> int:
+        """
+        Restore one ring from exported buckets.
+        
+        Buckets are merged in front of any readings already recorded (see
+        RingSeries.merge_older). Buckets for a resolution this store does
+        not keep are ignored.
+        
+        Returns:
+            Number of buckets merged
+        """
+        with self._lock:
+            history = self._series.get((city, metric))
+            if history is None:
+                history = MetricHistory(self.raw_capacity, self.rollup_capacity)
+                self._series[(city, metric)] = history
+            for series in history.series():
+                if series.resolution == resolution:
+                    return series.merge_older(starts, counts, mins, maxs, sums)
+            return 0
+    
+    def record_weather(self, weather: WeatherData) -> None:
+        """Record every tracked metric of a WeatherData reading."""
+        for metric in self.METRICS:
+            self.record(weather.city, metric, getattr(weather, metric), weather.timestamp)
+    
+    def query(
+        self,
+        city: str,
+        metric: str,
+        start: datetime,
+        end: Optional[datetime] = None,
+        step: int = 0,
+    ) -> List[HistoryPoint]:
+        """
+        Return readings for a time range.
+        
+        Args:
+            city: City name
+            metric: Metric name
+            start: Range start
+            end: Range end, defaults to now
+            step: Coarsest acceptable resolution in seconds (0 for raw)
+            
+        Returns:
+            Points from the coarsest retained resolution satisfying the request
+        """
+        start_ts = start.timestamp()
+        end_ts = (end or datetime.now()).timestamp()
+        with self._lock:
+            history = self._series.get((city, metric))
+            if history is None:
+                return []
+            return history.select(start_ts, step).range(start_ts, end_ts)
+    
+    def summary(
+        self,
+        city: str,
+        metric: str,
+        start: datetime,
+        end: Optional[datetime] = None,
+    ) -> Optional[HistoryPoint]:
+        """
+        Aggregate a metric over a time range into a single point.
+        
+        Answered from the finest series that still reaches back to ``start``,
+        so recent ranges are exact and long ones come from rollups. Rollup
+        buckets that reach outside the range are left out rather than
+        counted whole, so a rollup-backed summary covers whole buckets only.
+        """
+        start_ts = start.timestamp()
+        end_ts = (end or datetime.now()).timestamp()
+        with self._lock:
+            history = self._series.get((city, metric))
+            if history is None:
+                return None
+            points = history.select(start_ts, 0).range(start_ts, end_ts, whole=True)
+        if not points:
+            return None
+        count = sum(p.count for p in points)
+        return HistoryPoint(
+            timestamp=points[0].timestamp,
+            minimum=min(p.minimum for p in points),
+            maximum=max(p.maximum for p in points),
+            average=sum(p.average * p.count for p in points) / count,
+            count=count,
+        )
@@ -6,9 +6,6 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
-# and this imports from api.py through the package __init__.py
-from weather import WeatherAPI  # Trying to access API for validation
-
 
 class WeatherCondition(Enum):
     """Weather condition types."""
@@ -101,3 +98,12 @@ class WeatherAlert:
     severity: str  # "warning", "watch", "advisory"
     description: str
     expires: datetime
+
+
+@dataclass(frozen=True)
+class Station:
+    """Observation station with its location."""
+    id: str
+    name: str
+    latitude: float  # Degrees north
+    longitude: float  # Degrees east
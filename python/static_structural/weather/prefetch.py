@@ -0,0 +1,114 @@
+"""
+Background refresh of frequently requested cache entries.
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from weather.api import CacheKey
+
+
+class Prefetcher:
+    """
+    Refreshes the hottest WeatherAPI cache entries shortly before they expire.
+    
+    WeatherAPI counts reads per cache key; every ``interval`` the prefetcher
+    folds those counts into exponentially decayed scores, picks the keys at or
+    above ``min_hits`` that expire within ``lead`` seconds, and refetches the
+    highest-scoring ones, at most ``budget * interval`` per pass. Popular
+    cities are therefore always served from cache, while cold ones still
+    expire and fetch on demand.
+    """
+    
+    def __init__(
+        self,
+        api,
+        interval: float = 1.0,
+        lead: Optional[float] = None,
+        budget: float = 10.0,
+        min_hits: float = 2.0,
+        decay: float = 0.5,
+    ):
+        """
+        Initialize prefetcher.
+        
+        Args:
+            api: WeatherAPI whose cache is kept warm
+            interval: Seconds between passes
+            lead: Refresh entries expiring within this many seconds,
+                defaults to two intervals
+            budget: Upstream fetches allowed per second
+            min_hits: Decayed read count a key needs to be prefetched
+            decay: Factor applied to every score once per pass
+        """
+        self.api = api
+        self.interval = interval
+        self.lead = lead if lead is not None else 2 * interval
+        self.budget = budget
+        self.min_hits = min_hits
+        self.decay = decay
+        self.fetches = 0
+        self.deferred = 0
+        self.last_error: Optional[Exception] = None
+        self._scores: Dict[CacheKey, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Start prefetching."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="weather-prefetch", daemon=True)
+            self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop prefetching and wait for the current pass to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def hot_keys(self) -> List[Tuple[CacheKey, float]]:
+        """Return (key, score) for keys at or above ``min_hits``, hottest first."""
+        hot = [(key, score) for key, score in self._scores.items() if score >= self.min_hits]
+        hot.sort(key=lambda item: item[1], reverse=True)
+        return hot
+    
+    def run_once(self) -> int:
+        """
+        Run one prefetch pass.
+        
+        Returns:
+            Number of entries refreshed
+        """
+        for key, hits in self.api.drain_access_counts().items():
+            self._scores[key] = self._scores.get(key, 0.0) + hits
+        
+        allowance = max(1, int(self.budget * self.interval))
+        deadline = time.time() + self.lead
+        refreshed = 0
+        for key, _ in self.hot_keys():
+            expires = self.api.cache_expiry(key)
+            if expires is not None and expires > deadline:
+                continue
+            if refreshed == allowance:
+                self.deferred += 1
+                continue
+            self.api.refresh(key)
+            refreshed += 1
+        self.fetches += refreshed
+        
+        # Age scores so keys that stop being read drop out
+        self._scores = {
+            key: score * self.decay
+            for key, score in self._scores.items()
+            if score * self.decay >= self.min_hits / 100
+        }
+        return refreshed
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:  # keep the thread alive; foreground reads still fetch
+                self.last_error = e
@@ -0,0 +1,420 @@
+"""
+Binary snapshots of the weather cache and history store.
+
+Layout (little-endian):
+
+    header    magic, version, created, section counts and offsets
+    strings   u16 length + UTF-8 bytes, referenced by index
+    current   fixed-size records, one per cached WeatherData
+    forecast  entry header followed by one fixed-size record per day
+    series    ring header followed by five float64 columns
+
+Snapshots are written to a temporary file and renamed into place, so a
+reader never sees a partial file. Readers map the file with ``mmap`` and
+decode records on demand.
+"""
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from weather.models import WeatherData, Forecast, WeatherCondition
+
+
+MAGIC = b"WXSNAP\x00\x01"
+VERSION = 1
+
+HEADER = struct.Struct("<8sHHdIIIIQQQQ4x")  # padded to 72 bytes
+STRING_LEN = struct.Struct("<H")
+CURRENT = struct.Struct("<IhhhIBhdd")
+FORECAST_ENTRY = struct.Struct("<IHd")
+FORECAST_DAY = struct.Struct("<dhhBB")
+SERIES = struct.Struct("<IIII")
+
+CONDITIONS = list(WeatherCondition)
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, truncated or unsupported."""
+
+
+class _StringTable:
+    """Assigns indices to strings while a snapshot is being written."""
+    
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+    
+    def __call__(self, text: str) -> int:
+        return self.index.setdefault(text, len(self.index))
+    
+    def encode(self) -> bytes:
+        parts = []
+        for text in self.index:
+            data = text.encode("utf-8")
+            parts.append(STRING_LEN.pack(len(data)) + data)
+        return b"".join(parts)
+
+
+def _align(buffer: bytearray) -> None:
+    """Pad to 8 bytes so float64 columns can be cast in place."""
+    buffer.extend(b"\x00" * (-len(buffer) % 8))
+
+
+def write_snapshot(path: str, cache_entries: List[Tuple[tuple, float, object]], history=None) -> int:
+    """
+    Atomically write a snapshot.
+    
+    Args:
+        path: Destination file
+        cache_entries: (key, expires_at, value) tuples from WeatherAPI.cache_entries
+        history: Optional HistoryStore to include
+    
+    Returns:
+        Size of the written file in bytes
+    """
+    strings = _StringTable()
+    current = bytearray()
+    forecast = bytearray()
+    series = bytearray()
+    n_current = n_forecast = n_series = 0
+    
+    for (kind, city, days), expires, value in cache_entries:
+        if kind == "current":
+            current += CURRENT.pack(
+                strings(city), value.temperature, value.humidity, value.wind_speed,
+                strings(value.wind_direction), CONDITIONS.index(value.condition),
+                value.feels_like, value.timestamp.timestamp(), expires,
+            )
+            n_current += 1
+        else:
+            forecast += FORECAST_ENTRY.pack(strings(city), len(value), expires)
+            for day in value:
+                forecast += FORECAST_DAY.pack(
+                    day.date.timestamp(), day.high_temp, day.low_temp,
+                    CONDITIONS.index(day.condition), day.precipitation_chance,
+                )
+            n_forecast += 1
+    
+    if history is not None:
+        for city, metric, resolution, columns in history.export_series():
+            if not columns[0]:
+                continue
+            _align(series)
+            series += SERIES.pack(strings(city), strings(metric), resolution, len(columns[0]))
+            for column in columns:
+                if sys.byteorder != "little":
+                    column.byteswap()
+                series += column.tobytes()
+            n_series += 1
+    
+    string_data = strings.encode()
+    body = bytearray(string_data)
+    current_off = HEADER.size + len(body)
+    body += current
+    forecast_off = HEADER.size + len(body)
+    body += forecast
+    _align(body)
+    series_off = HEADER.size + len(body)
+    body += series
+    
+    header = HEADER.pack(
+        MAGIC, VERSION, 0, time.time(),
+        len(strings.index), n_current, n_forecast, n_series,
+        HEADER.size, current_off, forecast_off, series_off,
+    )
+    
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return len(header) + len(body)
+
+
+class WeatherSnapshot:
+    """Read-only, memory-mapped view of a snapshot file."""
+    
+    def __init__(self, path: str):
+        """
+        Map a snapshot file.
+        
+        Args:
+            path: Snapshot written by write_snapshot
+        
+        Raises:
+            SnapshotError: If the file is not a readable snapshot
+        """
+        self.path = path
+        self._map = None
+        try:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot open snapshot {path}: {e}") from e
+        
+        try:
+            self._check(0, HEADER.size, "header")
+            (magic, version, _, self.created, n_strings, self.n_current, self.n_forecast,
+             self.n_series, strings_off, self._current_off, self._forecast_off,
+             self._series_off) = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != VERSION:
+                raise SnapshotError(f"{path} is not a version {VERSION} weather snapshot")
+            
+            self.strings = []
+            offset = strings_off
+            for _ in range(n_strings):
+                self._check(offset, STRING_LEN.size, "string table")
+                (length,) = STRING_LEN.unpack_from(self._map, offset)
+                offset += STRING_LEN.size
+                self._check(offset, length, "string table")
+                self.strings.append(self._map[offset:offset + length].decode("utf-8"))
+                offset += length
+            self._check_records()
+        except SnapshotError:
+            self.close()
+            raise
+        except (struct.error, IndexError, UnicodeDecodeError) as e:
+            self.close()
+            raise SnapshotError(f"Snapshot {path} is corrupt: {e}") from e
+    
+    def _check(self, offset: int, length: int, section: str) -> None:
+        """Raise SnapshotError unless ``length`` bytes at ``offset`` are in the file."""
+        if offset < 0 or length < 0 or offset + length > len(self._map):
+            raise SnapshotError(f"Snapshot {self.path} is truncated in its {section}")
+    
+    def _check_records(self) -> None:
+        """
+        Walk every record once, so the readers below never leave the file
+        or index past the string table.
+        """
+        n_strings = len(self.strings)
+        self._check(self._current_off, self.n_current * CURRENT.size, "current records")
+        for i in range(self.n_current):
+            city, _, _, _, direction, condition, _, _, _ = CURRENT.unpack_from(
+                self._map, self._current_off + i * CURRENT.size
+            )
+            if city >= n_strings or direction >= n_strings or condition >= len(CONDITIONS):
+                raise SnapshotError(f"Snapshot {self.path} has an invalid current record")
+        
+        offset = self._forecast_off
+        for _ in range(self.n_forecast):
+            self._check(offset, FORECAST_ENTRY.size, "forecasts")
+            city, days, _ = FORECAST_ENTRY.unpack_from(self._map, offset)
+            offset += FORECAST_ENTRY.size
+            self._check(offset, days * FORECAST_DAY.size, "forecasts")
+            for _ in range(days):
+                if FORECAST_DAY.unpack_from(self._map, offset)[3] >= len(CONDITIONS):
+                    raise SnapshotError(f"Snapshot {self.path} has an invalid forecast")
+                offset += FORECAST_DAY.size
+            if city >= n_strings:
+                raise SnapshotError(f"Snapshot {self.path} has an invalid forecast")
+        
+        offset = self._series_off
+        for _ in range(self.n_series):
+            offset += -offset % 8
+            self._check(offset, SERIES.size, "history")
+            city, metric, _, size = SERIES.unpack_from(self._map, offset)
+            offset += SERIES.size
+            self._check(offset, 5 * 8 * size, "history")
+            offset += 5 * 8 * size
+            if city >= n_strings or metric >= n_strings:
+                raise SnapshotError(f"Snapshot {self.path} has an invalid history ring")
+    
+    @classmethod
+    def open(cls, path: str) -> "WeatherSnapshot":
+        """Open a snapshot file."""
+        return cls(path)
+    
+    def __enter__(self) -> "WeatherSnapshot":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Unmap the file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+    
+    @property
+    def age(self) -> float:
+        """Seconds since the snapshot was written."""
+        return time.time() - self.created
+    
+    def current(self, index: int) -> Tuple[float, WeatherData]:
+        """
+        Decode one current-weather record.
+        
+        Returns:
+            (expires_at, WeatherData)
+        """
+        (city, temperature, humidity, wind_speed, direction, condition,
+         feels_like, timestamp, expires) = CURRENT.unpack_from(
+            self._map, self._current_off + index * CURRENT.size
+        )
+        return expires, WeatherData(
+            city=self.strings[city],
+            temperature=temperature,
+            humidity=humidity,
+            wind_speed=wind_speed,
+            wind_direction=self.strings[direction],
+            condition=CONDITIONS[condition],
+            timestamp=datetime.fromtimestamp(timestamp),
+            feels_like=feels_like,
+        )
+    
+    def forecasts(self):
+        """Yield (city, days, expires_at, forecasts) for every forecast entry."""
+        offset = self._forecast_off
+        for _ in range(self.n_forecast):
+            city, days, expires = FORECAST_ENTRY.unpack_from(self._map, offset)
+            offset += FORECAST_ENTRY.size
+            forecasts = []
+            for _ in range(days):
+                date, high, low, condition, precipitation = FORECAST_DAY.unpack_from(self._map, offset)
+                offset += FORECAST_DAY.size
+                forecasts.append(Forecast(
+                    date=datetime.fromtimestamp(date),
+                    high_temp=high,
+                    low_temp=low,
+                    condition=CONDITIONS[condition],
+                    precipitation_chance=precipitation,
+                ))
+            yield self.strings[city], days, expires, forecasts
+    
+    def cache_entries(self) -> List[Tuple[tuple, float, object]]:
+        """Return every cache entry in WeatherAPI.cache_entries form."""
+        entries = []
+        for i in range(self.n_current):
+            expires, weather = self.current(i)
+            entries.append((("current", weather.city, 0), expires, weather))
+        for city, days, expires, forecasts in self.forecasts():
+            entries.append((("forecast", city, days), expires, forecasts))
+        return entries
+    
+    def restore_history(self, store) -> int:
+        """
+        Merge the snapshot's history rings into a HistoryStore.
+        
+        Readings the store recorded since startup are kept; only older
+        buckets are taken from the snapshot (see HistoryStore.import_series).
+        
+        Returns:
+            Number of rings restored
+        """
+        view = memoryview(self._map)
+        offset = self._series_off
+        try:
+            for _ in range(self.n_series):
+                offset += -offset % 8
+                city, metric, resolution, size = SERIES.unpack_from(self._map, offset)
+                offset += SERIES.size
+                columns = []
+                for _ in range(5):
+                    columns.append(view[offset:offset + size * 8].cast("d"))
+                    offset += size * 8
+                store.import_series(self.strings[city], self.strings[metric], resolution, *columns)
+                for column in columns:
+                    column.release()
+        finally:
+            view.release()
+        return self.n_series
+
+
+class SnapshotWriter:
+    """
+    Periodically snapshots a WeatherAPI on a background thread.
+    
+    A failed write is logged and kept in ``last_error``; the next interval
+    tries again.
+    """
+    
+    def __init__(self, api, path: str, interval: float = 60.0):
+        """
+        Initialize writer.
+        
+        Args:
+            api: WeatherAPI to snapshot
+            path: Destination file
+            interval: Seconds between snapshots
+        """
+        self.api = api
+        self.path = path
+        self.interval = interval
+        self.writes = 0
+        self.failures = 0
+        self.last_error: Optional[Exception] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def restore(self) -> int:
+        """
+        Warm the API from the snapshot at ``path``, if there is one.
+        
+        A missing file means a first start; an unreadable one is logged and
+        skipped, so either way the API starts with an empty cache.
+        
+        Returns:
+            Number of cache entries loaded
+        """
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            return self.api.load_snapshot(self.path)
+        except SnapshotError as e:
+            logger.warning("Ignoring unreadable snapshot: %s", e)
+            return 0
+    
+    def start(self) -> None:
+        """Start writing snapshots."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="weather-snapshot", daemon=True)
+            self._thread.start()
+    
+    def stop(self, final: bool = True) -> None:
+        """
+        Stop the writer.
+        
+        Args:
+            final: Write one last snapshot before returning
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if final:
+            self.write()
+    
+    def write(self) -> bool:
+        """Write a snapshot now; returns False (and logs why) if it failed."""
+        try:
+            self.api.save_snapshot(self.path)
+        except Exception as e:  # keep the thread alive; the next write may succeed
+            self.failures += 1
+            self.last_error = e
+            logger.exception("Snapshot write to %s failed", self.path)
+            return False
+        self.writes += 1
+        return True
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write()
@@ -0,0 +1,193 @@
+"""
+Seeded synthetic weather for reproducible runs and benchmark workloads.
+"""
+import math
+import random
+import zlib
+from datetime import datetime, timedelta
+from typing import Iterator, List, Sequence
+
+from weather.models import WeatherData, Forecast, Station, WeatherCondition
+
+
+DIRECTIONS = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
+CONDITIONS = [
+    WeatherCondition.SUNNY,
+    WeatherCondition.PARTLY_CLOUDY,
+    WeatherCondition.CLOUDY,
+    WeatherCondition.RAINY,
+    WeatherCondition.STORMY,
+]
+
+
+class SyntheticWeather:
+    """
+    Deterministic weather generator.
+    
+    Every value is a pure function of (seed, city, timestep), so any reading
+    can be regenerated independently and two generators with the same seed
+    always agree. Temperatures follow a per-city climate with a daily cycle
+    plus noise, which gives trends something realistic to work with.
+    """
+    
+    def __init__(
+        self,
+        seed: int = 0,
+        start: datetime = datetime(2024, 1, 1),
+        step: timedelta = timedelta(hours=1),
+    ):
+        """
+        Initialize generator.
+        
+        Args:
+            seed: Seed shared by every generated value
+            start: Time of timestep 0
+            step: Time between timesteps
+        """
+        self.seed = seed
+        self.start = start
+        self.step = step
+        self._steps_per_day = max(1, round(timedelta(days=1) / step))
+        self._climate = {}
+    
+    def _rng(self, city: str, t: int, salt: int = 0) -> random.Random:
+        """Return a generator seeded from (seed, city, t); str hashes are not stable."""
+        key = zlib.crc32(city.encode("utf-8"))
+        return random.Random((self.seed * 1_000_003 + key) * 4_000_037 + t * 8 + salt)
+    
+    def climate(self, city: str):
+        """Return (base temperature, daily swing, base humidity) for a city."""
+        climate = self._climate.get(city)
+        if climate is None:
+            rng = self._rng(city, -1)
+            climate = (rng.uniform(40, 85), rng.uniform(5, 15), rng.uniform(30, 70))
+            self._climate[city] = climate
+        return climate
+    
+    def current(self, city: str, t: int = 0) -> WeatherData:
+        """
+        Generate the reading for a city at a timestep.
+        
+        Args:
+            city: City name
+            t: Timestep index
+        
+        Returns:
+            WeatherData for that city and time
+        """
+        base, swing, humidity = self.climate(city)
+        rng = self._rng(city, t)
+        hour = (t % self._steps_per_day) / self._steps_per_day
+        temperature = base + swing * math.sin(2 * math.pi * (hour - 0.375)) + rng.gauss(0, 2)
+        return WeatherData(
+            city=city,
+            temperature=round(temperature),
+            humidity=min(100, max(0, round(humidity + rng.gauss(0, 8)))),
+            wind_speed=max(0, round(rng.gauss(12, 6))),
+            wind_direction=DIRECTIONS[rng.randrange(len(DIRECTIONS))],
+            condition=CONDITIONS[rng.randrange(len(CONDITIONS))],
+            timestamp=self.start + t * self.step,
+        )
+    
+    def forecast(self, city: str, days: int = 5, t: int = 0) -> List[Forecast]:
+        """
+        Generate a forecast issued at a timestep.
+        
+        Args:
+            city: City name
+            days: Number of days to forecast
+            t: Timestep index the forecast is issued at
+        
+        Returns:
+            List of Forecast objects
+        """
+        base, swing, _ = self.climate(city)
+        rng = self._rng(city, t, salt=1)
+        issued = self.start + t * self.step
+        forecasts = []
+        for i in range(days):
+            mid = base + rng.gauss(0, 4)
+            forecasts.append(Forecast(
+                date=issued + timedelta(days=i + 1),
+                high_temp=round(mid + swing),
+                low_temp=round(mid - swing),
+                condition=CONDITIONS[rng.randrange(len(CONDITIONS))],
+                precipitation_chance=rng.randrange(101),
+            ))
+        return forecasts
+    
+    def alerts(self, city: str, t: int = 0) -> List[str]:
+        """Generate active alerts for a city at a timestep."""
+        reading = self.current(city, t)
+        alerts = []
+        if reading.temperature >= 90:
+            alerts.append("Heat Advisory: Temperatures expected to exceed 90°F")
+        if reading.wind_speed >= 30:
+            alerts.append("Wind Advisory: Gusts above 30 mph")
+        return alerts
+    
+    def stations(self, count: int) -> List[Station]:
+        """
+        Generate a catalog of stations spread evenly over the globe.
+        
+        Args:
+            count: Number of stations
+        
+        Returns:
+            Stations with ids "ST000000" onwards
+        """
+        rng = random.Random(self.seed * 1_000_003 + count)
+        stations = []
+        for i in range(count):
+            # Uniform on the sphere: sine of latitude is uniform
+            latitude = math.degrees(math.asin(rng.uniform(-1.0, 1.0)))
+            longitude = rng.uniform(-180.0, 180.0)
+            stations.append(Station(f"ST{i:06d}", f"Station {i:06d}", round(latitude, 4), round(longitude, 4)))
+        return stations
+    
+    def series(self, cities: Sequence[str], steps: int) -> Iterator[WeatherData]:
+        """
+        Yield readings for every city at every timestep, time-major.
+        
+        Args:
+            cities: City names
+            steps: Number of timesteps
+        """
+        for t in range(steps):
+            for city in cities:
+                yield self.current(city, t)
+    
+    def frame(self, cities: Sequence[str], steps: int):
+        """
+        Generate ``len(cities) * steps`` readings as a WeatherFrame.
+        
+        Uses NumPy's seeded generator for bulk speed, so values differ from
+        ``current`` but are equally reproducible for a given seed. Rows are
+        time-major, like ``series``.
+        
+        Returns:
+            WeatherFrame (requires numpy)
+        """
+        import numpy as np
+        from weather.frame import WeatherFrame, CONDITIONS as FRAME_CONDITIONS
+        
+        climates = np.array([self.climate(city) for city in cities]).reshape(-1, 3)
+        n_cities = len(cities)
+        rng = np.random.default_rng(self.seed)
+        t = np.repeat(np.arange(steps), n_cities)
+        city = np.tile(np.arange(n_cities), steps)
+        base, swing, humidity = climates[city].T
+        hour = (t % self._steps_per_day) / self._steps_per_day
+        temperature = base + swing * np.sin(2 * np.pi * (hour - 0.375)) + rng.normal(0, 2, len(t))
+        condition_codes = np.array([FRAME_CONDITIONS.index(c) for c in CONDITIONS])
+        step_us = int(self.step / timedelta(microseconds=1))
+        return WeatherFrame(
+            cities=cities,
+            city=city,
+            temperature=np.rint(temperature),
+            humidity=np.clip(np.rint(humidity + rng.normal(0, 8, len(t))), 0, 100),
+            wind_speed=np.maximum(0, np.rint(rng.normal(12, 6, len(t)))),
+            wind_direction=rng.integers(0, len(DIRECTIONS), len(t)),
+            condition=condition_codes[rng.integers(0, len(CONDITIONS), len(t))],
+            timestamp=np.datetime64(self.start, "us") + t * np.timedelta64(step_us, "us"),
+        )
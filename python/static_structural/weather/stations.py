@@ -0,0 +1,204 @@
+"""
+Spatial index over weather stations.
+"""
+import bisect
+import heapq
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from weather.models import Station
+
+
+EARTH_RADIUS_KM = 6371.0088
+LEAF_SIZE = 16
+
+# (latitude, longitude) and (south, west, north, east), in degrees
+Point = Tuple[float, float]
+Box = Tuple[float, float, float, float]
+
+
+def unit_vector(latitude: float, longitude: float) -> Tuple[float, float, float]:
+    """Return the point on the unit sphere for a latitude/longitude."""
+    phi = math.radians(latitude)
+    lam = math.radians(longitude)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def chord_to_km(chord: float) -> float:
+    """Convert a straight-line distance on the unit sphere to great-circle km."""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def haversine_km(a: Point, b: Point) -> float:
+    """Great-circle distance between two (latitude, longitude) points."""
+    return chord_to_km(math.dist(unit_vector(*a), unit_vector(*b)))
+
+
+class StationIndex:
+    """
+    Static index answering nearest-station and bounding-box queries.
+    
+    Stations are stored as unit vectors in a k-d tree, where straight-line
+    distance orders points exactly like great-circle distance, so nearest
+    queries stay correct across the poles and the antimeridian. Boxes are
+    answered from one-degree latitude rows kept sorted by longitude, so a
+    query bisects each row it spans and only checks latitude on the two
+    edge rows.
+    """
+    
+    def __init__(self, stations: Iterable[Station]):
+        """
+        Build the index.
+        
+        Args:
+            stations: Stations to index; the index does not change afterwards
+        """
+        self.stations: List[Station] = list(stations)
+        self._ids = {s.id: s for s in self.stations}
+        self._xyz = [unit_vector(s.latitude, s.longitude) for s in self.stations]
+        self._coords = [list(column) for column in zip(*self._xyz)] if self.stations else [[], [], []]
+        
+        # k-d tree in flat lists: leaves have axis -1 and cover
+        # self._order[low[n]:high[n]]; inner nodes split on axis at split[n]
+        # with children low[n] (below) and high[n] (at or above)
+        self._axis: List[int] = []
+        self._split: List[float] = []
+        self._low: List[int] = []
+        self._high: List[int] = []
+        self._order: List[int] = []
+        if self.stations:
+            self._build(list(range(len(self.stations))))
+        
+        # One-degree latitude rows, each sorted by longitude
+        self._rows: Dict[int, Tuple[List[float], List[int]]] = {}
+        for row, members in self._group_rows().items():
+            members.sort(key=lambda i: self.stations[i].longitude)
+            self._rows[row] = ([self.stations[i].longitude for i in members], members)
+    
+    def __len__(self) -> int:
+        return len(self.stations)
+    
+    def _group_rows(self) -> Dict[int, List[int]]:
+        rows: Dict[int, List[int]] = {}
+        for i, station in enumerate(self.stations):
+            rows.setdefault(self._row(station.latitude), []).append(i)
+        return rows
+    
+    @staticmethod
+    def _row(latitude: float) -> int:
+        return min(89, max(-90, math.floor(latitude)))
+    
+    def _build(self, indices: List[int]) -> int:
+        node = len(self._axis)
+        self._axis.append(-1)
+        self._split.append(0.0)
+        self._low.append(0)
+        self._high.append(0)
+        
+        if len(indices) <= LEAF_SIZE:
+            self._low[node] = len(self._order)
+            self._order.extend(indices)
+            self._high[node] = len(self._order)
+            return node
+        
+        spreads = []
+        for column in self._coords:
+            values = list(map(column.__getitem__, indices))
+            spreads.append(max(values) - min(values))
+        axis = spreads.index(max(spreads))
+        column = self._coords[axis]
+        indices.sort(key=column.__getitem__)
+        mid = len(indices) // 2
+        self._axis[node] = axis
+        self._split[node] = column[indices[mid]]
+        self._low[node] = self._build(indices[:mid])
+        self._high[node] = self._build(indices[mid:])
+        return node
+    
+    # Nearest
+    
+    def nearest(self, latitude: float, longitude: float, k: int = 1) -> List[Tuple[Station, float]]:
+        """
+        Find the stations closest to a point.
+        
+        Args:
+            latitude: Degrees north
+            longitude: Degrees east
+            k: Number of stations to return
+        
+        Returns:
+            Up to ``k`` (station, distance in km) pairs, closest first
+        """
+        if not self.stations or k <= 0:
+            return []
+        query = unit_vector(latitude, longitude)
+        best: List[Tuple[float, int]] = []  # max-heap of (-squared distance, index)
+        self._search(0, query, k, best)
+        best.sort(reverse=True)
+        return [(self.stations[i], chord_to_km(math.sqrt(-d2))) for d2, i in best]
+    
+    def nearest_many(self, points: Sequence[Point], k: int = 1) -> List[List[Tuple[Station, float]]]:
+        """Run ``nearest`` for each (latitude, longitude) point."""
+        return [self.nearest(latitude, longitude, k) for latitude, longitude in points]
+    
+    def _search(self, node: int, query, k: int, best: List[Tuple[float, int]]) -> None:
+        axis = self._axis[node]
+        if axis < 0:
+            qx, qy, qz = query
+            xyz = self._xyz
+            for i in self._order[self._low[node]:self._high[node]]:
+                x, y, z = xyz[i]
+                d2 = (x - qx) ** 2 + (y - qy) ** 2 + (z - qz) ** 2
+                if len(best) < k:
+                    heapq.heappush(best, (-d2, i))
+                elif d2 < -best[0][0]:
+                    heapq.heapreplace(best, (-d2, i))
+            return
+        
+        diff = query[axis] - self._split[node]
+        near, far = (self._low[node], self._high[node]) if diff < 0 else (self._high[node], self._low[node])
+        self._search(near, query, k, best)
+        if len(best) < k or diff * diff < -best[0][0]:
+            self._search(far, query, k, best)
+    
+    # Bounding boxes
+    
+    def within(self, south: float, west: float, north: float, east: float) -> List[Station]:
+        """
+        Find every station inside a latitude/longitude box.
+        
+        Boxes with ``west > east`` wrap across the antimeridian.
+        
+        Args:
+            south: Southern edge (degrees north)
+            west: Western edge (degrees east)
+            north: Northern edge (degrees north)
+            east: Eastern edge (degrees east)
+        
+        Returns:
+            Matching stations, grouped by one-degree latitude row
+        """
+        spans = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+        first, last = self._row(south), self._row(north)
+        matches = []
+        for row in range(first, last + 1):
+            if row not in self._rows:
+                continue
+            longitudes, members = self._rows[row]
+            edge = row in (first, last)
+            for low, high in spans:
+                start = bisect.bisect_left(longitudes, low)
+                stop = bisect.bisect_right(longitudes, high)
+                for i in members[start:stop]:
+                    station = self.stations[i]
+                    if not edge or south <= station.latitude <= north:
+                        matches.append(station)
+        return matches
+    
+    def within_many(self, boxes: Sequence[Box]) -> List[List[Station]]:
+        """Run ``within`` for each (south, west, north, east) box."""
+        return [self.within(*box) for box in boxes]
+    
+    def get(self, station_id: str) -> Optional[Station]:
+        """Return the station with an id, if indexed."""
+        return self._ids.get(station_id)
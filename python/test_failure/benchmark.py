@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Calculator benchmarks.
+
+Run with: python benchmark.py [name ...] [--rows 1000000]
+
+Save results with --save baseline.json, then check a later run against them
+with --compare baseline.json: timings more than --threshold slower, and
+slower by more than the spread measured across rounds, are flagged as
+regressions and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+from typing import Callable, Dict, List, Optional
+
+import statistics as calc_stats
+from calculator import Calculator
+from expression import compile_expression, count_nodes, evaluate_expression, evaluate_vectorized, tokenize
+from histogram import histogram
+
+
+FORMULA = "(price * quantity - discount) / (1 + tax / 100)"
+
+
+def timed(func: Callable, *args, **kwargs) -> float:
+    """Return the wall time of one call in seconds."""
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def best_time(func: Callable, *args) -> float:
+    """
+    Best per-call time in seconds, repeating fast calls to fill ~0.2s.
+    
+    The minimum is the stable statistic: slower runs measure interference
+    from the rest of the system, not the code.
+    """
+    timer = timeit.Timer(lambda: func(*args))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=3, number=number)) / number
+
+
+def sample_times(
+    cases: Dict[str, Callable[[], object]],
+    repeat: int = 5,
+    calibrate: Optional[Callable[[], object]] = None,
+) -> Dict[str, List[float]]:
+    """
+    Per-call times in seconds of each case, one sample per round.
+    
+    Runs are interleaved, every case once per round for ``repeat`` rounds,
+    so a slow patch of the machine affects all cases alike rather than
+    whichever few were running at the time. A ``calibrate`` workload is
+    timed briefly before every case in every round and returned under
+    "calibration", so machine speed is sampled across the whole run.
+    """
+    timers = {}
+    for name, case in cases.items():
+        case()  # Warm caches (including the compiled-expression cache) first
+        timer = timeit.Timer(case)
+        number, _ = timer.autorange()
+        timers[name] = (timer, number)
+    samples: Dict[str, List[float]] = {name: [] for name in cases}
+    if calibrate is not None:
+        calibration_timer = timeit.Timer(calibrate)
+        calibration_number = max(1, calibration_timer.autorange()[0] // 10)  # ~20 ms
+        samples["calibration"] = []
+    for _ in range(repeat):
+        for name, (timer, number) in timers.items():
+            if calibrate is not None:
+                samples["calibration"].append(calibration_timer.timeit(calibration_number) / calibration_number)
+            samples[name].append(timer.timeit(number) / number)
+    return samples
+
+
+def _quantile(ordered: List[float], q: float) -> float:
+    """Linearly interpolated quantile of sorted values."""
+    position = q * (len(ordered) - 1)
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def spread(samples: List[float], scale: float = 1.0) -> Dict[str, float]:
+    """Min, median and interquartile range of timing samples, multiplied by ``scale``."""
+    ordered = sorted(sample * scale for sample in samples)
+    return {
+        "min": ordered[0],
+        "median": _quantile(ordered, 0.5),
+        "iqr": _quantile(ordered, 0.75) - _quantile(ordered, 0.25),
+    }
+
+
+def calibration() -> int:
+    """Fixed pure-Python workload, timed to tell machine speed from code speed."""
+    total = 0
+    for i in range(1000):
+        total += i * i % 7
+    return total
+
+
+def bench_crossover(args) -> Dict[str, float]:
+    """
+    Time median and std dev per path from 10 to --max-size values.
+    
+    ``python`` sorts / makes two passes over a list; ``numpy_list`` includes
+    converting the list; ``numpy_array`` starts from an ndarray. The list
+    crossover is where numpy_list overtakes python.
+    """
+    import numpy as np
+    
+    rng = np.random.default_rng(args.seed)
+    results = {}
+    size = 10
+    while size <= args.max_size:
+        vector = rng.normal(size=size)
+        values = vector.tolist()
+        timings = {
+            "median python": best_time(calc_stats._median_python, values),
+            "median numpy_list": best_time(lambda: calc_stats._median_numpy(np.asarray(values, dtype=float))),
+            "median numpy_array": best_time(calc_stats._median_numpy, vector),
+            "std_dev python": best_time(_std_dev_python, values),
+            "std_dev numpy_list": best_time(lambda: calc_stats._squared_deviations_numpy(np.asarray(values, dtype=float))),
+            "std_dev numpy_array": best_time(calc_stats._squared_deviations_numpy, vector),
+        }
+        for name, seconds in timings.items():
+            results[f"n={size:,} {name}_us"] = seconds * 1e6
+        size *= 10
+    return results
+
+
+def _std_dev_python(values) -> float:
+    mean = calc_stats.calculate_mean(values)
+    return sum((x - mean) ** 2 for x in values)
+
+
+def bench_vectorized(args) -> Dict[str, float]:
+    """Compare evaluate_vectorized with a Python loop over evaluate_expression."""
+    import numpy as np
+    
+    rng = np.random.default_rng(args.seed)
+    columns = {
+        "price": rng.uniform(1, 100, args.rows),
+        "quantity": rng.integers(1, 50, args.rows).astype(float),
+        "discount": rng.uniform(0, 10, args.rows),
+        "tax": rng.uniform(0, 25, args.rows),
+    }
+    loop_rows = min(args.rows, args.loop_rows)
+    rows = [{name: float(values[i]) for name, values in columns.items()} for i in range(loop_rows)]
+    compile_expression.cache_clear()
+    
+    def python_loop():
+        return [evaluate_expression(FORMULA, **row) for row in rows]
+    
+    loop = timed(python_loop) * args.rows / loop_rows
+    vectorized = timed(evaluate_vectorized, FORMULA, **columns)
+    return {
+        "rows": args.rows,
+        "python_loop_s": loop,
+        "vectorized_s": vectorized,
+        "speedup": loop / vectorized if vectorized else float("inf"),
+    }
+
+
+def random_expression(rng: random.Random, terms: int = 12) -> str:
+    """Build a random arithmetic expression with parentheses."""
+    parts = [str(rng.randint(1, 999))]
+    for _ in range(terms - 1):
+        operand = str(rng.randint(1, 999))
+        if rng.random() < 0.3:
+            operand = f"({operand} {rng.choice('+-*/')} {rng.randint(1, 99)})"
+        parts.append(f"{rng.choice('+-*/')} {operand}")
+    return " ".join(parts)
+
+
+def bench_batch(args) -> Dict[str, float]:
+    """Compare Calculator.evaluate_many in one process and in a pool."""
+    rng = random.Random(args.seed)
+    expressions = [random_expression(rng) for _ in range(args.batch)]
+    workers = args.workers or os.cpu_count() or 1
+    
+    compile_expression.cache_clear()
+    serial = timed(Calculator().evaluate_many, expressions, workers=1)
+    compile_expression.cache_clear()
+    pooled = timed(Calculator().evaluate_many, expressions, workers=workers)
+    return {
+        "expressions": len(expressions),
+        "workers": workers,
+        "serial_s": serial,
+        "pooled_s": pooled,
+        "speedup": serial / pooled if pooled else float("inf"),
+    }
+
+
+def repeated_formula(rng: random.Random) -> str:
+    """A generated formula that repeats subterms and has constant parts."""
+    operands = [rng.choice(["a", "b", str(rng.randint(1, 99))]) for _ in range(5)]
+    term = operands[0] + "".join(f" {rng.choice('+-*/')} {operand}" for operand in operands[1:])
+    constant = random_expression(rng, terms=3)
+    return f"({term}) * ({term}) / ({term}) + ({constant}) * 1 - ({term} + 0)"
+
+
+def bench_optimizer(args) -> Dict[str, float]:
+    """Time compiled formulas, scalar and over arrays, with and without optimize_tree."""
+    rng = random.Random(args.seed)
+    formulas = [repeated_formula(rng) for _ in range(50)]
+    compile_expression.cache_clear()
+    plain = [compile_expression(f, optimize=False) for f in formulas]
+    optimized = [compile_expression(f) for f in formulas]
+    def run(compiled, values):
+        for function in compiled:
+            try:
+                function(**values)
+            except ValueError:
+                pass
+    
+    values = {"a": 3.0, "b": 7.0}
+    plain_s = best_time(run, plain, values)
+    optimized_s = best_time(run, optimized, values)
+    results = {
+        "formulas": len(formulas),
+        "nodes": sum(count_nodes(f.tree) for f in plain),
+        "nodes_saved": sum(f.nodes_saved for f in optimized),
+        "scalar_plain_us": plain_s * 1e6,
+        "scalar_optimized_us": optimized_s * 1e6,
+        "scalar_speedup": plain_s / optimized_s if optimized_s else float("inf"),
+    }
+    
+    import numpy as np
+    
+    array_rng = np.random.default_rng(args.seed)
+    rows = min(args.rows, args.loop_rows)
+    values = {"a": array_rng.uniform(1, 10, rows), "b": array_rng.uniform(1, 10, rows)}
+    plain = [compile_expression(f, vectorized=True, optimize=False) for f in formulas]
+    optimized = [compile_expression(f, vectorized=True) for f in formulas]
+    with np.errstate(all="ignore"):
+        plain_s = best_time(run, plain, values)
+        optimized_s = best_time(run, optimized, values)
+    results.update({
+        "vectorized_rows": rows,
+        "vectorized_plain_ms": plain_s * 1e3,
+        "vectorized_optimized_ms": optimized_s * 1e3,
+        "vectorized_speedup": plain_s / optimized_s if optimized_s else float("inf"),
+    })
+    return results
+
+
+class _StringHistory(Calculator):
+    """Calculator whose add formats history eagerly, as it used to."""
+    
+    def __init__(self):
+        super().__init__()
+        self.strings = []
+    
+    def add(self, a, b):
+        result = a + b
+        self.strings.append(f"{a} + {b} = {result}")
+        return result
+
+
+def bench_history(args) -> Dict[str, float]:
+    """
+    Per-operation cost of Calculator.add under each history setting.
+    
+    ``strings`` is the former approach: an f-string per call appended to
+    an unbounded list.
+    """
+    ops = args.ops
+    
+    def run(calc):
+        add = calc.add
+        for i in range(ops):
+            add(i, 1)
+    
+    results = {
+        "ring_buffer_ns": timed(run, Calculator()),
+        "unbounded_ns": timed(run, Calculator(history_size=None)),
+        "disabled_ns": timed(run, Calculator(history_size=0)),
+        "strings_ns": timed(run, _StringHistory()),
+    }
+    return {name: seconds * 1e9 / ops for name, seconds in results.items()}
+
+
+def bench_micro(args) -> Dict[str, float]:
+    """
+    Per-call times of the calculator's building blocks, in microseconds.
+    
+    Covers tokenize and evaluate_expression across expression sizes and
+    nesting depths (``evaluate`` hits the compiled-expression cache,
+    ``compile`` bypasses it), every function in statistics.py and
+    fixed-width and quantile histograms (20 bins) across input sizes, and
+    Calculator operation and history overhead. Each timing is a spread
+    (min, median and IQR over --repeat rounds).
+    """
+    rng = random.Random(args.seed)
+    cases: Dict[str, Callable[[], object]] = {}
+    
+    for terms in (10, 100, 1000):
+        expression = random_expression(rng, terms)
+        cases[f"tokenize terms={terms}"] = lambda e=expression: tokenize(e)
+        cases[f"evaluate terms={terms}"] = lambda e=expression: evaluate_expression(e)
+        cases[f"compile terms={terms}"] = lambda e=expression: compile_expression.__wrapped__(e)
+    for depth in (10, 100, 1000):
+        expression = "(" * depth + "x + 1" + ")" * depth
+        cases[f"evaluate depth={depth}"] = lambda e=expression: evaluate_expression(e, x=2)
+        cases[f"compile depth={depth}"] = lambda e=expression: compile_expression.__wrapped__(e)
+    
+    functions = {
+        "mean": calc_stats.calculate_mean,
+        "median": calc_stats.calculate_median,
+        "std_dev": calc_stats.calculate_std_dev,
+        "variance": calc_stats.calculate_variance,
+        "mode": calc_stats.calculate_mode,
+    }
+    for size in (10, 1000, 100_000):
+        values = [rng.randint(0, size) / 8 for _ in range(size)]
+        for name, function in functions.items():
+            cases[f"{name} n={size:,}"] = lambda f=function, v=values: f(v)
+        cases[f"histogram n={size:,}"] = lambda v=values: histogram(v, 20)
+        cases[f"quantile histogram n={size:,}"] = lambda v=values: histogram(v, 20, "quantile")
+    
+    calc = Calculator()
+    quiet = Calculator(history_size=0)
+    cases["Calculator.add"] = lambda: calc.add(2, 3)
+    cases["Calculator.add no history"] = lambda: quiet.add(2, 3)
+    cases["Calculator.divide"] = lambda: calc.divide(2, 3)
+    cases["Calculator.evaluate"] = lambda: calc.evaluate("x * 2 + 1", x=3)
+    cases["Calculator._record"] = lambda: calc._record("+", 2, 3, 5)
+    cases["Calculator.get_history n=10,000"] = calc.get_history
+    
+    samples = sample_times(cases, args.repeat, calibrate=calibration)
+    return {f"{name}_us": spread(times, 1e6) for name, times in samples.items()}
+
+
+BENCHMARKS = {
+    "vectorized": bench_vectorized,
+    "batch": bench_batch,
+    "crossover": bench_crossover,
+    "history": bench_history,
+    "optimizer": bench_optimizer,
+    "micro": bench_micro,
+}
+
+# Result keys with these suffixes are timings, where lower is better
+TIME_SUFFIXES = ("_s", "_ms", "_us", "_ns")
+
+
+def _spread(value) -> Dict[str, float]:
+    """A timing as a spread; single numbers (and older baselines) have none."""
+    return value if isinstance(value, dict) else {"min": value, "median": value, "iqr": 0.0}
+
+
+def compare(baseline: Dict[str, Dict[str, object]], results: Dict[str, Dict[str, object]], threshold: float) -> int:
+    """
+    Print how each timing changed against a baseline.
+    
+    When both runs of a benchmark include ``calibration_us``, timings are
+    scaled by how its median changed, so a uniformly slower machine (CPU
+    frequency, other load) is not mistaken for a regression.
+    
+    Timings with a spread compare medians. A slowdown is flagged only when
+    the median and the min are both slower by more than ``threshold`` and
+    by more than the noise, the two runs' IQRs relative to the baseline
+    median, so repeating a run on unchanged code reports nothing.
+    
+    Args:
+        baseline: Saved results, by benchmark name then key
+        results: Results of this run, in the same shape
+        threshold: Relative slowdown (0.1 = 10%) flagged as a regression
+        
+    Returns:
+        Number of regressions
+    """
+    regressions = 0
+    for name, values in results.items():
+        saved = baseline.get(name, {})
+        scale = 1.0
+        if saved.get("calibration_us") and "calibration_us" in values:
+            scale = _spread(values["calibration_us"])["median"] / _spread(saved["calibration_us"])["median"]
+            print(f"{name}: (machine {scale - 1:+.1%} vs baseline; timings normalized)")
+        else:
+            print(f"{name}:")
+        for key, value in values.items():
+            if not key.endswith(TIME_SUFFIXES) or key not in saved or key == "calibration_us":
+                continue
+            now, before = _spread(value), _spread(saved[key])
+            expected = before["median"] * scale
+            if not expected or not before["min"]:
+                continue
+            change = now["median"] / expected - 1
+            change_min = now["min"] / (before["min"] * scale) - 1
+            noise = (before["iqr"] * scale + now["iqr"]) / expected
+            flag = ""
+            if min(change, change_min) > max(threshold, noise):
+                regressions += 1
+                flag = "  REGRESSION"
+            noise_text = f" ±{noise:5.1%}" if noise else ""
+            print(f"  {key:<36} {before['median']:>12,.4f} -> {now['median']:>12,.4f} {change:+8.1%}{noise_text}{flag}")
+    return regressions
+
+
+def _format(value) -> str:
+    """A result value for printing."""
+    if isinstance(value, dict):
+        return f"{value['min']:,.4f} min, {value['median']:,.4f} median, {value['iqr']:,.4f} IQR"
+    return f"{value:,.4f}" if isinstance(value, float) else f"{value:,}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Calculator benchmarks")
+    parser.add_argument("names", nargs="*", metavar="name",
+                        help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--loop-rows", type=int, default=100_000,
+                        help="rows timed in pure-Python loops; scaled up to --rows")
+    parser.add_argument("--max-size", type=float, default=1e6,
+                        help="largest input for the crossover benchmark (1e8 needs ~4 GB for the list)")
+    parser.add_argument("--batch", type=int, default=50_000, help="expressions per batch")
+    parser.add_argument("--ops", type=int, default=1_000_000, help="operations per history setting")
+    parser.add_argument("--workers", type=int, default=0, help="pool size (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=7, help="timing rounds for micro cases (min, median and IQR are kept)")
+    parser.add_argument("--save", metavar="PATH", help="write results to a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare timings with a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown flagged as a regression by --compare (default: 0.2 = 20%%)")
+    args = parser.parse_args()
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(sorted(unknown))}")
+    
+    results = {}
+    for name in args.names or BENCHMARKS:
+        print(f"{name}:")
+        results[name] = BENCHMARKS[name](args)
+        for key, value in results[name].items():
+            print(f"  {key:<36} {_format(value)}")
+    
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": platform.python_version(), "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} (Python {baseline.get('python', '?')}):")
+        regressions = compare(baseline["results"], results, args.threshold)
+        print(f"{regressions} regression(s) over {args.threshold:.0%}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
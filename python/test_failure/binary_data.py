@@ -0,0 +1,296 @@
+"""
+Statistics over binary files of float64/float32 values via mmap.
+
+The file is never loaded: every statistic streams it in page-aligned
+windows of the memory map, so datasets larger than RAM can be analysed.
+Windows are NumPy views when NumPy is installed and memoryview casts
+otherwise. Pages already processed are released back to the OS.
+"""
+import bisect
+import math
+import mmap
+import os
+import struct
+from collections import Counter
+from itertools import accumulate
+from typing import Iterator, List, Optional
+
+from statistics import _numpy
+from parallel import PartialStats
+
+# Window size: whole pages, 1 MiB with 4 KiB pages
+WINDOW_PAGES = 256
+
+# Exact selection narrows the candidate range by histogram passes until at
+# most this many values remain, then collects and sorts them
+MAX_COLLECT = 1 << 20
+SELECT_BINS = 1 << 12
+
+FORMATS = {"float64": ("d", 8), "float32": ("f", 4)}
+
+_DOUBLE = struct.Struct("<d")
+_INT64 = struct.Struct("<q")
+
+
+def _next_up(x: float) -> float:
+    """
+    Return the smallest float greater than ``x``.
+    
+    Same as ``math.nextafter(x, math.inf)``, which needs Python 3.9: the
+    bit pattern of a float read as an integer steps to the adjacent float.
+    """
+    if x != x or x == math.inf:
+        return x
+    if x == 0:
+        return 5e-324
+    (bits,) = _INT64.unpack(_DOUBLE.pack(x))
+    # Negative floats have the sign bit set, so moving up shrinks the magnitude
+    return _DOUBLE.unpack(_INT64.pack(bits + 1 if bits > 0 else bits - 1))[0]
+
+
+class BinaryDataset:
+    """
+    A file of native-endian float64 or float32 values.
+    
+    Summary statistics take one pass. Median and quantiles are exact and
+    take a few more: each pass histograms the values in the current
+    candidate range and keeps the bins holding the wanted ranks, until the
+    remaining candidates fit in MAX_COLLECT values.
+    """
+    
+    def __init__(self, path: str, dtype: str = "float64", window_pages: int = WINDOW_PAGES):
+        """
+        Open a dataset.
+        
+        Args:
+            path: Binary file of packed values
+            dtype: "float64" or "float32"
+            window_pages: Pages per streamed window
+            
+        Raises:
+            ValueError: If the dtype is unsupported or the file size is not
+                a whole number of values
+        """
+        if dtype not in FORMATS:
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        self.path = os.fspath(path)
+        self.dtype = dtype
+        self.format, self.itemsize = FORMATS[dtype]
+        self.nbytes = os.path.getsize(self.path)
+        if self.nbytes % self.itemsize:
+            raise ValueError(f"File size is not a multiple of {self.itemsize} bytes")
+        self.window_bytes = max(1, window_pages) * mmap.PAGESIZE
+        self._summary: Optional[PartialStats] = None
+    
+    def __len__(self) -> int:
+        return self.nbytes // self.itemsize
+    
+    def __iter__(self):
+        return self.windows()
+    
+    def windows(self, start: int = 0, end: Optional[int] = None) -> Iterator:
+        """
+        Yield the values in byte range [start, end) one window at a time.
+        
+        Args:
+            start: First byte (rounded down to a page)
+            end: End byte (default: end of file)
+        """
+        end = self.nbytes if end is None else end
+        start -= start % mmap.PAGESIZE
+        if start >= end:
+            return
+        with open(self.path, "rb") as f:
+            # Windows keep the map alive after the file is closed
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mapped, "madvise"):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        np = _numpy()
+        for offset in range(start, end, self.window_bytes):
+            stop = min(offset + self.window_bytes, end)
+            if np is not None:
+                yield np.frombuffer(mapped, dtype=self.dtype, count=(stop - offset) // self.itemsize, offset=offset)
+            else:
+                yield memoryview(mapped)[offset:stop].cast(self.format)
+            if hasattr(mmap, "MADV_DONTNEED"):
+                # Read-only file pages: dropping them only costs a re-read
+                mapped.madvise(mmap.MADV_DONTNEED, offset, stop - offset)
+    
+    # Summary statistics
+    
+    def summary(self, frequencies: bool = False) -> PartialStats:
+        """
+        Count, mean, variance, min and max in one pass.
+        
+        Args:
+            frequencies: Also count every distinct value (for modes); memory
+                grows with the number of distinct values
+        """
+        if self._summary is not None and not frequencies:
+            return self._summary
+        merged = PartialStats(frequencies=Counter() if frequencies else None)
+        for window in self.windows():
+            merged.merge(PartialStats.from_values(window, frequencies=frequencies))
+        if not frequencies:
+            self._summary = merged
+        return merged
+    
+    def mean(self) -> float:
+        """Arithmetic mean."""
+        return self.summary().mean
+    
+    def variance(self, population: bool = True) -> float:
+        """Population or sample variance."""
+        return self.summary().variance(population)
+    
+    def std_dev(self, population: bool = True) -> float:
+        """Population or sample standard deviation."""
+        return self.summary().std_dev(population)
+    
+    def modes(self) -> List[float]:
+        """Most frequent value(s), sorted."""
+        return self.summary(frequencies=True).modes
+    
+    # Order statistics
+    
+    def median(self) -> float:
+        """Exact median (mean of the middle two for an even count)."""
+        n = len(self)
+        if n == 0:
+            raise ValueError("Cannot calculate median of empty list")
+        mid = n // 2
+        if n % 2:
+            return self.select(mid, mid)[0]
+        low, high = self.select(mid - 1, mid)
+        return (low + high) / 2
+    
+    def quantile(self, q: float) -> float:
+        """Exact quantile: the value of rank floor(q * (n - 1))."""
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        if len(self) == 0:
+            raise ValueError("Cannot calculate quantile of empty list")
+        k = int(q * (len(self) - 1))
+        return self.select(k, k)[0]
+    
+    def select(self, first: int, last: int) -> List[float]:
+        """
+        Return the values of ranks ``first`` to ``last`` (0-based, sorted order).
+        
+        Args:
+            first: Lowest rank wanted
+            last: Highest rank wanted
+        
+        Raises:
+            ValueError: If a rank is out of range or the file contains NaN,
+                which has no rank
+        """
+        if not 0 <= first <= last < len(self):
+            raise ValueError("Rank out of range")
+        summary = self.summary()
+        # A NaN makes the total NaN (so do +inf and -inf together)
+        if math.isnan(summary.total) and self._count_nan():
+            raise ValueError("Cannot rank values of a dataset containing NaN")
+        lo, hi, closed = summary.minimum, summary.maximum, True
+        below, count = 0, summary.count
+        
+        while count > MAX_COLLECT and lo < hi:
+            if _next_up(lo) == hi:
+                # Adjacent floats: only lo (and hi when closed) remain
+                at_lo = self._histogram(lo, hi, False, [lo, hi])[0]
+                return [lo if rank - below < at_lo else hi for rank in range(first, last + 1)]
+            edges = self._edges(lo, hi)
+            counts = self._histogram(lo, hi, closed, edges)
+            cumulative = below
+            for b, c in enumerate(counts):
+                if first < cumulative + c:
+                    break
+                cumulative += c
+            below, end = cumulative, b
+            while last >= cumulative + counts[end]:
+                cumulative += counts[end]
+                end += 1
+            count = sum(counts[b:end + 1])
+            if end > b and count > MAX_COLLECT:
+                # The ranks straddle bins too large to collect together
+                mid = (first + last) // 2
+                return self.select(first, mid) + self.select(mid + 1, last)
+            closed = closed and end == len(counts) - 1
+            lo, hi = edges[b], edges[end + 1]
+        
+        if lo == hi:
+            return [lo] * (last - first + 1)
+        values = sorted(self._collect(lo, hi, closed))
+        return values[first - below:last - below + 1]
+    
+    def _count_nan(self) -> int:
+        """Number of NaN values in the file."""
+        np = _numpy()
+        if np is not None:
+            return sum(int(np.count_nonzero(np.isnan(window))) for window in self.windows())
+        return sum(1 for window in self.windows() for x in window if x != x)
+    
+    @staticmethod
+    def _edges(lo: float, hi: float) -> List[float]:
+        """SELECT_BINS + 1 non-decreasing bin edges from lo to hi."""
+        np = _numpy()
+        if np is not None and math.isfinite(hi - lo):
+            # The edges np.histogram uses for range=(lo, hi)
+            return np.linspace(lo, hi, SELECT_BINS + 1).tolist()
+        # Interpolate rather than step so hi - lo may overflow
+        edges = [lo * (1 - i / SELECT_BINS) + hi * (i / SELECT_BINS) for i in range(SELECT_BINS)]
+        return list(accumulate(edges + [hi], max))
+    
+    def _in_range(self, window, lo: float, hi: float, closed: bool):
+        """Values of a window in [lo, hi) (or [lo, hi] when closed)."""
+        np = _numpy()
+        if np is not None:
+            upper = window <= hi if closed else window < hi
+            return window[(window >= lo) & upper]
+        if closed:
+            return [x for x in window if lo <= x <= hi]
+        return [x for x in window if lo <= x < hi]
+    
+    def _histogram(self, lo: float, hi: float, closed: bool, edges: List[float]) -> List[int]:
+        """Count values per bin [edges[i], edges[i + 1]) within the range."""
+        np = _numpy()
+        bins = len(edges) - 1
+        counts = [0] * bins
+        if np is not None:
+            edge_array = np.asarray(edges)
+            uniform = math.isfinite(hi - lo) and bool(np.all(edge_array[:-1] < edge_array[1:]))
+            totals = np.zeros(bins, dtype=np.int64)
+            for window in self.windows():
+                selected = self._in_range(window, lo, hi, closed).astype(float, copy=False)
+                if uniform:
+                    # Binned arithmetically, then checked against the same edges
+                    totals += np.histogram(selected, bins=bins, range=(lo, hi))[0]
+                else:
+                    index = np.minimum(np.searchsorted(edge_array, selected, side="right") - 1, bins - 1)
+                    totals += np.bincount(index, minlength=bins)
+            return totals.tolist()
+        for window in self.windows():
+            for x in self._in_range(window, lo, hi, closed):
+                counts[min(bisect.bisect_right(edges, x) - 1, bins - 1)] += 1
+        return counts
+    
+    def _collect(self, lo: float, hi: float, closed: bool) -> List[float]:
+        """All values within the range."""
+        np = _numpy()
+        if np is not None:
+            parts = [self._in_range(window, lo, hi, closed) for window in self.windows()]
+            return np.concatenate(parts).tolist() if parts else []
+        values: List[float] = []
+        for window in self.windows():
+            values.extend(self._in_range(window, lo, hi, closed))
+        return values
+
+
+def write_binary(path: str, values, dtype: str = "float64") -> None:
+    """Write values as packed native-endian floats (for tests and tooling)."""
+    from array import array
+    
+    if dtype not in FORMATS:
+        raise ValueError(f"Unsupported dtype: {dtype}")
+    with open(path, "wb") as f:
+        array(FORMATS[dtype][0], values).tofile(f)
@@ -1,41 +1,103 @@
 """
 Scientific Calculator - Core functionality.
 """
-from typing import Union
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Deque, Iterable, List, Optional, Sequence, Tuple, Union
 from statistics import calculate_mean, calculate_median, calculate_std_dev
-from conversions import celsius_to_fahrenheit, fahrenheit_to_celsius
-from expression import evaluate_expression
+from sketches import QuantileSketch
+from parallel import PartialStats, summarize
+from binary_data import BinaryDataset
+from histogram import Histogram, histogram
+from rolling import rolling_mean, rolling_median, rolling_std_dev
+from units import UNITS
+from expression import evaluate_expression, evaluate_tree, evaluate_vectorized, parse
 
 
 Number = Union[int, float]
 
+# Batches smaller than this are evaluated in-process; a pool costs more to start
+MIN_PARALLEL_BATCH = 2000
+
+# Most recent operations kept in history by default
+HISTORY_SIZE = 10_000
+
+# History op for an evaluated expression; its operands are the expression
+# and its variables (None or a dict)
+EVALUATE = "eval"
+
+# (op, first operand, second operand, result)
+HistoryEntry = Tuple[str, object, object, Number]
+
+
+def _format_entry(entry: HistoryEntry) -> str:
+    """Format a history entry like "2 + 3 = 5" or "x * 2 [x=3] = 6"."""
+    op, a, b, result = entry
+    if op == EVALUATE:
+        expression, variables = a, b
+        if variables:
+            bindings = ", ".join(f"{name}={value}" for name, value in variables.items())
+            return f"{expression} [{bindings}] = {result}"
+        return f"{expression} = {result}"
+    return f"{a} {op} {b} = {result}"
+
+
+def _evaluate_chunk(expressions: List[str]) -> List[Union[Number, Exception]]:
+    """
+    Evaluate expressions, returning each failure in place of its result.
+    
+    Batch items are mostly one-off, so they are interpreted rather than
+    compiled (which would also churn the compiled-expression cache);
+    repeats within the chunk reuse the first result.
+    """
+    seen = {}
+    results = []
+    for expression in expressions:
+        result = seen.get(expression)
+        if result is None:
+            try:
+                result = evaluate_tree(parse(expression))
+            except Exception as e:
+                result = e
+            seen[expression] = result
+        results.append(result)
+    return results
+
 
 class Calculator:
     """Scientific calculator with extended functionality."""
     
-    def __init__(self):
-        """Initialize calculator with memory."""
+    def __init__(self, history_size: Optional[int] = HISTORY_SIZE):
+        """
+        Initialize calculator with memory.
+        
+        Args:
+            history_size: Operations kept in history, oldest dropped first;
+                0 disables history and None keeps everything
+        """
         self.memory = 0.0
-        self.history = []
+        self.history: Deque[HistoryEntry] = deque(maxlen=history_size)
+        self._recording = history_size != 0
     
     # Basic Operations
     
     def add(self, a: Number, b: Number) -> Number:
         """Add two numbers."""
         result = a + b
-        self._record(f"{a} + {b} = {result}")
+        self._record("+", a, b, result)
         return result
     
     def subtract(self, a: Number, b: Number) -> Number:
         """Subtract b from a."""
         result = a - b
-        self._record(f"{a} - {b} = {result}")
+        self._record("-", a, b, result)
         return result
     
     def multiply(self, a: Number, b: Number) -> Number:
         """Multiply two numbers."""
         result = a * b
-        self._record(f"{a} * {b} = {result}")
+        self._record("*", a, b, result)
         return result
     
     def divide(self, a: Number, b: Number) -> Number:
@@ -43,25 +105,214 @@ class Calculator:
         if b == 0:
             raise ValueError("Cannot divide by zero")
         result = a / b
-        self._record(f"{a} / {b} = {result}")
+        self._record("/", a, b, result)
         return result
     
     # Statistical Functions
     
     def mean(self, numbers: list) -> float:
         """Calculate arithmetic mean."""
+        if isinstance(numbers, BinaryDataset):
+            return numbers.mean()
         return calculate_mean(numbers)
     
     def median(self, numbers: list) -> float:
         """Calculate median."""
+        if isinstance(numbers, BinaryDataset):
+            return numbers.median()
         return calculate_median(numbers)
     
     def std_dev(self, numbers: list) -> float:
         """Calculate standard deviation."""
+        if isinstance(numbers, BinaryDataset):
+            return numbers.std_dev()
         return calculate_std_dev(numbers)
     
+    # Rolling windows
+    
+    def rolling_mean(self, values: Iterable[float], window: int):
+        """
+        Moving average: the mean of every ``window`` consecutive values.
+        
+        Updated in O(1) per value rather than recomputed per window.
+        
+        Args:
+            values: Iterable or one-dimensional NumPy array of numbers
+            window: Window length
+            
+        Returns:
+            One mean per full window (a list, or an array for array input)
+        """
+        return rolling_mean(values, window)
+    
+    def rolling_std_dev(self, values: Iterable[float], window: int, population: bool = True):
+        """Standard deviation of every ``window`` consecutive values (see rolling_mean)."""
+        return rolling_std_dev(values, window, population)
+    
+    def rolling_median(self, values: Iterable[float], window: int):
+        """Median of every ``window`` consecutive values, O(log window) per value."""
+        return rolling_median(values, window)
+    
+    # Binary files
+    
+    def open_binary(self, path: Union[str, os.PathLike], dtype: str = "float64") -> BinaryDataset:
+        """
+        Open a file of packed float64/float32 values for out-of-core statistics.
+        
+        The file is memory-mapped and streamed in page-aligned windows, so no
+        list of values is built. Pass the result to mean, median or std_dev,
+        or call its methods (variance, modes, quantile, summary) directly.
+        
+        Args:
+            path: Binary file of native-endian values
+            dtype: "float64" or "float32"
+            
+        Returns:
+            BinaryDataset over the file
+        """
+        return BinaryDataset(path, dtype)
+    
+    # Chunked / parallel statistics
+    
+    def summarize(
+        self,
+        source: Union[str, os.PathLike, Iterable[Sequence[float]]],
+        workers: Optional[int] = None,
+        frequencies: bool = False,
+        epsilon: Optional[float] = None,
+    ) -> PartialStats:
+        """
+        Summarize a large dataset using a pool of worker processes.
+        
+        Args:
+            source: Path of a text file of numbers, or an iterable of chunks
+                (lists or arrays of numbers)
+            workers: Worker processes (default: CPU count)
+            frequencies: Also collect frequencies, for ``.modes``
+            epsilon: Also collect a quantile sketch, for ``.quantile(q)``
+            
+        Returns:
+            PartialStats with count, mean, variance(), std_dev(), minimum
+            and maximum
+        """
+        return summarize(source, workers=workers, frequencies=frequencies, epsilon=epsilon)
+    
+    def parallel_mean(self, source, workers: Optional[int] = None) -> float:
+        """Mean of a file or chunked dataset (see summarize)."""
+        return self.summarize(source, workers).mean
+    
+    def parallel_std_dev(self, source, population: bool = True, workers: Optional[int] = None) -> float:
+        """Standard deviation of a file or chunked dataset (see summarize)."""
+        return self.summarize(source, workers).std_dev(population)
+    
+    # Quantiles
+    
+    def quantile_sketch(self, values: Iterable[float] = (), epsilon: float = 0.01) -> QuantileSketch:
+        """
+        Summarize values in a mergeable quantile sketch.
+        
+        Args:
+            values: Values (any iterable, including generators)
+            epsilon: Target rank error as a fraction of the count
+        
+        Returns:
+            QuantileSketch; add more values with update() or combine
+            shards with merge_sketches
+        """
+        return QuantileSketch(epsilon).update(values)
+    
+    def merge_sketches(self, sketches: Iterable[QuantileSketch]) -> QuantileSketch:
+        """Combine sketches of separate shards into a new sketch of all of them."""
+        sketches = list(sketches)
+        if not sketches:
+            raise ValueError("Cannot merge an empty list of sketches")
+        merged = QuantileSketch(sketches[0].epsilon)
+        for sketch in sketches:
+            merged.merge(sketch)
+        return merged
+    
+    def quantiles(
+        self,
+        data: Union[Iterable[float], QuantileSketch],
+        qs: Sequence[float] = (0.5, 0.95, 0.99),
+        epsilon: float = 0.01,
+    ) -> List[float]:
+        """
+        Estimate quantiles (p50/p95/p99 by default) without sorting the data.
+        
+        Args:
+            data: Values, or a sketch built earlier
+            qs: Quantiles in [0, 1]
+            epsilon: Target rank error when sketching ``data``
+        
+        Returns:
+            One estimate per entry of ``qs``
+        """
+        sketch = data if isinstance(data, QuantileSketch) else self.quantile_sketch(data, epsilon)
+        return sketch.quantiles(qs)
+    
+    # Histograms
+    
+    def histogram(
+        self,
+        values,
+        bins: Union[int, Sequence[float]] = 10,
+        binning: str = "fixed",
+        limits: Optional[Tuple[float, float]] = None,
+    ) -> Histogram:
+        """
+        Bin values into a histogram, vectorized when NumPy is installed.
+        
+        Unlike mode, which counts exact values, this summarizes continuous
+        data. Chunks binned with the same edges (e.g. ``bins=h.edges`` or
+        fixed ``limits``) combine with merge_histograms.
+        
+        Args:
+            values: Numbers (list, iterable, ``array.array`` or NumPy array)
+            bins: Number of bins, or a sequence of custom edges
+            binning: "fixed" for equal widths or "quantile" for equal counts
+            limits: (low, high) for fixed-width bins (default: data range)
+            
+        Returns:
+            Histogram with edges, counts, underflow and overflow
+        """
+        return histogram(values, bins, binning, limits)
+    
+    def merge_histograms(self, histograms: Iterable[Histogram]) -> Histogram:
+        """Combine histograms with identical edges into a new histogram of all of them."""
+        histograms = list(histograms)
+        if not histograms:
+            raise ValueError("Cannot merge an empty list of histograms")
+        merged = Histogram(histograms[0].edges)
+        for part in histograms:
+            merged.merge(part)
+        return merged
+    
     # Conversions
     
+    def convert(self, value: Number, from_unit: str, to_unit: str) -> float:
+        """
+        Convert a value between units of length, weight or temperature.
+        
+        Args:
+            value: Value in from_unit
+            from_unit: Unit symbol, e.g. 'km', 'lb' or 'F'
+            to_unit: Unit symbol of the same dimension
+            
+        Returns:
+            Converted value
+        """
+        return UNITS.convert(value, from_unit, to_unit)
+    
+    def convert_many(self, values, from_unit: str, to_unit: str):
+        """
+        Convert a whole sequence or array of values in one vectorized step.
+        
+        Returns:
+            NumPy array of converted values (a list without NumPy)
+        """
+        return UNITS.convert_many(values, from_unit, to_unit)
+    
     def convert_temperature(self, value: Number, from_unit: str, to_unit: str) -> float:
         """
         Convert temperature between units.
@@ -70,48 +321,91 @@ class Calculator:
             value: Temperature value
             from_unit: Source unit ('C', 'F', 'K')
             to_unit: Target unit ('C', 'F', 'K')
-            
+        
         Returns:
             Converted temperature
         """
         from_unit = from_unit.upper()
         to_unit = to_unit.upper()
-        
-        if from_unit == to_unit:
-            return float(value)
-        
-        # Convert to Celsius first
-        if from_unit == 'F':
-            celsius = fahrenheit_to_celsius(value)
-        elif from_unit == 'K':
-            celsius = value - 273.15
-        else:
-            celsius = value
-        
-        # Convert from Celsius to target
-        if to_unit == 'F':
-            return celsius_to_fahrenheit(celsius)
-        elif to_unit == 'K':
-            return celsius + 273.15
-        else:
-            return celsius
+        if UNITS.dimensions.get(from_unit) != "temperature":
+            raise ValueError(f"Unknown temperature unit: {from_unit}")
+        return UNITS.convert(value, from_unit, to_unit)
     
     # Expression Evaluation
     
-    def evaluate(self, expression: str) -> Number:
+    def evaluate(self, expression: str, **variables: Number) -> Number:
         """
         Evaluate a mathematical expression.
         
         Args:
-            expression: String expression like "2 + 3 * 4"
-            
+            expression: String expression like "2 + 3 * 4" or "x * rate"
+            **variables: Values for variables named in the expression
+        
         Returns:
             Result of evaluation
         """
-        result = evaluate_expression(expression)
-        self._record(f"{expression} = {result}")
+        result = evaluate_expression(expression, **variables)
+        self._record(EVALUATE, expression, variables, result)
         return result
     
+    def evaluate_vectorized(self, expression: str, **arrays):
+        """
+        Evaluate an expression over whole arrays of variable values.
+        
+        Requires NumPy. Results are not recorded in history.
+        
+        Args:
+            expression: String expression like "price * (1 + rate)"
+            **arrays: Arrays (or scalars) for the expression's variables
+        
+        Returns:
+            NumPy array of results; NaN where an element divides by zero
+        """
+        return evaluate_vectorized(expression, **arrays)
+    
+    def evaluate_many(
+        self,
+        expressions: Iterable[str],
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> List[Union[Number, Exception]]:
+        """
+        Evaluate a batch of independent expressions, in parallel if large.
+        
+        Expressions are split into chunks that worker processes parse and
+        evaluate, each keeping its own compiled-expression cache. Results
+        come back in input order, and an expression that fails does not
+        stop the batch: its exception takes the place of its result.
+        Successful results are added to history in one pass.
+        
+        Args:
+            expressions: Expression strings
+            workers: Worker processes (default: CPU count); 1 evaluates
+                in this process
+            chunk_size: Expressions per task (default: about four tasks
+                per worker)
+        
+        Returns:
+            One result or exception per expression
+        """
+        expressions = list(expressions)
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(expressions) < MIN_PARALLEL_BATCH:
+            results = _evaluate_chunk(expressions)
+        else:
+            chunk_size = chunk_size or -(-len(expressions) // (workers * 4))
+            chunks = [expressions[i:i + chunk_size] for i in range(0, len(expressions), chunk_size)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = [result for chunk in pool.map(_evaluate_chunk, chunks) for result in chunk]
+        
+        if self._recording:
+            self.history.extend(
+                (EVALUATE, expression, None, result)
+                for expression, result in zip(expressions, results)
+                if not isinstance(result, Exception)
+            )
+        return results
+    
     # Memory Operations
     
     def memory_store(self, value: Number) -> None:
@@ -132,14 +426,15 @@ class Calculator:
     
     # History
     
-    def _record(self, operation: str) -> None:
-        """Record operation in history."""
-        self.history.append(operation)
+    def _record(self, op: str, a, b, result: Number) -> None:
+        """Record operation in history; it is formatted only when read."""
+        if self._recording:
+            self.history.append((op, a, b, result))
     
     def get_history(self) -> list:
-        """Get calculation history."""
-        return self.history.copy()
+        """Get calculation history, oldest first."""
+        return [_format_entry(entry) for entry in self.history]
     
     def clear_history(self) -> None:
         """Clear calculation history."""
-        self.history = []
+        self.history.clear()
@@ -1,123 +1,664 @@
 """
 Expression parser and evaluator.
+
+Expressions are parsed into a small AST, compiled once into a Python
+function and cached by source text, so evaluating the same formula again
+costs a dictionary lookup and a call. Expressions may name variables, and
+the same tree can be compiled for NumPy arrays to evaluate a formula over
+many rows in one pass.
+
+Before compiling, the tree is optimized: constant subexpressions are
+folded, repeated subexpressions are computed once, and identities such as
+x * 1 are removed.
 """
+import keyword
+import math
 import re
-from typing import List, Union
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple, Union
 
 Number = Union[int, float]
 
+CACHE_SIZE = 1024
+
+# Compiled code nests at most this deep before spilling into a temporary
+MAX_INLINE_DEPTH = 32
+
+# Prepended to variable names in generated code; the tokenizer only accepts
+# names starting with a letter, so prefixed names never clash with
+# ZeroDivisionError, ValueError or the _t temporaries
+VARIABLE_PREFIX = "_v_"
+
+TOKEN_RE = re.compile(
+    r"\s*(?:(\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)|([A-Za-z][A-Za-z0-9_]*)|(\S))"
+)
+
+# Current implementation gives every binary operator the same precedence,
+# so expressions evaluate left to right
+BINARY_PRECEDENCE = {"+": 1, "-": 1, "*": 1, "/": 1}  # Should be 2 for * and /
+UNARY_PRECEDENCE = 3
+
+
+# AST
+
+@dataclass(frozen=True)
+class Num:
+    """Numeric literal."""
+    value: float
+
+
+@dataclass(frozen=True)
+class Var:
+    """Named variable."""
+    name: str
+
 
-def evaluate_expression(expression: str) -> Number:
+@dataclass(frozen=True)
+class UnaryOp:
+    """Unary plus or minus."""
+    op: str
+    operand: "Node"
+
+
+@dataclass(frozen=True)
+class BinOp:
+    """Binary arithmetic operation."""
+    op: str
+    left: "Node"
+    right: "Node"
+
+
+Node = Union[Num, Var, UnaryOp, BinOp]
+
+
+def tokenize(expression: str) -> List[str]:
     """
-    Evaluate a mathematical expression string.
+    Tokenize a mathematical expression.
+    
+    Args:
+        expression: Expression string
+    
+    Returns:
+        List of tokens (numbers, names, operators and parentheses)
+    
+    Raises:
+        ValueError: If the expression contains an invalid character or
+            uses a Python keyword as a variable name
+    """
+    tokens = []
+    for match in TOKEN_RE.finditer(expression):
+        number, name, symbol = match.groups()
+        if number is not None:
+            tokens.append(number)
+        elif name is not None:
+            if keyword.iskeyword(name):
+                raise ValueError(f"Invalid variable name: {name}")
+            tokens.append(name)
+        elif symbol in BINARY_PRECEDENCE or symbol in "()":
+            tokens.append(symbol)
+        elif symbol is not None:
+            raise ValueError(f"Invalid character: {symbol}")
+    return tokens
+
+
+def parse(expression: str) -> Node:
+    """
+    Parse an expression into an AST.
     
-    Supports: +, -, *, /, parentheses
+    Uses operator-precedence (shunting-yard) parsing with the levels in
+    BINARY_PRECEDENCE: operators of equal precedence group left to right,
+    and a leading + or - is unary. Parsing is iterative, so nesting depth
+    is not limited by the recursion limit.
     
     Args:
         expression: Mathematical expression string
-        
+    
     Returns:
-        Result of evaluation
-        
-    Example:
-        >>> evaluate_expression("2 + 3 * 4")
-        14
-        >>> evaluate_expression("(2 + 3) * 4")
-        20
+        Root node of the parsed expression
+    
+    Raises:
+        ValueError: If the expression is empty or malformed
     """
-    # Remove whitespace
-    expression = expression.replace(" ", "")
+    tokens = tokenize(expression)
+    if not tokens:
+        raise ValueError("Empty expression")
+    
+    operands: List[Node] = []
+    operators: List[Tuple[str, int]] = []  # (operator, arity) or ("(", 0)
     
-    # Handle parentheses first (recursive)
-    while "(" in expression:
-        # Find innermost parentheses
-        match = re.search(r'\(([^()]+)\)', expression)
-        if match:
-            inner = match.group(1)
-            inner_result = evaluate_simple(inner)
-            expression = expression[:match.start()] + str(inner_result) + expression[match.end():]
+    def reduce() -> None:
+        op, arity = operators.pop()
+        if arity == 1:
+            operands.append(UnaryOp(op, operands.pop()))
+        else:
+            right = operands.pop()
+            operands.append(BinOp(op, operands.pop(), right))
+    
+    expect_operand = True
+    for token in tokens:
+        if expect_operand:
+            if token == "(":
+                operators.append(("(", 0))
+            elif token in ("+", "-"):
+                operators.append((token, 1))
+            elif token in BINARY_PRECEDENCE or token == ")":
+                raise ValueError(f"Unexpected '{token}' in expression")
+            elif token[0].isalpha():
+                operands.append(Var(token))
+                expect_operand = False
+            else:
+                operands.append(Num(float(token)))
+                expect_operand = False
+        elif token == ")":
+            while operators and operators[-1][0] != "(":
+                reduce()
+            if not operators:
+                raise ValueError("Unbalanced parentheses")
+            operators.pop()
+        elif token in BINARY_PRECEDENCE:
+            precedence = BINARY_PRECEDENCE[token]
+            while operators and operators[-1][0] != "(" and _precedence(operators[-1]) >= precedence:
+                reduce()
+            operators.append((token, 2))
+            expect_operand = True
+        else:
+            raise ValueError(f"Unexpected '{token}' in expression")
     
-    return evaluate_simple(expression)
+    if expect_operand:
+        raise ValueError("Expression ends with an operator")
+    while operators:
+        if operators[-1][0] == "(":
+            raise ValueError("Unbalanced parentheses")
+        reduce()
+    return operands[0]
 
 
-def evaluate_simple(expression: str) -> Number:
+def _precedence(entry: Tuple[str, int]) -> int:
+    op, arity = entry
+    return UNARY_PRECEDENCE if arity == 1 else BINARY_PRECEDENCE[op]
+
+
+def evaluate_tree(tree: Node, **variables: Number) -> Number:
     """
-    Evaluate a simple expression without parentheses.
+    Evaluate a parsed expression without compiling it.
     
-    Evaluates left-to-right instead of respecting * / before + -
+    Cheaper than compile_expression for an expression evaluated once.
     
     Args:
-        expression: Simple expression string
-        
+        tree: Parsed expression
+        **variables: Values for the variables named in the expression
+    
     Returns:
         Result of evaluation
+    
+    Raises:
+        ValueError: If the expression divides by zero or a variable has no value
     """
-    # Tokenize
-    tokens = tokenize(expression)
+    values: List[float] = []
+    stack = [(tree, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if isinstance(node, Num):
+            values.append(node.value)
+        elif isinstance(node, Var):
+            if node.name not in variables:
+                raise ValueError(f"Missing value for variable: {node.name}")
+            values.append(variables[node.name])
+        elif not expanded:
+            stack.append((node, True))
+            if isinstance(node, BinOp):
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+            else:
+                stack.append((node.operand, False))
+        elif isinstance(node, UnaryOp):
+            if node.op == "-":
+                values[-1] = -values[-1]
+        else:
+            right = values.pop()
+            left = values.pop()
+            if node.op == "+":
+                values.append(left + right)
+            elif node.op == "-":
+                values.append(left - right)
+            elif node.op == "*":
+                values.append(left * right)
+            elif right == 0:
+                raise ValueError("Division by zero")
+            else:
+                values.append(left / right)
+    return _as_number(values[0])
+
+
+# Optimization
+
+def count_nodes(tree: Node, distinct: bool = False) -> int:
+    """
+    Count the nodes of an expression.
     
-    if not tokens:
-        raise ValueError("Empty expression")
+    Args:
+        tree: Expression tree
+        distinct: Count a subexpression shared by several parents once
+        
+    Returns:
+        Number of nodes
+    """
+    seen = set()
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if distinct:
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+        count += 1
+        if isinstance(node, BinOp):
+            stack.append(node.left)
+            stack.append(node.right)
+        elif isinstance(node, UnaryOp):
+            stack.append(node.operand)
+    return count
+
+
+@dataclass
+class Optimization:
+    """An optimized expression and its size before and after."""
+    tree: Node
+    nodes_before: int
+    nodes_after: int
+    
+    @property
+    def nodes_saved(self) -> int:
+        """Nodes no longer evaluated."""
+        return self.nodes_before - self.nodes_after
+
+
+def optimize_tree(tree: Node) -> Optimization:
+    """
+    Fold constants, share common subexpressions and remove identities.
+    
+    The result is a DAG: equal subexpressions (including a + b and b + a)
+    become one node, which generate_code evaluates once. Only rewrites that
+    are exact for every float, including infinities and NaN, are applied:
+    
+    - operations on constants are computed, except division by zero,
+      which is left to raise (or give NaN) at evaluation time
+    - x - 0 (for +0 only), x * 1, 1 * x, x / 1 and +x become x
+    - -(-x) becomes x, a + (-b) becomes a - b, a - (-b) becomes a + b,
+      and (-a) * (-b), (-a) / (-b) drop both signs
     
-    result = float(tokens[0])
-    i = 1
+    x + 0 and 0 - x are kept as written: for x = -0.0 they give 0.0, where
+    x and -x would give -0.0.
+      
+    Rewrites never drop a variable, so compiled functions take the same
+    arguments. Integers beyond 2 ** 53, which arithmetic with a float
+    literal would round, may come through exact.
     
-    while i < len(tokens):
-        operator = tokens[i]
-        operand = float(tokens[i + 1])
+    Args:
+        tree: Parsed expression
         
-        if operator == '+':
-            result = result + operand
-        elif operator == '-':
-            result = result - operand
-        elif operator == '*':
-            result = result * operand
-        elif operator == '/':
-            if operand == 0:
-                raise ValueError("Division by zero")
-            result = result / operand
+    Returns:
+        Optimization with the new tree and node counts
+    """
+    interned: Dict[tuple, Node] = {}
+    done: Dict[int, Node] = {}  # id(original node) -> optimized node
+    
+    stack = [(tree, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in done:
+            continue
+        if isinstance(node, Num):
+            done[id(node)] = interned.setdefault(("num", repr(node.value)), node)
+        elif isinstance(node, Var):
+            done[id(node)] = interned.setdefault(("var", node.name), node)
+        elif not expanded:
+            stack.append((node, True))
+            if isinstance(node, BinOp):
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+            else:
+                stack.append((node.operand, False))
+        elif isinstance(node, UnaryOp):
+            done[id(node)] = _simplify_unary(node.op, done[id(node.operand)], interned)
         else:
-            raise ValueError(f"Unknown operator: {operator}")
-        
-        i += 2
+            done[id(node)] = _simplify_binary(node.op, done[id(node.left)], done[id(node.right)], interned)
     
-    # Return int if whole number
-    if result == int(result):
-        return int(result)
-    return result
+    optimized = done[id(tree)]
+    return Optimization(optimized, count_nodes(tree), count_nodes(optimized, distinct=True))
 
 
-def tokenize(expression: str) -> List[str]:
+def _is_constant(node: Node, value: float) -> bool:
+    return isinstance(node, Num) and node.value == value
+
+
+def _is_positive_zero(node: Node) -> bool:
+    """True for a +0.0 constant; x - (-0.0) is x + 0.0, which is not x."""
+    return _is_constant(node, 0) and math.copysign(1, node.value) > 0
+
+
+def _is_negation(node: Node) -> bool:
+    return isinstance(node, UnaryOp) and node.op == "-"
+
+
+def _simplify_unary(op: str, operand: Node, interned: Dict[tuple, Node]) -> Node:
+    """Optimized node for ``op operand`` whose operand is already optimized."""
+    if op == "+":
+        return operand
+    if isinstance(operand, Num):
+        return interned.setdefault(("num", repr(-operand.value)), Num(-operand.value))
+    if _is_negation(operand):
+        return operand.operand
+    return interned.setdefault(("unary", op, id(operand)), UnaryOp(op, operand))
+
+
+def _simplify_binary(op: str, left: Node, right: Node, interned: Dict[tuple, Node]) -> Node:
+    """Optimized node for ``left op right`` whose operands are already optimized."""
+    if isinstance(left, Num) and isinstance(right, Num) and not (op == "/" and right.value == 0):
+        value = _apply(op, left.value, right.value)
+        return interned.setdefault(("num", repr(value)), Num(value))
+    
+    if op == "+":
+        if _is_negation(right):
+            return _simplify_binary("-", left, right.operand, interned)
+    elif op == "-":
+        if _is_positive_zero(right):
+            return left
+        if _is_negation(right):
+            return _simplify_binary("+", left, right.operand, interned)
+    elif op == "*":
+        if _is_constant(right, 1):
+            return left
+        if _is_constant(left, 1):
+            return right
+    elif _is_constant(right, 1):
+        return left
+    if op in "*/" and _is_negation(left) and _is_negation(right):
+        return _simplify_binary(op, left.operand, right.operand, interned)
+    
+    if op in "+*":
+        # Commutative, and exactly so in floating point
+        key = ("binary", op, min(id(left), id(right)), max(id(left), id(right)))
+    else:
+        key = ("binary", op, id(left), id(right))
+    return interned.setdefault(key, BinOp(op, left, right))
+
+
+def _apply(op: str, left: float, right: float) -> float:
+    if op == "+":
+        return left + right
+    if op == "-":
+        return left - right
+    if op == "*":
+        return left * right
+    return left / right
+
+
+# Compilation
+
+def free_variables(tree: Node) -> Tuple[str, ...]:
+    """Return the sorted names of the variables used in ``tree``."""
+    names = set()
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Var):
+            names.add(node.name)
+        elif isinstance(node, BinOp):
+            stack.append(node.left)
+            stack.append(node.right)
+        elif isinstance(node, UnaryOp):
+            stack.append(node.operand)
+    return tuple(sorted(names))
+
+
+@dataclass
+class CompiledExpression:
+    """An expression compiled to a Python function of its variables."""
+    source: str
+    tree: Node
+    code: str
+    variables: Tuple[str, ...]
+    function: Callable[..., Number]
+    nodes_saved: int = 0
+    
+    def __call__(self, **values) -> Number:
+        try:
+            arguments = [values[name] for name in self.variables]
+        except KeyError:
+            self._bind(values)  # raises ValueError naming the missing variables
+            raise
+        return self.function(*arguments)
+    
+    def _bind(self, values: Dict[str, object]) -> Dict[str, object]:
+        """Select this expression's variables from ``values``."""
+        missing = [name for name in self.variables if name not in values]
+        if missing:
+            raise ValueError(f"Missing value for variable: {', '.join(missing)}")
+        return {name: values[name] for name in self.variables}
+
+
+def _as_number(value: float) -> Number:
+    """Return whole floats as int, as the calculator displays them."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _literal(value: float) -> str:
+    """Python source for a float constant."""
+    if math.isnan(value):
+        return "_nan"
+    if math.isinf(value):
+        return "_inf" if value > 0 else "(-_inf)"
+    return repr(value) if value >= 0 else f"({value!r})"
+
+
+def _divide_arrays(a, b):
+    """Elementwise a / b with NaN wherever b is zero."""
+    import numpy as np
+    
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    out = np.full(np.broadcast_shapes(a.shape, b.shape), np.nan)
+    return np.true_divide(a, b, out=out, where=b != 0)
+
+
+def generate_code(tree: Node, name: str = "compiled", vectorized: bool = False) -> str:
     """
-    Tokenize a mathematical expression.
+    Generate Python source for a function evaluating ``tree``.
+    
+    Subexpressions are inlined until they nest MAX_INLINE_DEPTH deep and
+    then assigned to temporaries, which keeps the generated code within the
+    Python compiler's nesting limits for any input. The tree is walked with
+    an explicit stack for the same reason. A node with several parents (see
+    optimize_tree) is assigned to a temporary and computed once.
     
     Args:
-        expression: Expression string
-        
+        tree: Parsed expression, or a DAG from optimize_tree
+        name: Name of the generated function
+        vectorized: Generate code for NumPy arrays, where division by zero
+            yields NaN for the affected elements instead of raising
+    
     Returns:
-        List of tokens (numbers and operators)
+        Source of a function taking the expression's variables as positional
+        arguments in free_variables order, each renamed with VARIABLE_PREFIX
+        so a variable cannot shadow a name the generated code uses
     """
-    tokens = []
-    current_number = ""
-    
-    for char in expression:
-        if char.isdigit() or char == '.':
-            current_number += char
-        elif char in "+-*/":
-            if current_number:
-                tokens.append(current_number)
-                current_number = ""
-            elif char == '-' and (not tokens or tokens[-1] in "+-*/"):
-                # Handle negative numbers
-                current_number = '-'
-                continue
-            tokens.append(char)
+    lines: List[str] = []
+    rendered: Dict[int, Tuple[str, int]] = {}  # id(node) -> (text, depth)
+    shared = _shared_nodes(tree)
+    
+    def spill(node: Node, text: str, depth: int) -> Tuple[str, int]:
+        if depth < MAX_INLINE_DEPTH and id(node) not in shared:
+            return text, depth
+        temp = f"_t{len(lines)}"
+        lines.append(f"{temp} = {text}")
+        return temp, 0
+    
+    stack = [(tree, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in rendered:
+            continue
+        if isinstance(node, Num):
+            rendered[id(node)] = (_literal(node.value), 0)
+        elif isinstance(node, Var):
+            rendered[id(node)] = (VARIABLE_PREFIX + node.name, 0)
+        elif not expanded:
+            stack.append((node, True))
+            if isinstance(node, BinOp):
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+            else:
+                stack.append((node.operand, False))
+        elif isinstance(node, BinOp):
+            left, left_depth = rendered[id(node.left)]
+            right, right_depth = rendered[id(node.right)]
+            depth = max(left_depth, right_depth) + 1
+            if vectorized and node.op == "/":
+                rendered[id(node)] = spill(node, f"_divide({left}, {right})", depth)
+            else:
+                rendered[id(node)] = spill(node, f"({left} {node.op} {right})", depth)
         else:
-            raise ValueError(f"Invalid character: {char}")
+            operand, depth = rendered[id(node.operand)]
+            rendered[id(node)] = spill(node, f"({node.op}{operand})", depth + 1)
     
-    if current_number:
-        tokens.append(current_number)
+    parameters = [VARIABLE_PREFIX + variable for variable in free_variables(tree)]
+    signature = f"def {name}({', '.join(parameters)}):"
+    result = rendered[id(tree)][0]
+    if vectorized:
+        body = [f"    {line}" for line in lines]
+        return "\n".join([signature, *body, f"    return {result}"])
     
-    return tokens
+    body = [f"        {line}" for line in lines]
+    body.append(f"        return _as_number({result})")
+    return "\n".join([
+        signature,
+        "    try:",
+        *body,
+        "    except ZeroDivisionError:",
+        "        raise ValueError(\"Division by zero\") from None",
+    ])
+
+
+def _shared_nodes(tree: Node) -> set:
+    """Ids of the operation nodes that have more than one parent."""
+    parents: Dict[int, int] = {}
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, BinOp):
+            children = (node.left, node.right)
+        elif isinstance(node, UnaryOp):
+            children = (node.operand,)
+        else:
+            continue
+        for child in children:
+            seen = parents.get(id(child), 0)
+            parents[id(child)] = seen + 1
+            if not seen:
+                stack.append(child)
+    return {key for key, count in parents.items() if count > 1}
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(expression: str, vectorized: bool = False, optimize: bool = True) -> CompiledExpression:
+    """
+    Parse and compile an expression, caching the result by source text.
+    
+    The cache is a bounded LRU; ``compile_expression.cache_info()`` and
+    ``compile_expression.cache_clear()`` inspect and reset it.
+    
+    Args:
+        expression: Mathematical expression string
+        vectorized: Compile for NumPy arrays (see generate_code)
+        optimize: Optimize the tree first (see optimize_tree)
+    
+    Returns:
+        Callable taking the expression's variables as keyword arguments
+    
+    Raises:
+        ValueError: If the expression is malformed
+    """
+    tree = parse(expression)
+    saved = 0
+    if optimize:
+        optimization = optimize_tree(tree)
+        tree, saved = optimization.tree, optimization.nodes_saved
+    code = generate_code(tree, vectorized=vectorized)
+    namespace = {"_as_number": _as_number, "_divide": _divide_arrays, "_inf": math.inf, "_nan": math.nan}
+    exec(compile(code, "<expression>", "exec"), namespace)
+    return CompiledExpression(expression, tree, code, free_variables(tree), namespace["compiled"], saved)
+
+
+def evaluate_expression(expression: str, **variables: Number) -> Number:
+    """
+    Evaluate a mathematical expression string.
+    
+    Supports: +, -, *, /, unary minus, parentheses and named variables
+    
+    Args:
+        expression: Mathematical expression string
+        **variables: Values for the variables named in the expression
+    
+    Returns:
+        Result of evaluation
+    
+    Raises:
+        ValueError: If the expression is malformed, divides by zero or
+            uses a variable without a value
+    
+    Example:
+        >>> evaluate_expression("2 + 3 * 4")
+        14
+        >>> evaluate_expression("(x + 3) * 4", x=2)
+        20
+    """
+    return compile_expression(expression)(**variables)
+
+
+def evaluate_vectorized(expression: str, **arrays):
+    """
+    Evaluate an expression over NumPy arrays in one pass.
+    
+    The expression is compiled once (and cached) into array operations;
+    arrays broadcast against each other and against scalars. Elements
+    whose evaluation divides by zero come out as NaN rather than raising.
+    
+    Args:
+        expression: Mathematical expression string
+        **arrays: Arrays (or scalars) for the variables in the expression
+    
+    Returns:
+        float64 array of results, shaped like the broadcast inputs
+    
+    Raises:
+        ValueError: If the expression is malformed or a variable is missing
+    """
+    import numpy as np
+    
+    compiled = compile_expression(expression, vectorized=True)
+    values = {name: np.asarray(value, dtype=float) for name, value in compiled._bind(arrays).items()}
+    shape = np.broadcast_shapes(*(value.shape for value in values.values())) if values else ()
+    result = compiled.function(*values.values())
+    return np.broadcast_to(np.asarray(result, dtype=float), shape).copy()
+
+
+def evaluate_simple(expression: str) -> Number:
+    """
+    Evaluate an expression without parentheses.
+    
+    Kept for callers of the old API; it is the same as evaluate_expression.
+    
+    Args:
+        expression: Simple expression string
+    
+    Returns:
+        Result of evaluation
+    """
+    return evaluate_expression(expression)
 
 
 def validate_expression(expression: str) -> bool:
@@ -126,27 +667,12 @@ def validate_expression(expression: str) -> bool:
     
     Args:
         expression: Expression to validate
-        
+    
     Returns:
         True if valid, False otherwise
     """
-    # Check balanced parentheses
-    depth = 0
-    for char in expression:
-        if char == '(':
-            depth += 1
-        elif char == ')':
-            depth -= 1
-            if depth < 0:
-                return False
-    
-    if depth != 0:
+    try:
+        compile_expression(expression)
+    except ValueError:
         return False
-    
-    # Check for valid characters
-    valid_chars = set("0123456789+-*/().() ")
-    for char in expression:
-        if char not in valid_chars:
-            return False
-    
     return True
@@ -0,0 +1,266 @@
+"""
+Histograms: fixed-width, quantile and custom-edge binning.
+
+Values are binned by bisection over the edges, one vectorized
+``np.searchsorted`` call per batch when NumPy is installed (and for lists
+from HISTOGRAM_LIST_THRESHOLD values), ``bisect`` per value otherwise.
+Histograms with the same edges merge by adding counts, so chunks binned
+separately, in other processes or from other files, combine into the
+histogram of all of them.
+"""
+import math
+import numbers
+from bisect import bisect_right
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from statistics import _numpy, _vector
+from sketches import QuantileSketch
+
+# List lengths from which converting to NumPy beats bisecting per value
+HISTOGRAM_LIST_THRESHOLD = 100
+
+BINNINGS = ("fixed", "quantile")
+
+
+class Histogram:
+    """
+    Counts of values per bin.
+    
+    Bin i holds edges[i] <= x < edges[i + 1], and the last bin also holds
+    its upper edge, as in ``np.histogram``. Values below or above the edges
+    are counted in ``underflow`` and ``overflow``; NaN is not counted.
+    """
+    
+    def __init__(self, edges: Sequence[float]):
+        """
+        Initialize an empty histogram.
+        
+        Args:
+            edges: Strictly increasing bin edges, at least two
+        """
+        edges = [float(edge) for edge in edges]
+        if len(edges) < 2:
+            raise ValueError("A histogram needs at least two edges")
+        if any(not math.isfinite(edge) for edge in edges):
+            raise ValueError("Histogram edges must be finite")
+        if any(low >= high for low, high in zip(edges, edges[1:])):
+            raise ValueError("Histogram edges must be strictly increasing")
+        self.edges = edges
+        self.counts = [0] * (len(edges) - 1)
+        self.underflow = 0
+        self.overflow = 0
+    
+    @classmethod
+    def fixed_width(cls, low: float, high: float, bins: int) -> "Histogram":
+        """Empty histogram of ``bins`` equal-width bins spanning [low, high]."""
+        if bins < 1:
+            raise ValueError("Number of bins must be at least 1")
+        if not low < high:
+            raise ValueError("Histogram range must have low < high")
+        np = _numpy()
+        if np is not None:
+            # The edges np.histogram uses for range=(low, high)
+            return cls(np.linspace(low, high, bins + 1).tolist())
+        step = (high - low) / bins
+        return cls([low + i * step for i in range(bins)] + [high])
+    
+    @property
+    def bins(self) -> int:
+        """Number of bins."""
+        return len(self.counts)
+    
+    @property
+    def total(self) -> int:
+        """Number of values within the edges."""
+        return sum(self.counts)
+    
+    def update(self, values: Iterable[float]) -> "Histogram":
+        """
+        Bin values; returns self.
+        
+        Args:
+            values: Numbers (any iterable, ``array.array`` or NumPy array)
+        """
+        vector = _vector(values, HISTOGRAM_LIST_THRESHOLD)
+        if vector is not None:
+            self._update_numpy(vector)
+            return self
+        edges = self.edges
+        last = len(edges)
+        high = edges[-1]
+        counts = self.counts
+        for x in values:
+            index = bisect_right(edges, x)
+            if index == last:
+                if x == high:
+                    counts[-1] += 1
+                elif x == x:  # NaN bisects past the end too
+                    self.overflow += 1
+            elif index:
+                counts[index - 1] += 1
+            else:
+                self.underflow += 1
+        return self
+    
+    def _update_numpy(self, vector) -> None:
+        """Bin an array with one searchsorted and one bincount."""
+        np = _numpy()
+        vector = vector[~np.isnan(vector)] if vector.dtype.kind == "f" else vector
+        edges = np.asarray(self.edges)
+        # 0 is underflow, 1..bins the bins and bins + 1 overflow
+        index = np.searchsorted(edges, vector, side="right")
+        index[vector == edges[-1]] = self.bins
+        totals = np.bincount(index, minlength=self.bins + 2).tolist()
+        self.underflow += totals[0]
+        self.overflow += totals[-1]
+        self.counts = [count + new for count, new in zip(self.counts, totals[1:-1])]
+    
+    def merge(self, other: "Histogram") -> "Histogram":
+        """Fold another histogram with the same edges into this one; returns self."""
+        if other.edges != self.edges:
+            raise ValueError("Cannot merge histograms with different edges")
+        self.counts = [count + more for count, more in zip(self.counts, other.counts)]
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+    
+    # Results
+    
+    def widths(self) -> List[float]:
+        """Width of each bin."""
+        return [high - low for low, high in zip(self.edges, self.edges[1:])]
+    
+    def centers(self) -> List[float]:
+        """Midpoint of each bin."""
+        return [(low + high) / 2 for low, high in zip(self.edges, self.edges[1:])]
+    
+    def density(self) -> List[float]:
+        """Count per unit width, normalized to integrate to 1 over the edges."""
+        total = self.total
+        if total == 0:
+            raise ValueError("Cannot calculate density of empty histogram")
+        return [count / (total * width) for count, width in zip(self.counts, self.widths())]
+    
+    def modal_bins(self) -> List[Tuple[float, float]]:
+        """(low, high) edges of the most populated bin(s), in order."""
+        if self.total == 0:
+            raise ValueError("Cannot calculate mode of empty histogram")
+        top = max(self.counts)
+        return [
+            (self.edges[i], self.edges[i + 1]) for i, count in enumerate(self.counts) if count == top
+        ]
+    
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile of the binned values.
+        
+        Values are taken as spread evenly within each bin, so the error is
+        at most the width of the bin the quantile falls in.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        total = self.total
+        if total == 0:
+            raise ValueError("Cannot calculate quantile of empty histogram")
+        target = q * total
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count and cumulative + count >= target:
+                low, high = self.edges[i], self.edges[i + 1]
+                return low + (high - low) * max(target - cumulative, 0) / count
+            cumulative += count
+        return self.edges[-1]
+
+
+# Choosing edges
+
+def _span(low: float, high: float) -> Tuple[float, float]:
+    """Widen an empty range by 0.5 either side, as np.histogram does."""
+    return (low - 0.5, high + 0.5) if low == high else (low, high)
+
+
+def quantile_edges(values, bins: int) -> List[float]:
+    """
+    Edges splitting values into ``bins`` bins of about equal count.
+    
+    Edge i is the value of rank floor(i * (n - 1) / bins). Repeated values
+    can make neighbouring edges equal; those collapse, so heavily tied data
+    gets fewer (unequal) bins.
+    
+    Args:
+        values: Numbers, or a QuantileSketch of them (edges then carry the
+            sketch's rank error)
+        bins: Bins wanted
+        
+    Returns:
+        Strictly increasing edges
+    """
+    if bins < 1:
+        raise ValueError("Number of bins must be at least 1")
+    if isinstance(values, QuantileSketch):
+        edges = values.quantiles([i / bins for i in range(bins + 1)])
+    else:
+        vector = _vector(values, HISTOGRAM_LIST_THRESHOLD)
+        if vector is not None:
+            vector = vector[~_numpy().isnan(vector)] if vector.dtype.kind == "f" else vector
+            n = vector.size
+            ranks = sorted({(n - 1) * i // bins for i in range(bins + 1)}) if n else []
+            edges = _numpy().partition(vector, ranks)[ranks].tolist()
+        else:
+            ordered = sorted(x for x in values if x == x)
+            n = len(ordered)
+            edges = [ordered[(n - 1) * i // bins] for i in range(bins + 1)] if n else []
+    if not edges:
+        raise ValueError("Cannot bin an empty list")
+    edges = sorted(set(float(edge) for edge in edges))
+    if len(edges) == 1:
+        return list(_span(edges[0], edges[0]))
+    return edges
+
+
+def histogram(
+    values,
+    bins=10,
+    binning: str = "fixed",
+    limits: Optional[Tuple[float, float]] = None,
+) -> Histogram:
+    """
+    Bin values into a histogram.
+    
+    Args:
+        values: Numbers (list, iterable, ``array.array`` or NumPy array)
+        bins: Number of bins, or a sequence of custom edges
+        binning: "fixed" for equal widths or "quantile" for equal counts
+            (ignored with custom edges)
+        limits: (low, high) for fixed-width bins (default: the data's range);
+            values outside are counted as underflow and overflow
+            
+    Returns:
+        Histogram of the values
+    """
+    if binning not in BINNINGS:
+        raise ValueError(f"Unknown binning: {binning}")
+    if not isinstance(bins, numbers.Integral):  # np.int64 and friends count too
+        return Histogram(bins).update(values)
+    bins = int(bins)
+    # Convert once; edges and binning both read the values
+    vector = _vector(values, HISTOGRAM_LIST_THRESHOLD)
+    if vector is not None:
+        values = vector
+    elif not isinstance(values, (list, tuple)):
+        values = list(values)
+    if binning == "quantile":
+        return Histogram(quantile_edges(values, bins)).update(values)
+    if limits is None:
+        if vector is not None:
+            np = _numpy()
+            if vector.size == 0 or np.isnan(vector).all():
+                raise ValueError("Cannot bin an empty list")
+            limits = (float(np.nanmin(vector)), float(np.nanmax(vector)))
+        else:
+            present = [x for x in values if x == x]
+            if not present:
+                raise ValueError("Cannot bin an empty list")
+            limits = (min(present), max(present))
+        limits = _span(*limits)
+    return Histogram.fixed_width(limits[0], limits[1], bins).update(values)
@@ -0,0 +1,228 @@
+"""
+Parallel statistics over chunked input with mergeable partial aggregates.
+
+Each chunk is reduced to a PartialStats (count, sum, sum of squared
+deviations, range and optionally a frequency table and quantile sketch) in a
+worker process. Partials merge exactly (Chan et al. for the squared
+deviations), so the combined result does not depend on how the input was
+split.
+"""
+import math
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from sketches import QuantileSketch
+
+# Bytes of a text file given to each task
+CHUNK_BYTES = 16 * 1024 * 1024
+
+
+@dataclass
+class PartialStats:
+    """Mergeable summary of part (or all) of a dataset."""
+    count: int = 0
+    total: float = 0.0
+    m2: float = 0.0  # Sum of squared deviations from this part's mean
+    minimum: float = math.inf
+    maximum: float = -math.inf
+    frequencies: Optional[Dict[float, int]] = None
+    sketch: Optional[QuantileSketch] = None
+    
+    @classmethod
+    def from_values(
+        cls,
+        values: Sequence[float],
+        frequencies: bool = False,
+        epsilon: Optional[float] = None,
+    ) -> "PartialStats":
+        """
+        Summarize one chunk of values.
+        
+        Args:
+            values: Numbers (list, array.array or NumPy array)
+            frequencies: Keep a value -> count table for modes
+            epsilon: Keep a quantile sketch with this rank error
+            
+        Returns:
+            PartialStats of the chunk
+        """
+        partial = cls(
+            frequencies=Counter() if frequencies else None,
+            sketch=QuantileSketch(epsilon) if epsilon else None,
+        )
+        if len(values) == 0:
+            return partial
+        
+        if type(values).__module__ == "numpy":
+            partial.count = int(values.size)
+            partial.total = float(values.sum(dtype=float))
+            deviations = values - partial.total / partial.count
+            partial.m2 = float(deviations @ deviations)
+            partial.minimum = float(values.min())
+            partial.maximum = float(values.max())
+            if frequencies or epsilon:
+                values = values.tolist()
+        else:
+            partial.count = len(values)
+            partial.total = math.fsum(values)
+            mean = partial.total / partial.count
+            partial.m2 = math.fsum((x - mean) ** 2 for x in values)
+            partial.minimum = min(values)
+            partial.maximum = max(values)
+        
+        if partial.frequencies is not None:
+            partial.frequencies.update(values)
+        if partial.sketch is not None:
+            partial.sketch.update(values)
+        return partial
+    
+    def merge(self, other: "PartialStats") -> "PartialStats":
+        """Fold another partial into this one; returns self."""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.m2 = other.m2
+        else:
+            n = self.count + other.count
+            delta = other.total / other.count - self.total / self.count
+            self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.count += other.count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        if self.frequencies is not None and other.frequencies is not None:
+            self.frequencies.update(other.frequencies)
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        return self
+    
+    # Results
+    
+    @property
+    def mean(self) -> float:
+        """Arithmetic mean."""
+        if self.count == 0:
+            raise ValueError("Cannot calculate mean of empty list")
+        return self.total / self.count
+    
+    def variance(self, population: bool = True) -> float:
+        """Population (n) or sample (n - 1) variance."""
+        if self.count == 0:
+            raise ValueError("Cannot calculate variance of empty list")
+        if not population and self.count < 2:
+            raise ValueError("Sample variance needs at least two values")
+        return self.m2 / (self.count if population else self.count - 1)
+    
+    def std_dev(self, population: bool = True) -> float:
+        """Population or sample standard deviation."""
+        return math.sqrt(self.variance(population))
+    
+    @property
+    def modes(self) -> List[float]:
+        """Most frequent value(s), sorted; requires ``frequencies``."""
+        if self.frequencies is None:
+            raise ValueError("Frequencies were not collected")
+        if not self.frequencies:
+            raise ValueError("Cannot calculate mode of empty list")
+        top = max(self.frequencies.values())
+        return sorted(value for value, seen in self.frequencies.items() if seen == top)
+    
+    def quantile(self, q: float) -> float:
+        """Approximate quantile; requires ``sketch``."""
+        if self.sketch is None:
+            raise ValueError("Quantile sketch was not collected")
+        return self.sketch.quantile(q)
+
+
+# Tasks (module level so worker processes can unpickle them)
+
+def parse_numbers(data: bytes) -> List[float]:
+    """Parse numbers separated by whitespace and/or commas."""
+    return [float(token) for token in data.replace(b",", b" ").split()]
+
+
+def read_range(path: str, start: int, end: int) -> List[float]:
+    """
+    Read the numbers on the lines that start within [start, end).
+    
+    A line straddling ``start`` belongs to the previous range and one
+    straddling ``end`` to this one, so adjacent ranges cover every line once.
+    """
+    with open(path, "rb") as f:
+        if start:
+            f.seek(start - 1)
+            if f.read(1) != b"\n":
+                f.readline()
+        begin = f.tell()
+        if begin >= end:
+            return []
+        data = f.read(end - begin)
+        if not data.endswith(b"\n"):
+            data += f.readline()
+    return parse_numbers(data)
+
+
+def _summarize_task(task: Tuple, frequencies: bool, epsilon: Optional[float]) -> PartialStats:
+    if task[0] == "range":
+        values = read_range(*task[1:])
+    else:
+        values = task[1]
+    return PartialStats.from_values(values, frequencies, epsilon)
+
+
+def file_ranges(path: str, chunk_bytes: int = CHUNK_BYTES) -> List[Tuple[str, int, int]]:
+    """Split a file into byte ranges of about ``chunk_bytes``."""
+    size = os.path.getsize(path)
+    return [(path, start, min(start + chunk_bytes, size)) for start in range(0, size, chunk_bytes)]
+
+
+def summarize(
+    source: Union[str, os.PathLike, Iterable[Sequence[float]]],
+    workers: Optional[int] = None,
+    frequencies: bool = False,
+    epsilon: Optional[float] = None,
+    chunk_bytes: int = CHUNK_BYTES,
+) -> PartialStats:
+    """
+    Summarize a dataset in parallel.
+    
+    Args:
+        source: Path of a text file of numbers (whitespace/comma separated),
+            or an iterable of chunks, each a sequence of numbers
+        workers: Worker processes (default: CPU count); 1 runs in-process
+        frequencies: Collect a frequency table (for modes)
+        epsilon: Collect a quantile sketch with this rank error
+        chunk_bytes: Bytes of the file per task
+        
+    Returns:
+        Merged PartialStats of the whole dataset
+    """
+    if isinstance(source, (str, os.PathLike)):
+        tasks = (("range",) + r for r in file_ranges(os.fspath(source), chunk_bytes))
+    else:
+        tasks = (("values", chunk) for chunk in source)
+    workers = workers or os.cpu_count() or 1
+    
+    merged = PartialStats(
+        frequencies=Counter() if frequencies else None,
+        sketch=QuantileSketch(epsilon) if epsilon else None,
+    )
+    if workers == 1:
+        for task in tasks:
+            merged.merge(_summarize_task(task, frequencies, epsilon))
+        return merged
+    
+    # Keep a bounded number of chunks in flight so a long iterable of chunks
+    # is never materialized; merge in input order for reproducible rounding
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for task in tasks:
+            pending.append(pool.submit(_summarize_task, task, frequencies, epsilon))
+            if len(pending) >= 2 * workers:
+                merged.merge(pending.pop(0).result())
+        for future in pending:
+            merged.merge(future.result())
+    return merged
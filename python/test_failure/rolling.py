@@ -0,0 +1,355 @@
+"""
+Sliding-window statistics for time series.
+
+Each accumulator holds the last ``window`` values and updates its
+statistic as one value enters and the oldest leaves, instead of
+recomputing it over every window slice.
+"""
+import math
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Callable, Deque, Iterable, List, Tuple
+
+# SortedWindow buckets split when they grow past twice this many values
+BUCKET_SIZE = 512
+
+# A slide that shrinks the squared deviations by more than this factor has
+# cancelled most of their digits; they are then recomputed exactly
+CANCELLATION = 1024
+
+
+class RollingStats:
+    """
+    Mean, variance and standard deviation of the last ``window`` values.
+    
+    Each slide updates the mean and the sum of squared deviations in O(1).
+    Removing values by subtraction accumulates rounding error, so both are
+    recomputed exactly from the window each time it has fully turned over
+    (O(window) once per ``window`` slides, still O(1) amortized), and at
+    once when an outlier leaving the window cancels most of the sum.
+    """
+    
+    def __init__(self, window: int):
+        """
+        Initialize accumulator.
+        
+        Args:
+            window: Number of most recent values to summarize
+        """
+        if window < 1:
+            raise ValueError("Window must be at least 1")
+        self.window = window
+        self._values: Deque[float] = deque()
+        self._mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations from the mean
+        self._slides = 0  # Since the last exact recomputation
+    
+    def __len__(self) -> int:
+        return len(self._values)
+    
+    def add(self, value: float) -> None:
+        """Add a value, dropping the oldest once the window is full."""
+        values = self._values
+        if len(values) < self.window:
+            values.append(value)
+            delta = value - self._mean
+            self._mean += delta / len(values)
+            self._m2 += delta * (value - self._mean)
+            return
+        
+        oldest = values.popleft()
+        values.append(value)
+        previous, previous_m2 = self._mean, self._m2
+        self._mean += (value - oldest) / self.window
+        self._m2 += (value - oldest) * (value - self._mean + oldest - previous)
+        self._slides += 1
+        if self._slides >= self.window or self._m2 * CANCELLATION < previous_m2:
+            self._resync()
+    
+    def _resync(self) -> None:
+        """Recompute the mean and squared deviations from the window."""
+        self._mean = math.fsum(self._values) / len(self._values)
+        self._m2 = math.fsum((x - self._mean) ** 2 for x in self._values)
+        self._slides = 0
+    
+    @property
+    def mean(self) -> float:
+        """Mean of the values in the window."""
+        if not self._values:
+            raise ValueError("Cannot calculate mean of empty window")
+        return self._mean
+    
+    def variance(self, population: bool = True) -> float:
+        """
+        Variance of the values in the window.
+        
+        Args:
+            population: If True, divide by n; else by n - 1 (sample variance)
+            
+        Returns:
+            Variance
+        """
+        n = len(self._values)
+        if n == 0:
+            raise ValueError("Cannot calculate variance of empty window")
+        if not population and n < 2:
+            raise ValueError("Sample variance needs at least two values")
+        return max(self._m2, 0.0) / (n if population else n - 1)
+    
+    def std_dev(self, population: bool = True) -> float:
+        """Standard deviation of the values in the window (see variance)."""
+        return math.sqrt(self.variance(population))
+
+
+class SortedWindow:
+    """
+    Sorted multiset of numbers, indexable by rank.
+    
+    Values live in sorted buckets of up to 2 * BUCKET_SIZE. A value finds
+    its bucket by binary search over the bucket maxima, and a Fenwick tree
+    over the bucket lengths finds the bucket holding a rank, so add, remove
+    and indexing are O(log n) plus a short in-bucket shift, whatever the
+    size. (A single sorted list would shift half of its values on every
+    update.)
+    
+    NaN has no rank, so NaNs are only counted, in ``nans``; ``len``,
+    iteration and indexing cover the other values.
+    """
+    
+    def __init__(self, values: Iterable[float] = ()):
+        """
+        Initialize structure.
+        
+        Args:
+            values: Optional initial values
+        """
+        self._buckets: List[List[float]] = []
+        self._maxes: List[float] = []
+        self._tree: List[int] = [0]  # Fenwick tree of bucket lengths, 1-based
+        self._top = 0  # Highest power of two below len(self._tree)
+        self._len = 0
+        self.nans = 0
+        for value in values:
+            self.add(value)
+    
+    def __len__(self) -> int:
+        return self._len
+    
+    def __iter__(self):
+        for bucket in self._buckets:
+            yield from bucket
+    
+    def _rebuild(self) -> None:
+        """Rebuild the Fenwick tree after buckets split or disappear."""
+        tree = [0] + [len(bucket) for bucket in self._buckets]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._top = 1 << (len(tree) - 1).bit_length() - 1
+    
+    def _resize(self, index: int, delta: int) -> None:
+        """Adjust bucket ``index``'s length in the Fenwick tree."""
+        tree = self._tree
+        size = len(tree)
+        i = index + 1
+        while i < size:
+            tree[i] += delta
+            i += i & -i
+    
+    def add(self, value: float) -> None:
+        """Insert a value."""
+        if value != value:
+            self.nans += 1
+            return
+        self._len += 1
+        if not self._buckets:
+            self._buckets.append([value])
+            self._maxes.append(value)
+            self._rebuild()
+            return
+        index = min(bisect_left(self._maxes, value), len(self._buckets) - 1)
+        bucket = self._buckets[index]
+        insort(bucket, value)
+        self._maxes[index] = bucket[-1]
+        if len(bucket) > 2 * BUCKET_SIZE:
+            self._buckets[index:index + 1] = [bucket[:BUCKET_SIZE], bucket[BUCKET_SIZE:]]
+            self._maxes[index:index + 1] = [bucket[BUCKET_SIZE - 1], bucket[-1]]
+            self._rebuild()
+        else:
+            self._resize(index, 1)
+    
+    def remove(self, value: float) -> None:
+        """
+        Remove one occurrence of a value.
+        
+        Raises:
+            ValueError: If the value is not present
+        """
+        if value != value:
+            if not self.nans:
+                raise ValueError(f"Value not present: {value}")
+            self.nans -= 1
+            return
+        index = bisect_left(self._maxes, value)
+        bucket = self._buckets[index] if index < len(self._buckets) else []
+        position = bisect_left(bucket, value)
+        if position == len(bucket) or bucket[position] != value:
+            raise ValueError(f"Value not present: {value}")
+        del bucket[position]
+        self._len -= 1
+        if len(bucket) >= BUCKET_SIZE // 4 or len(self._buckets) == 1:
+            if bucket:
+                self._maxes[index] = bucket[-1]
+            self._resize(index, -1)
+            return
+        # Merge a small bucket into a neighbour, splitting again if too big
+        if index == len(self._buckets) - 1:
+            index -= 1
+        merged = self._buckets[index] + self._buckets[index + 1]
+        if len(merged) > 2 * BUCKET_SIZE:
+            half = len(merged) // 2
+            self._buckets[index:index + 2] = [merged[:half], merged[half:]]
+            self._maxes[index:index + 2] = [merged[half - 1], merged[-1]]
+        else:
+            self._buckets[index:index + 2] = [merged]
+            self._maxes[index:index + 2] = [merged[-1]]
+        self._rebuild()
+    
+    def __getitem__(self, rank: int) -> float:
+        """Value of the given rank (0 = smallest; negative counts from the end)."""
+        if rank < 0:
+            rank += self._len
+        if not 0 <= rank < self._len:
+            raise IndexError("Rank out of range")
+        index, offset = self._locate(rank)
+        return self._buckets[index][offset]
+    
+    def pair(self, rank: int) -> Tuple[float, float]:
+        """Values of ranks ``rank`` and ``rank + 1``, located together."""
+        if not 0 <= rank < self._len - 1:
+            raise IndexError("Rank out of range")
+        index, offset = self._locate(rank)
+        bucket = self._buckets[index]
+        if offset + 1 < len(bucket):
+            return bucket[offset], bucket[offset + 1]
+        return bucket[offset], self._buckets[index + 1][0]
+    
+    def _locate(self, rank: int) -> Tuple[int, int]:
+        """Index of the bucket holding a (valid, non-negative) rank, and the offset there."""
+        if len(self._buckets) == 1:
+            return 0, rank
+        # Descend the Fenwick tree to the last bucket starting at or before rank
+        tree = self._tree
+        size = len(tree)
+        index = 0
+        step = self._top
+        while step:
+            upper = index + step
+            if upper < size and tree[upper] <= rank:
+                index = upper
+                rank -= tree[upper]
+            step >>= 1
+        return index, rank
+
+
+class RollingMedian:
+    """
+    Median of the last ``window`` values.
+    
+    The window is also kept in a SortedWindow, so each slide is one remove
+    and one add, and the median is read by rank, all in O(log window).
+    While a NaN is in the window the median is NaN, as with numpy.median.
+    """
+    
+    def __init__(self, window: int):
+        """
+        Initialize accumulator.
+        
+        Args:
+            window: Number of most recent values to summarize
+        """
+        if window < 1:
+            raise ValueError("Window must be at least 1")
+        self.window = window
+        self._values: Deque[float] = deque()
+        self._sorted = SortedWindow()
+    
+    def __len__(self) -> int:
+        return len(self._values)
+    
+    def add(self, value: float) -> None:
+        """Add a value, dropping the oldest once the window is full."""
+        if len(self._values) == self.window:
+            self._sorted.remove(self._values.popleft())
+        self._values.append(value)
+        self._sorted.add(value)
+    
+    @property
+    def median(self) -> float:
+        """Median of the values in the window."""
+        n = len(self._values)
+        if n == 0:
+            raise ValueError("Cannot calculate median of empty window")
+        if self._sorted.nans:
+            return math.nan
+        mid = n // 2
+        if n % 2:
+            return self._sorted[mid]
+        low, high = self._sorted.pair(mid - 1)
+        return (low + high) / 2
+
+
+# One result per full window
+
+def _roll(values: Iterable[float], accumulator, statistic: Callable):
+    """
+    Feed values through an accumulator, collecting the statistic of each
+    full window. NumPy input gives a NumPy array back.
+    """
+    is_array = type(values).__module__ == "numpy"
+    if is_array:
+        if values.ndim != 1:
+            raise ValueError("Rolling statistics need a one-dimensional array")
+        values = values.tolist()
+    window = accumulator.window
+    results = []
+    for value in values:
+        accumulator.add(value)
+        if len(accumulator) == window:
+            results.append(statistic(accumulator))
+    if is_array:
+        import numpy as np
+        
+        return np.array(results, dtype=float)
+    return results
+
+
+def rolling_mean(values: Iterable[float], window: int):
+    """
+    Mean of every window of ``window`` consecutive values.
+    
+    Args:
+        values: Iterable or one-dimensional NumPy array of numbers
+        window: Window length
+        
+    Returns:
+        len(values) - window + 1 means (a list, or an array for array input)
+    """
+    return _roll(values, RollingStats(window), lambda stats: stats.mean)
+
+
+def rolling_variance(values: Iterable[float], window: int, population: bool = True):
+    """Variance of every window of ``window`` consecutive values (see rolling_mean)."""
+    return _roll(values, RollingStats(window), lambda stats: stats.variance(population))
+
+
+def rolling_std_dev(values: Iterable[float], window: int, population: bool = True):
+    """Standard deviation of every window of ``window`` consecutive values (see rolling_mean)."""
+    return _roll(values, RollingStats(window), lambda stats: stats.std_dev(population))
+
+
+def rolling_median(values: Iterable[float], window: int):
+    """Median of every window of ``window`` consecutive values (see rolling_mean)."""
+    return _roll(values, RollingMedian(window), lambda medians: medians.median)
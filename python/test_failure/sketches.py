@@ -0,0 +1,203 @@
+"""
+Mergeable approximate quantile sketch (KLL).
+"""
+import math
+import random
+from bisect import bisect_left
+from itertools import islice
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# Normalized rank error of a KLL sketch is about this constant over k
+ERROR_CONSTANT = 1.7
+
+# Values buffered into level 0 at once by QuantileSketch.update
+UPDATE_BATCH = 4096
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch (Karnin, Lang and Liberty).
+    
+    Values enter level 0. When the sketch is full, a level is sorted and
+    every other value, from a random offset, is promoted to the next level
+    with double the weight. Lower levels get geometrically smaller
+    capacities, so memory is O(k log(n / k)) regardless of stream length
+    while any quantile's rank error stays within about ``epsilon * n``.
+    Sketches built with the same ``epsilon`` merge into a sketch of the
+    combined data, so shards can be summarized independently.
+    """
+    
+    DECAY = 2 / 3  # Capacity ratio between a level and the one above it
+    
+    def __init__(self, epsilon: float = 0.01, seed: Optional[int] = None):
+        """
+        Initialize sketch.
+        
+        Args:
+            epsilon: Target rank error as a fraction of the count
+                (0.01 means a p99 query returns a value ranked 98-100%)
+            seed: Seed for the compaction coin flips
+        """
+        if not 0 < epsilon < 1:
+            raise ValueError("epsilon must be between 0 and 1")
+        self.epsilon = epsilon
+        self.k = max(8, math.ceil(ERROR_CONSTANT / epsilon))
+        self.count = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self._levels: List[List[float]] = [[]]
+        self._size = 0
+        self._max_size = self._capacity(0)
+        self._random = random.Random(seed)
+        self._sorted: Optional[Tuple[List[float], List[float]]] = None
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(2, math.ceil(self.k * self.DECAY ** depth))
+    
+    def _grow(self) -> None:
+        self._levels.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self._levels)))
+    
+    # Updates
+    
+    def add(self, value: float) -> None:
+        """Add one value."""
+        self._levels[0].append(value)
+        self._size += 1
+        self.count += 1
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+        self._sorted = None
+        if self._size >= self._max_size:
+            self._compress()
+    
+    def update(self, values: Iterable[float]) -> "QuantileSketch":
+        """
+        Add every value from an iterable, UPDATE_BATCH values at a time.
+        
+        Each compaction adds at most one item's weight of rank error no
+        matter how many items it sorts, so compacting large batches costs
+        no accuracy while saving many small sorts.
+        
+        Returns:
+            self
+        """
+        if hasattr(values, "tolist"):  # NumPy arrays convert to floats in C
+            values = values.ravel().tolist()
+        it = iter(values)
+        while True:
+            chunk = list(islice(it, max(UPDATE_BATCH, self._max_size - self._size)))
+            if not chunk:
+                return self
+            self._levels[0].extend(chunk)
+            self._size += len(chunk)
+            self.count += len(chunk)
+            self.minimum = min(self.minimum, min(chunk))
+            self.maximum = max(self.maximum, max(chunk))
+            self._sorted = None
+            if self._size >= self._max_size:
+                self._compress()
+    
+    def _compress(self) -> None:
+        """Compact the lowest full level until the sketch is under capacity."""
+        while self._size >= self._max_size:
+            level = next(h for h in range(len(self._levels)) if len(self._levels[h]) >= self._capacity(h))
+            if level + 1 == len(self._levels):
+                self._grow()
+            items = self._levels[level]
+            items.sort()
+            keep = items[:1] if len(items) % 2 else []
+            pairs = items[len(keep):]
+            self._levels[level + 1].extend(pairs[self._random.getrandbits(1)::2])
+            self._levels[level] = keep
+            self._size -= len(pairs) // 2
+    
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """
+        Fold another sketch into this one.
+        
+        Args:
+            other: Sketch built with the same epsilon
+        
+        Returns:
+            self
+        """
+        if other.k != self.k:
+            raise ValueError("Cannot merge sketches with different epsilon")
+        while len(self._levels) < len(other._levels):
+            self._grow()
+        # Copy first when merging with itself; extending a list by itself never ends
+        levels = [list(items) for items in other._levels] if other is self else other._levels
+        for level, items in enumerate(levels):
+            self._levels[level].extend(items)
+        self._size += other._size
+        self.count += other.count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self._sorted = None
+        self._compress()
+        return self
+    
+    # Queries
+    
+    def _weighted(self) -> Tuple[List[float], List[float]]:
+        """Retained values in order with their cumulative weights."""
+        if self._sorted is None:
+            pairs = sorted(
+                (value, 1 << level) for level, items in enumerate(self._levels) for value in items
+            )
+            values = [value for value, _ in pairs]
+            cumulative = []
+            total = 0
+            for _, weight in pairs:
+                total += weight
+                cumulative.append(total)
+            self._sorted = (values, cumulative)
+        return self._sorted
+    
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile.
+        
+        Args:
+            q: Quantile in [0, 1], e.g. 0.5 for the median or 0.99 for p99
+        
+        Returns:
+            A value whose rank is within about ``epsilon * count`` of ``q * count``
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        if self.count == 0:
+            raise ValueError("Cannot calculate quantile of empty sketch")
+        if q == 0:
+            return self.minimum
+        if q == 1:
+            return self.maximum
+        values, cumulative = self._weighted()
+        target = q * cumulative[-1]
+        return values[min(len(values) - 1, bisect_left(cumulative, target))]
+    
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        """Estimate several quantiles."""
+        return [self.quantile(q) for q in qs]
+    
+    def rank(self, value: float) -> float:
+        """Estimate the fraction of values less than or equal to ``value``."""
+        if self.count == 0:
+            raise ValueError("Cannot calculate rank in empty sketch")
+        values, cumulative = self._weighted()
+        index = bisect_left(values, value)
+        while index < len(values) and values[index] == value:
+            index += 1
+        return cumulative[index - 1] / cumulative[-1] if index else 0.0
+    
+    @property
+    def retained(self) -> int:
+        """Number of values the sketch currently stores."""
+        return self._size
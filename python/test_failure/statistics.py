@@ -1,9 +1,58 @@
 """
 Statistical functions for the calculator.
+
+Median and standard deviation dispatch on input: NumPy arrays,
+``array.array`` values and lists above a per-function length use NumPy
+(partition-based selection, fused variance); other inputs, or any input
+when NumPy is not installed, take the pure-Python path. The NumPy path
+returns what the pure-Python path returns for the same values.
 """
-from typing import List
+from array import array
+from functools import lru_cache
+from typing import List, Optional
 import math
 
+# List lengths from which converting to NumPy beats the pure-Python path
+# (python benchmark.py crossover): sorting is fast, two Python passes are not
+MEDIAN_LIST_THRESHOLD = 700
+STD_DEV_LIST_THRESHOLD = 100
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """Import NumPy on first use; None if it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _vector(numbers, list_threshold: int) -> Optional["numpy.ndarray"]:
+    """
+    Return ``numbers`` as a NumPy array if it should take the vectorized path.
+    
+    NumPy arrays and ``array.array`` values are viewed without copying;
+    lists of at least ``list_threshold`` values are converted; anything
+    else returns None.
+    """
+    if isinstance(numbers, list):
+        if len(numbers) < list_threshold:
+            return None
+        np = _numpy()
+        return np.asarray(numbers, dtype=float) if np is not None else None
+    if isinstance(numbers, array):
+        np = _numpy()
+        return np.frombuffer(numbers, dtype=numbers.typecode) if np is not None else None
+    if type(numbers).__module__ == "numpy":
+        return _numpy().asarray(numbers).ravel()
+    return None
+
+
+def _sized(numbers):
+    """Return ``numbers``, read into a list first if it has no length (an iterator)."""
+    return numbers if hasattr(numbers, "__len__") else list(numbers)
+
 
 def calculate_mean(numbers: List[float]) -> float:
     """
@@ -27,7 +76,7 @@ def calculate_median(numbers: List[float]) -> float:
     Calculate the median of a list of numbers.
     
     Args:
-        numbers: List of numbers
+        numbers: Numbers (any iterable, ``array.array`` or NumPy array)
         
     Returns:
         Median value
@@ -35,9 +84,18 @@ def calculate_median(numbers: List[float]) -> float:
     Raises:
         ValueError: If the list is empty
     """
-    if not numbers:
+    numbers = _sized(numbers)
+    if len(numbers) == 0:
         raise ValueError("Cannot calculate median of empty list")
     
+    vector = _vector(numbers, MEDIAN_LIST_THRESHOLD)
+    if vector is not None:
+        return _median_numpy(vector)
+    return _median_python(numbers)
+
+
+def _median_python(numbers: List[float]) -> float:
+    """Median by sorting a copy."""
     sorted_nums = sorted(numbers)
     n = len(sorted_nums)
     mid = n // 2
@@ -49,12 +107,19 @@ def calculate_median(numbers: List[float]) -> float:
         return sorted_nums[mid]
 
 
+def _median_numpy(vector) -> float:
+    """Median by introselect: np.partition places only the middle element."""
+    mid = len(vector) // 2
+    # Same element _median_python picks, for odd and even counts alike
+    return float(_numpy().partition(vector, mid)[mid])
+
+
 def calculate_std_dev(numbers: List[float], population: bool = True) -> float:
     """
     Calculate the standard deviation.
     
     Args:
-        numbers: List of numbers
+        numbers: Numbers (any iterable, ``array.array`` or NumPy array)
         population: If True, calculate population std dev; else sample std dev
         
     Returns:
@@ -63,14 +128,18 @@ def calculate_std_dev(numbers: List[float], population: bool = True) -> float:
     Raises:
         ValueError: If the list is empty
     """
-    if not numbers:
+    numbers = _sized(numbers)
+    if len(numbers) == 0:
         raise ValueError("Cannot calculate standard deviation of empty list")
     
-    n = len(numbers)
-    mean = calculate_mean(numbers)
+    vector = _vector(numbers, STD_DEV_LIST_THRESHOLD)
+    n = len(numbers) if vector is None else vector.size
     
-    # Calculate sum of squared differences
-    squared_diff_sum = sum((x - mean) ** 2 for x in numbers)
+    if vector is not None:
+        squared_diff_sum = _squared_deviations_numpy(vector)
+    else:
+        mean = calculate_mean(numbers)
+        squared_diff_sum = sum((x - mean) ** 2 for x in numbers)
     
     # For population: divide by n
     # For sample: divide by (n - 1)
@@ -80,6 +149,12 @@ def calculate_std_dev(numbers: List[float], population: bool = True) -> float:
     return math.sqrt(variance)
 
 
+def _squared_deviations_numpy(vector) -> float:
+    """Sum of squared deviations; np.dot fuses the square and the sum."""
+    deviations = vector - vector.mean(dtype=float)
+    return float(deviations @ deviations)
+
+
 def calculate_variance(numbers: List[float], population: bool = True) -> float:
     """
     Calculate the variance.
@@ -0,0 +1,170 @@
+"""
+Single-pass statistics accumulators for streams of numbers.
+"""
+import heapq
+import math
+from typing import Dict, Iterable, List
+
+
+class RunningStats:
+    """
+    Running count, mean, variance and range in constant memory.
+    
+    Uses Welford's update, which stays accurate for long streams where the
+    naive sum-of-squares formula loses precision.
+    """
+    
+    def __init__(self, values: Iterable[float] = ()):
+        """
+        Initialize accumulator.
+        
+        Args:
+            values: Optional initial values
+        """
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations from the mean
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.update(values)
+    
+    def add(self, value: float) -> None:
+        """Add one value."""
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+    
+    def update(self, values: Iterable[float]) -> "RunningStats":
+        """Add every value from an iterable; returns self."""
+        for value in values:
+            self.add(value)
+        return self
+    
+    @property
+    def mean(self) -> float:
+        """Arithmetic mean of the values seen."""
+        if self.count == 0:
+            raise ValueError("Cannot calculate mean of empty stream")
+        return self._mean
+    
+    def variance(self, population: bool = True) -> float:
+        """
+        Variance of the values seen.
+        
+        Args:
+            population: If True, divide by n; else by n - 1 (sample variance)
+        
+        Returns:
+            Variance
+        """
+        if self.count == 0:
+            raise ValueError("Cannot calculate variance of empty stream")
+        if population:
+            return self._m2 / self.count
+        if self.count < 2:
+            raise ValueError("Sample variance needs at least two values")
+        return self._m2 / (self.count - 1)
+    
+    def std_dev(self, population: bool = True) -> float:
+        """Standard deviation of the values seen (see variance)."""
+        return math.sqrt(self.variance(population))
+
+
+class RunningMedian:
+    """
+    Running median using a max-heap of the lower half and a min-heap of the
+    upper half.
+    
+    Each add is O(log n) and the median is O(1). Every value is retained, so
+    memory grows with the stream; use a quantile sketch when it must stay
+    bounded.
+    """
+    
+    def __init__(self, values: Iterable[float] = ()):
+        """
+        Initialize accumulator.
+        
+        Args:
+            values: Optional initial values
+        """
+        self._low: List[float] = []  # Negated, so heap[0] is the largest
+        self._high: List[float] = []
+        self.update(values)
+    
+    def __len__(self) -> int:
+        return len(self._low) + len(self._high)
+    
+    def add(self, value: float) -> None:
+        """Add one value."""
+        if self._low and value > -self._low[0]:
+            heapq.heappush(self._high, value)
+        else:
+            heapq.heappush(self._low, -value)
+        
+        # Keep len(low) == len(high) or len(high) + 1
+        if len(self._low) > len(self._high) + 1:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+        elif len(self._high) > len(self._low):
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+    
+    def update(self, values: Iterable[float]) -> "RunningMedian":
+        """Add every value from an iterable; returns self."""
+        for value in values:
+            self.add(value)
+        return self
+    
+    @property
+    def median(self) -> float:
+        """Median of the values seen."""
+        if not self._low:
+            raise ValueError("Cannot calculate median of empty stream")
+        if len(self._low) > len(self._high):
+            return -self._low[0]
+        return (-self._low[0] + self._high[0]) / 2
+
+
+class RunningMode:
+    """
+    Running mode from a frequency table.
+    
+    Memory is proportional to the number of distinct values, and the
+    highest frequency is tracked as values arrive.
+    """
+    
+    def __init__(self, values: Iterable[float] = ()):
+        """
+        Initialize accumulator.
+        
+        Args:
+            values: Optional initial values
+        """
+        self.frequency: Dict[float, int] = {}
+        self.count = 0
+        self.max_frequency = 0
+        self.update(values)
+    
+    def add(self, value: float) -> None:
+        """Add one value."""
+        seen = self.frequency.get(value, 0) + 1
+        self.frequency[value] = seen
+        self.count += 1
+        if seen > self.max_frequency:
+            self.max_frequency = seen
+    
+    def update(self, values: Iterable[float]) -> "RunningMode":
+        """Add every value from an iterable; returns self."""
+        for value in values:
+            self.add(value)
+        return self
+    
+    @property
+    def modes(self) -> List[float]:
+        """Most frequent value(s), sorted."""
+        if not self.count:
+            raise ValueError("Cannot calculate mode of empty stream")
+        return sorted(value for value, seen in self.frequency.items() if seen == self.max_frequency)
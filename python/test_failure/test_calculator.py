@@ -6,9 +6,22 @@ The implementation has bugs that need to be fixed.
 """
 import pytest
 from calculator import Calculator
+import statistics as stats_module
 from statistics import calculate_mean, calculate_median, calculate_std_dev
+from sketches import QuantileSketch
+from histogram import Histogram, quantile_edges
+from streaming import RunningMedian, RunningMode, RunningStats
+from rolling import RollingStats, SortedWindow, rolling_variance
 from conversions import celsius_to_fahrenheit, fahrenheit_to_celsius
-from expression import evaluate_expression
+from expression import (
+    compile_expression,
+    evaluate_expression,
+    evaluate_tree,
+    evaluate_vectorized,
+    optimize_tree,
+    parse,
+    validate_expression,
+)
 
 
 @pytest.fixture
@@ -17,6 +30,22 @@ def calc():
     return Calculator()
 
 
+def reference_median(values):
+    """Median computed directly, for checking the other statistics modules."""
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[mid]
+    return (ordered[mid - 1] + ordered[mid]) / 2
+
+
+def reference_std_dev(values, population=True):
+    """Standard deviation computed directly, for checking the other statistics modules."""
+    mean = sum(values) / len(values)
+    squared_diff_sum = sum((x - mean) ** 2 for x in values)
+    return (squared_diff_sum / (len(values) if population else len(values) - 1)) ** 0.5
+
+
 # ==================== Basic Operations ====================
 
 class TestBasicOperations:
@@ -100,6 +129,429 @@ class TestStatistics:
         assert abs(result - 2.138) < 0.01
 
 
+class TestStatisticsFastPaths:
+    """Tests for the array and NumPy dispatch in statistics functions."""
+    
+    def test_large_lists_match_pure_python(self, monkeypatch):
+        """Vectorized results should equal the pure-Python path."""
+        pytest.importorskip("numpy")
+        import random
+        rng = random.Random(3)
+        datasets = [[rng.uniform(-50, 50) for _ in range(n)] for n in (1001, 1000)]
+        vectorized = [
+            (calculate_median(data), calculate_std_dev(data), calculate_std_dev(data, population=False))
+            for data in datasets
+        ]
+        monkeypatch.setattr(stats_module, "_numpy", lambda: None)
+        for data, (median, std_dev, sample_std_dev) in zip(datasets, vectorized):
+            assert median == calculate_median(data)
+            assert abs(std_dev - calculate_std_dev(data)) < 1e-9
+            assert abs(sample_std_dev - calculate_std_dev(data, population=False)) < 1e-9
+    
+    def test_array_inputs(self):
+        """array.array and NumPy arrays should be accepted directly."""
+        from array import array
+        np = pytest.importorskip("numpy")
+        data = [2, 4, 4, 4, 5, 5, 7, 9]
+        for values in (array("d", data), array("f", data), array("i", data), np.array(data)):
+            assert calculate_median(values[:7]) == 4
+            assert abs(calculate_std_dev(values) - 2.0) < 1e-12
+        assert abs(calculate_std_dev(np.array(data).reshape(2, 4)) - 2.0) < 1e-12
+    
+    def test_without_numpy(self, monkeypatch):
+        """Inputs should fall back to pure Python when NumPy is missing."""
+        from array import array
+        monkeypatch.setattr(stats_module, "_numpy", lambda: None)
+        data = list(range(2001))
+        assert calculate_median(data) == 1000
+        assert calculate_median(array("d", [3, 1, 2])) == 2
+    
+    def test_iterator_inputs(self):
+        """Iterators and generators should be read once and accepted."""
+        assert calculate_median(iter([3, 1, 2])) == 2
+        assert calculate_median(x for x in range(2001)) == 1000
+        assert abs(calculate_std_dev(iter([2, 4, 4, 4, 5, 5, 7, 9])) - 2.0) < 1e-12
+        assert abs(calculate_std_dev(x for x in [1, 3]) - 1.0) < 1e-12
+        with pytest.raises(ValueError):
+            calculate_median(iter([]))
+
+
+class TestStreamingStatistics:
+    """Tests for single-pass statistics accumulators."""
+    
+    def test_running_mean_and_std_dev(self):
+        """Welford accumulator should match the closed-form results."""
+        stats = RunningStats(iter([2, 4, 4, 4, 5, 5, 7, 9]))
+        assert stats.count == 8
+        assert stats.mean == 5.0
+        assert abs(stats.std_dev() - 2.0) < 1e-12
+        assert abs(stats.std_dev(population=False) - 2.138) < 0.001
+        assert (stats.minimum, stats.maximum) == (2, 9)
+    
+    def test_running_stats_precision(self):
+        """Large offsets should not destroy the variance."""
+        stats = RunningStats(1e9 + x for x in [4, 7, 13, 16])
+        assert abs(stats.variance(population=False) - 30.0) < 1e-6
+    
+    def test_running_median(self):
+        """Two-heap median should match the sorted median at every step."""
+        values = [5, 1, 9, 3, 3, 8, 2, 7, 6, 4]
+        running = RunningMedian()
+        for i, value in enumerate(values, 1):
+            running.add(value)
+            ordered = sorted(values[:i])
+            mid = i // 2
+            expected = ordered[mid] if i % 2 else (ordered[mid - 1] + ordered[mid]) / 2
+            assert running.median == expected
+    
+    def test_running_mode(self):
+        """Counter-based mode should return every most frequent value."""
+        mode = RunningMode([1, 2, 2, 3, 3, 4])
+        assert mode.modes == [2, 3]
+        mode.add(3)
+        assert mode.modes == [3]
+    
+    def test_empty_stream(self):
+        """Empty accumulators should raise ValueError."""
+        with pytest.raises(ValueError):
+            RunningStats().mean
+        with pytest.raises(ValueError):
+            RunningMedian().median
+        with pytest.raises(ValueError):
+            RunningMode().modes
+
+
+
+class TestRollingStatistics:
+    """Tests for sliding-window statistics against naive window slices."""
+    
+    @staticmethod
+    def series(n=3000, seed=11):
+        import random
+        rng = random.Random(seed)
+        data = [rng.gauss(100, 5) for _ in range(n)]
+        data[n // 3] = 1e9  # An outlier entering and leaving the window
+        data[n // 2:n // 2 + 40] = [7.0] * 40  # A flat stretch
+        return data
+    
+    def test_matches_slices(self, calc):
+        """Rolling results should match the statistics of each slice."""
+        data = self.series()
+        for window in (1, 2, 25, 64):
+            slices = [data[i:i + window] for i in range(len(data) - window + 1)]
+            assert calc.rolling_median(data, window) == [reference_median(s) for s in slices]
+            for fast, s in zip(calc.rolling_mean(iter(data), window), slices):
+                assert fast == pytest.approx(calculate_mean(s), rel=1e-12)
+            if window > 1:
+                for fast, s in zip(calc.rolling_std_dev(data, window, population=False), slices):
+                    assert fast == pytest.approx(reference_std_dev(s, population=False), rel=1e-9, abs=1e-9)
+    
+    def test_numpy_input(self, calc):
+        """NumPy arrays should give NumPy arrays of the same results."""
+        np = pytest.importorskip("numpy")
+        data = self.series(500)
+        array = np.array(data)
+        assert isinstance(calc.rolling_median(array, 10), np.ndarray)
+        assert calc.rolling_median(array, 10).tolist() == calc.rolling_median(data, 10)
+        expected = [np.var(array[i:i + 30]) for i in range(len(data) - 29)]
+        assert np.allclose(rolling_variance(array, 30), expected, rtol=1e-9)
+        assert calc.rolling_mean(array[:5], 10).size == 0
+    
+    def test_sorted_window(self, monkeypatch):
+        """SortedWindow should stay sorted and indexable across bucket splits."""
+        import bisect
+        import random
+        import rolling
+        monkeypatch.setattr(rolling, "BUCKET_SIZE", 4)
+        rng = random.Random(3)
+        window, reference = SortedWindow(), []
+        for step in range(4000):
+            if reference and rng.random() < 0.45:
+                value = rng.choice(reference)
+                reference.remove(value)
+                window.remove(value)
+            else:
+                value = float(rng.randint(0, 50))
+                bisect.insort(reference, value)
+                window.add(value)
+        assert list(window) == reference
+        assert [window[i] for i in range(len(reference))] == reference
+        assert window.pair(len(reference) - 2) == tuple(reference[-2:])
+        with pytest.raises(ValueError):
+            window.remove(51.0)
+    
+    def test_nan_values(self, calc):
+        """A NaN should make its windows' median NaN and then leave cleanly."""
+        import math
+        result = calc.rolling_median([1.0, math.nan, 2.0, 3.0, math.nan], 2)
+        assert [math.isnan(x) for x in result] == [True, True, False, True]
+        assert result[2] == 2.5
+        window = SortedWindow([3.0, math.nan, 1.0])
+        assert (list(window), len(window), window.nans) == ([1.0, 3.0], 2, 1)
+        window.remove(math.nan)
+        with pytest.raises(ValueError):
+            window.remove(math.nan)
+        assert window.nans == 0
+    
+    def test_invalid_window(self):
+        """Windows must hold at least one value."""
+        with pytest.raises(ValueError):
+            RollingStats(0)
+        with pytest.raises(ValueError):
+            RollingStats(3).mean
+
+class TestParallelStatistics:
+    """Tests for chunked statistics with mergeable partials."""
+    
+    DATA = [((i * 7919) % 1000) / 10 - 20 for i in range(20_000)]
+    
+    def test_chunks_match_single_pass(self, calc):
+        """Merged partials should match whole-list statistics."""
+        chunks = [self.DATA[i:i + 3000] for i in range(0, len(self.DATA), 3000)]
+        summary = calc.summarize(iter(chunks), workers=1, frequencies=True)
+        assert summary.count == len(self.DATA)
+        assert abs(summary.mean - calculate_mean(self.DATA)) < 1e-9
+        assert abs(summary.std_dev() - calculate_std_dev(self.DATA)) < 1e-9
+        assert abs(summary.std_dev(False) - reference_std_dev(self.DATA, population=False)) < 1e-9
+        assert (summary.minimum, summary.maximum) == (min(self.DATA), max(self.DATA))
+        assert len(summary.modes) == 1000
+    
+    def test_file_in_process_pool(self, calc, tmp_path):
+        """A text file split into byte ranges should give exact results."""
+        import parallel
+        path = tmp_path / "values.txt"
+        lines = [", ".join(str(x) for x in self.DATA[i:i + 7]) for i in range(0, len(self.DATA), 7)]
+        path.write_text("\n".join(lines) + "\n")
+        ranges = parallel.file_ranges(str(path), chunk_bytes=997)
+        assert sum(len(parallel.read_range(*r)) for r in ranges) == len(self.DATA)
+        
+        summary = parallel.summarize(path, workers=2, epsilon=0.01, chunk_bytes=4096)
+        assert summary.count == len(self.DATA)
+        assert abs(summary.mean - calculate_mean(self.DATA)) < 1e-9
+        assert abs(calc.parallel_std_dev(path, workers=2) - calculate_std_dev(self.DATA)) < 1e-9
+        assert abs(summary.quantile(0.5) - calculate_median(self.DATA)) < 1.0
+    
+    def test_numpy_chunks(self, calc):
+        """NumPy chunks should merge like lists."""
+        np = pytest.importorskip("numpy")
+        chunks = [np.array(self.DATA[i:i + 5000]) for i in range(0, len(self.DATA), 5000)]
+        assert abs(calc.parallel_mean(chunks, workers=1) - calculate_mean(self.DATA)) < 1e-9
+        assert calc.summarize([[], [1.0, 3.0]], workers=1).variance() == 1.0
+
+
+
+class TestBinaryDataset:
+    """Tests for statistics over memory-mapped binary files."""
+    
+    DATA = [((i * 7919) % 1001) / 4 - 50 for i in range(30_001)]
+    
+    @pytest.fixture
+    def small_passes(self, monkeypatch):
+        """Force several narrowing passes over small test files."""
+        import binary_data
+        monkeypatch.setattr(binary_data, "MAX_COLLECT", 100)
+        monkeypatch.setattr(binary_data, "SELECT_BINS", 8)
+        return binary_data
+    
+    def test_statistics_match_lists(self, calc, tmp_path, small_passes):
+        """Every statistic should match the in-memory result exactly."""
+        path = tmp_path / "values.f64"
+        small_passes.write_binary(path, self.DATA)
+        dataset = small_passes.BinaryDataset(path, window_pages=1)
+        ordered = sorted(self.DATA)
+        assert len(dataset) == len(self.DATA)
+        assert abs(calc.mean(dataset) - sum(self.DATA) / len(self.DATA)) < 1e-9
+        assert calc.median(dataset) == calculate_median(self.DATA)
+        assert abs(calc.std_dev(dataset) - calculate_std_dev(self.DATA)) < 1e-9
+        counts = {value: self.DATA.count(value) for value in set(self.DATA)}
+        assert dataset.modes() == sorted(v for v, c in counts.items() if c == max(counts.values()))
+        for q in (0, 0.01, 0.5, 0.99, 1):
+            assert dataset.quantile(q) == ordered[int(q * (len(ordered) - 1))]
+    
+    def test_float32_without_numpy(self, calc, tmp_path, small_passes, monkeypatch):
+        """The memoryview path should give the same exact answers."""
+        monkeypatch.setattr(small_passes, "_numpy", lambda: None)
+        data = [1.5] * 500 + [2.5] * 500 + [x / 2 for x in range(300)]
+        path = tmp_path / "values.f32"
+        small_passes.write_binary(path, data, dtype="float32")
+        dataset = calc.open_binary(path, dtype="float32")
+        assert calc.median(dataset) == reference_median(data)
+        assert dataset.select(0, 2) == sorted(data)[:3]
+        assert dataset.modes() == [1.5, 2.5]
+        assert dataset.variance(False) == pytest.approx(reference_std_dev(data, population=False) ** 2)
+    
+    def test_adjacent_floats(self, calc, tmp_path, small_passes):
+        """Selection should stop narrowing at two neighbouring floats."""
+        import math
+        low = 1.0
+        high = small_passes._next_up(low)
+        assert low < high and (low + high) / 2 in (low, high)
+        data = [high] * 300 + [low] * 200
+        path = tmp_path / "values.f64"
+        small_passes.write_binary(path, data)
+        dataset = calc.open_binary(path)
+        assert dataset.select(0, 499) == sorted(data)
+        assert calc.median(dataset) == calculate_median(data)
+        for x in (0.0, -0.0, 5e-324, -5e-324, 1e-310, -2.5, 3.0, 1.7976931348623157e308,
+                  -math.inf, -1.7976931348623157e308):
+            assert small_passes._next_up(x) > x
+            if hasattr(math, "nextafter"):  # Python 3.9+
+                assert small_passes._next_up(x) == math.nextafter(x, math.inf)
+        assert small_passes._next_up(math.inf) == math.inf
+    
+    @pytest.mark.filterwarnings("ignore:invalid value:RuntimeWarning")
+    def test_nan_values(self, calc, tmp_path, small_passes, monkeypatch):
+        """Order statistics should reject NaN; infinities should still rank."""
+        import math
+        path = tmp_path / "values.f64"
+        small_passes.write_binary(path, [float(x) for x in range(300)] + [math.nan])
+        numpy = small_passes._numpy
+        for importer in (numpy, lambda: None):
+            monkeypatch.setattr(small_passes, "_numpy", importer)
+            dataset = calc.open_binary(path)
+            assert math.isnan(dataset.mean())
+            with pytest.raises(ValueError, match="NaN"):
+                calc.median(dataset)
+            with pytest.raises(ValueError, match="NaN"):
+                dataset.quantile(0.5)
+        if numpy() is not None:
+            # -inf and inf make the total NaN without any NaN values
+            monkeypatch.setattr(small_passes, "_numpy", numpy)
+            small_passes.write_binary(path, [math.inf, 2.0, -math.inf])
+            assert calc.median(calc.open_binary(path)) == 2.0
+    
+    def test_invalid_files(self, calc, tmp_path):
+        """Truncated files, unknown dtypes and empty files should raise."""
+        path = tmp_path / "values.bin"
+        path.write_bytes(b"\0" * 12)
+        with pytest.raises(ValueError):
+            calc.open_binary(path)
+        with pytest.raises(ValueError):
+            calc.open_binary(path, dtype="int32")
+        path.write_bytes(b"")
+        with pytest.raises(ValueError):
+            calc.median(calc.open_binary(path))
+
+class TestQuantileSketch:
+    """Tests for the approximate quantile sketch."""
+    
+    @staticmethod
+    def rank_error(ordered, value, q):
+        """Distance between the true rank of ``value`` and ``q``."""
+        import bisect
+        return abs(bisect.bisect_right(ordered, value) / len(ordered) - q)
+    
+    def test_quantiles_within_bound(self, calc):
+        """Estimated quantiles should be within epsilon in rank."""
+        import random
+        rng = random.Random(7)
+        data = [rng.expovariate(1.0) for _ in range(100_000)]
+        ordered = sorted(data)
+        qs = [0.01, 0.5, 0.95, 0.99]
+        for q, value in zip(qs, calc.quantiles(data, qs, epsilon=0.01)):
+            assert self.rank_error(ordered, value, q) <= 0.01
+    
+    def test_merge_shards(self, calc):
+        """Merged shard sketches should summarize the combined data."""
+        data = list(range(50_000))
+        shards = [calc.quantile_sketch(data[i::5], epsilon=0.02) for i in range(5)]
+        merged = calc.merge_sketches(shards)
+        assert merged.count == len(data)
+        assert (merged.minimum, merged.maximum) == (0, 49_999)
+        assert merged.retained < 2000
+        for q in (0.5, 0.95, 0.99):
+            assert self.rank_error(data, merged.quantile(q), q) <= 0.02
+    
+    def test_small_inputs_are_exact(self):
+        """Below capacity the sketch keeps every value."""
+        sketch = QuantileSketch().update([5, 1, 4, 2, 3])
+        assert sketch.quantiles([0, 0.5, 1]) == [1, 3, 5]
+        assert sketch.rank(3) == 0.6
+    
+    def test_merge_with_itself(self):
+        """Merging a sketch into itself should double every weight."""
+        sketch = QuantileSketch().update([5, 1, 4, 2, 3])
+        assert sketch.merge(sketch) is sketch
+        assert sketch.count == 10
+        assert sketch.quantiles([0, 0.5, 1]) == [1, 3, 5]
+        large = QuantileSketch(0.02).update(range(20_000))
+        large.merge(large)
+        assert large.count == 40_000
+        assert abs(large.quantile(0.5) - 10_000) <= 0.02 * 20_000
+    
+    def test_invalid_use(self):
+        """Bad arguments and empty sketches should raise ValueError."""
+        with pytest.raises(ValueError):
+            QuantileSketch(epsilon=0)
+        with pytest.raises(ValueError):
+            QuantileSketch().quantile(0.5)
+        with pytest.raises(ValueError):
+            QuantileSketch(0.01).merge(QuantileSketch(0.05))
+
+
+class TestHistogram:
+    """Tests for histogram binning and merging."""
+    
+    DATA = [((i * 7919) % 1000) / 10 for i in range(5000)]
+    
+    def test_fixed_width_matches_numpy(self, calc, monkeypatch):
+        """Both binning paths should agree with np.histogram."""
+        import histogram as histogram_module
+        np = pytest.importorskip("numpy")
+        expected, edges = np.histogram(self.DATA, bins=7)
+        assert calc.histogram(self.DATA, bins=7).counts == expected.tolist()
+        monkeypatch.setattr(histogram_module, "HISTOGRAM_LIST_THRESHOLD", 10**9)
+        result = calc.histogram(iter(self.DATA), bins=7)
+        assert result.edges == edges.tolist()
+        assert result.counts == expected.tolist()
+        assert (result.underflow, result.overflow) == (0, 0)
+        assert calc.histogram(self.DATA, bins=np.int64(7)).counts == expected.tolist()
+        assert calc.histogram(self.DATA, bins=np.int32(4), binning="quantile").bins == 4
+    
+    def test_custom_edges_and_outliers(self, calc):
+        """Values outside the edges, and NaN, should not land in a bin."""
+        values = [-5, 0, 0.5, 1, 2, 2.5, 3, 3, 9, float("nan")]
+        result = calc.histogram(values, bins=[0, 1, 2, 3])
+        assert result.counts == [2, 1, 4]
+        assert (result.underflow, result.overflow, result.total) == (1, 1, 7)
+        assert result.modal_bins() == [(2.0, 3.0)]
+        assert sum(d * w for d, w in zip(result.density(), result.widths())) == pytest.approx(1.0)
+        with pytest.raises(ValueError):
+            Histogram([0, 1, 1])
+    
+    def test_quantile_binning(self, calc):
+        """Quantile bins should hold about equal counts."""
+        data = [x * x for x in range(1000)]
+        result = calc.histogram(data, bins=4, binning="quantile")
+        assert result.counts == [249, 250, 250, 251]
+        assert result.edges == [0.0, 249.0 ** 2, 499.0 ** 2, 749.0 ** 2, 999.0 ** 2]
+        assert quantile_edges([3, 3, 3], 4) == [2.5, 3.5]
+        sketch = calc.quantile_sketch(data, epsilon=0.01)
+        assert len(quantile_edges(sketch, 4)) == 5
+    
+    def test_merge_chunks(self, calc):
+        """Chunks binned with shared edges should merge into the whole histogram."""
+        whole = calc.histogram(self.DATA, bins=12, limits=(10, 90))
+        parts = [calc.histogram(self.DATA[i:i + 700], bins=whole.edges) for i in range(0, 5000, 700)]
+        merged = calc.merge_histograms(parts)
+        assert merged.counts == whole.counts
+        assert (merged.underflow, merged.overflow) == (whole.underflow, whole.overflow) == (500, 495)
+        assert merged.quantile(0.5) == pytest.approx(calculate_median(self.DATA), abs=80 / 12)
+        with pytest.raises(ValueError):
+            merged.merge(calc.histogram(self.DATA, bins=12))
+    
+    def test_invalid_input(self, calc):
+        """Empty data and bad options should raise ValueError."""
+        with pytest.raises(ValueError):
+            calc.histogram([])
+        with pytest.raises(ValueError):
+            calc.histogram(self.DATA, binning="log")
+        with pytest.raises(ValueError):
+            calc.histogram(self.DATA, bins=0)
+        with pytest.raises(ValueError):
+            calc.merge_histograms([])
+
+
 # ==================== Temperature Conversions ====================
 
 class TestTemperatureConversions:
@@ -170,6 +622,172 @@ class TestExpressionEvaluation:
         assert calc.evaluate("12 / 3 * 2") == 8
 
 
+class TestExpressionEngine:
+    """Tests for the parser, compiler and compiled-expression cache."""
+    
+    def test_unary_minus_and_decimals(self):
+        """Unary operators and decimal literals should parse."""
+        assert evaluate_expression("-2 * -3") == 6
+        assert evaluate_expression("-(1.5 + .5) * 2") == -4
+        assert evaluate_expression("1e3 / 4") == 250
+    
+    def test_deep_nesting(self):
+        """Deeply nested parentheses should not hit recursion limits."""
+        depth = 2000
+        assert evaluate_expression("(" * depth + "1 + 1" + ")" * depth) == 2
+        assert evaluate_expression(" + ".join(["1"] * 5000)) == 5000
+    
+    def test_malformed_expressions(self):
+        """Malformed input should raise ValueError."""
+        for expression in ["", "2 +", "(1 + 2", "1 + 2)", "2 3", "* 2", "2 $ 3"]:
+            with pytest.raises(ValueError):
+                evaluate_expression(expression)
+            assert not validate_expression(expression)
+        assert validate_expression("(1 + 2) * 3")
+    
+    def test_division_by_zero(self, calc):
+        """Division by zero inside an expression should raise ValueError."""
+        with pytest.raises(ValueError, match="Division by zero"):
+            calc.evaluate("1 / (2 - 2)")
+    
+    def test_compiled_expressions_are_cached(self, calc):
+        """Re-evaluating the same source should reuse the compiled function."""
+        compile_expression.cache_clear()
+        calc.evaluate("7 * 6")
+        calc.evaluate("7 * 6")
+        info = compile_expression.cache_info()
+        assert info.hits == 1 and info.misses == 1
+        assert compile_expression("7 * 6")() == 42
+
+
+class TestExpressionOptimizer:
+    """Tests for constant folding, CSE and identity removal."""
+    
+    def test_repeated_subterms_computed_once(self):
+        """Equal subexpressions should share one node and one temporary."""
+        optimization = optimize_tree(parse("(a+b)*(a+b)/(b+a)"))
+        assert optimization.nodes_before == 11
+        assert optimization.nodes_after == 5
+        assert optimization.nodes_saved == 6
+        compiled = compile_expression("(a+b)*(a+b)/(b+a)")
+        assert compiled.code.count("_v_a + _v_b") == 1
+        assert compiled(a=1, b=3) == 4
+    
+    def test_constants_and_identities(self):
+        """Constant parts should fold and identities should disappear."""
+        assert optimize_tree(parse("2 * 3 + 4 / (8 - 6)")).tree == parse("5")
+        assert optimize_tree(parse("-(-x) * 1 - 0 - (-y)")).tree == parse("x + y")
+        with pytest.raises(ValueError, match="Division by zero"):
+            evaluate_expression("x / (2 - 2)", x=1)
+        with pytest.raises(ValueError, match="Missing value"):
+            evaluate_expression("x * 0 + 1")
+    
+    def test_matches_unoptimized(self):
+        """Optimized and unoptimized compilations should agree everywhere."""
+        import random
+        rng = random.Random(5)
+        specials = [0.0, -1.5, 2, float("inf"), float("nan")]
+        for _ in range(300):
+            parts = [rng.choice(["x", "y", "0", "1", "2", "(x - y)", "-(x + 1)"]) for _ in range(6)]
+            expression = " ".join(part + " " + rng.choice("+-*/") for part in parts[:-1]) + " " + parts[-1]
+            expression = f"({expression}) * ({expression}) - {expression}"
+            values = {"x": rng.choice(specials), "y": rng.choice(specials)}
+            results = []
+            for optimize in (True, False):
+                try:
+                    results.append(compile_expression(expression, optimize=optimize)(**values))
+                except ValueError as e:
+                    results.append(str(e))
+            assert results[0] == results[1] or results[0] != results[0] and results[1] != results[1]
+    
+    def test_signed_zero_preserved(self):
+        """Rewrites that would turn 0.0 into -0.0 should not be applied."""
+        assert optimize_tree(parse("x + 0")).tree == parse("x + 0")
+        assert optimize_tree(parse("0 - x")).tree == parse("0 - x")
+        assert optimize_tree(parse("x - 0")).tree == parse("x")
+        assert optimize_tree(parse("x - -0")).tree != parse("x")
+        np = pytest.importorskip("numpy")
+        zeros = np.array([-0.0, 0.0])
+        for expression in ["x + 0", "0 + x", "0 - x", "x - 0", "x - -0", "x - (0 - 0)", "x * 1", "-(-x) / 1"]:
+            optimized = evaluate_vectorized(expression, x=zeros)
+            exact = compile_expression(expression, vectorized=True, optimize=False).function(zeros)
+            assert np.array_equal(np.signbit(optimized), np.signbit(exact)), expression
+
+
+class TestExpressionVariables:
+    """Tests for named variables and vectorized evaluation."""
+    
+    def test_variables(self, calc):
+        """Variables should be bound from keyword arguments."""
+        assert calc.evaluate("x * 2 + y", x=3, y=1) == 7
+        assert evaluate_expression("rate_2 * (1 + x)", rate_2=0.5, x=1) == 1
+        assert "x * 2 + y [x=3, y=1] = 7" in calc.get_history()
+    
+    def test_missing_variable(self):
+        """Unbound variables and keyword names should raise ValueError."""
+        with pytest.raises(ValueError, match="Missing value for variable: y"):
+            evaluate_expression("x + y", x=1)
+        with pytest.raises(ValueError, match="Invalid variable name"):
+            evaluate_expression("lambda + 1")
+    
+    def test_variables_named_like_builtins(self):
+        """Variables may share names with what the generated code uses."""
+        assert evaluate_expression("ZeroDivisionError / ValueError", ZeroDivisionError=6, ValueError=3) == 2
+        with pytest.raises(ValueError, match="Division by zero"):
+            evaluate_expression("ValueError / ZeroDivisionError", ValueError=1, ZeroDivisionError=0)
+        assert evaluate_expression("compiled + x", compiled=1, x=2) == 3
+        np = pytest.importorskip("numpy")
+        assert np.array_equal(evaluate_vectorized("ValueError * 2", ValueError=[1, 2]), [2, 4])
+    
+    def test_vectorized_matches_scalar(self):
+        """Vectorized results should match evaluating each row."""
+        np = pytest.importorskip("numpy")
+        x = np.array([1.0, 2.5, -3.0, 4.0])
+        y = np.array([2.0, 0.5, 7.0, 1.0])
+        result = evaluate_vectorized("(x + y) * 2 - x / y", x=x, y=y)
+        expected = [evaluate_expression("(x + y) * 2 - x / y", x=a, y=b) for a, b in zip(x, y)]
+        assert np.allclose(result, expected)
+    
+    def test_vectorized_division_by_zero(self, calc):
+        """Division by zero should only affect the elements it occurs in."""
+        np = pytest.importorskip("numpy")
+        result = calc.evaluate_vectorized("1 + x / (y - 1)", x=[2.0, 2.0, 0.0], y=[2.0, 1.0, 1.0])
+        assert result[0] == 3
+        assert np.isnan(result[1]) and np.isnan(result[2])
+        assert np.array_equal(evaluate_vectorized("x * 2", x=[[1], [2]]), [[2], [4]])
+
+
+class TestBatchEvaluation:
+    """Tests for batch expression evaluation."""
+    
+    def test_order_and_errors(self, calc):
+        """Results should keep input order with errors in place."""
+        results = calc.evaluate_many(["1 + 1", "2 / 0", "3 * 3", "bad)"], workers=1)
+        assert results[0] == 2 and results[2] == 9
+        assert isinstance(results[1], ValueError)
+        assert isinstance(results[3], ValueError)
+        assert calc.get_history() == ["1 + 1 = 2", "3 * 3 = 9"]
+    
+    def test_process_pool(self, calc):
+        """A pooled batch should match evaluating each expression in turn."""
+        expressions = [f"{i} * 2 + {i % 7} / {i % 5}" for i in range(3000)]
+        results = calc.evaluate_many(expressions, workers=2, chunk_size=500)
+        for i, result in enumerate(results):
+            if i % 5 == 0:
+                assert isinstance(result, ValueError)
+            else:
+                assert result == evaluate_expression(expressions[i])
+        assert len(calc.get_history()) == 2400
+    
+    def test_interpreter_matches_compiler(self):
+        """Interpreting a tree should give the compiled result."""
+        for expression in ["-(2 + 3) * 4 / 8", "1.5 - -2", "10 - 2 * 3 + 4", "x / y + x"]:
+            expected = evaluate_expression(expression, x=3, y=4)
+            assert evaluate_tree(parse(expression), x=3, y=4) == expected
+        with pytest.raises(ValueError, match="Division by zero"):
+            evaluate_tree(parse("1 / (1 - 1)"))
+
+
 # ==================== Memory Operations ====================
 
 class TestMemoryOperations:
@@ -210,3 +828,70 @@ class TestHistory:
         calc.add(1, 2)
         calc.clear_history()
         assert len(calc.get_history()) == 0
+    
+    def test_history_is_bounded(self):
+        """Only the most recent history_size operations should be kept."""
+        calc = Calculator(history_size=3)
+        for i in range(10):
+            calc.add(i, 1)
+        calc.divide(1, 4)
+        assert calc.get_history() == ["8 + 1 = 9", "9 + 1 = 10", "1 / 4 = 0.25"]
+    
+    def test_history_formatted_on_read(self, calc):
+        """History should store operands and format them only when read."""
+        calc.subtract(5, 2)
+        calc.evaluate("x - 1", x=4)
+        assert calc.history[0] == ("-", 5, 2, 3)
+        assert calc.get_history() == ["5 - 2 = 3", "x - 1 [x=4] = 3"]
+    
+    def test_history_disabled(self):
+        """history_size=0 should record nothing."""
+        calc = Calculator(history_size=0)
+        calc.add(1, 2)
+        calc.evaluate("2 * 3")
+        calc.evaluate_many(["1 + 1"], workers=1)
+        assert calc.get_history() == []
+
+
+# ==================== Unit Conversions ====================
+
+class TestUnitRegistry:
+    """Tests for the unit conversion graph."""
+    
+    def test_composed_conversions(self, calc):
+        """Multi-hop conversions should match their exact definitions."""
+        assert calc.convert(1, "mi", "km") == pytest.approx(1.609344)
+        assert calc.convert(1, "yd", "in") == pytest.approx(36)
+        assert calc.convert(16, "oz", "kg") == pytest.approx(0.45359237)
+        assert calc.convert(100, "C", "F") == pytest.approx(212)
+        assert calc.convert(0, "K", "R") == 0
+        assert calc.convert_temperature(212, 'f', 'k') == pytest.approx(373.15)
+    
+    def test_bulk_matches_scalar(self, calc):
+        """Bulk conversion should give the scalar result for every element."""
+        readings = [-40.0, 0.0, 37.0, 100.0]
+        converted = calc.convert_many(readings, "C", "F")
+        assert list(converted) == [calc.convert(c, "C", "F") for c in readings]
+        assert list(calc.convert_many((c for c in readings), "C", "F")) == list(converted)
+        assert list(calc.convert_many(iter([]), "C", "F")) == []
+        np = pytest.importorskip("numpy")
+        array = calc.convert_many(np.arange(1000.0), "m", "ft")
+        assert isinstance(array, np.ndarray)
+        assert array[999] == pytest.approx(999 / 0.3048)
+    
+    def test_custom_registry_and_errors(self, calc):
+        """Registries should derive new pairs and reject invalid ones."""
+        from units import UnitRegistry
+        registry = UnitRegistry()
+        for unit in ("s", "min", "h"):
+            registry.define(unit, "time")
+        registry.define("day", "time")
+        registry.add_conversion("min", "s", 60)
+        registry.add_conversion("h", "min", 60)
+        assert registry.convert(2, "h", "s") == 7200
+        with pytest.raises(ValueError, match="No conversion"):
+            registry.convert(1, "day", "h")
+        with pytest.raises(ValueError):
+            calc.convert(1, "kg", "m")
+        with pytest.raises(ValueError):
+            calc.convert_temperature(1, 'X', 'C')
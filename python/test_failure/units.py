@@ -0,0 +1,200 @@
+"""
+Unit registry: a conversion graph with precomputed transforms.
+
+Every conversion between units of one dimension is affine (y = x * scale
++ offset), and affine maps compose into affine maps. The registry is a
+graph whose edges are the defined conversions; whenever it changes, a
+search from each unit composes the transforms along the way, so
+converting between any reachable pair costs one multiply and one add. For
+the same reason an array converts in a single vectorized operation.
+
+Composition is exact (fractions), so a chain such as K -> C -> F -> R
+rounds once rather than at every hop.
+"""
+from collections import deque
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Dict, List, Tuple, Union
+
+Number = Union[int, float]
+
+
+def _exact(value: Number) -> Fraction:
+    """The decimal a number was written as, e.g. 1.8 -> 9/5."""
+    return Fraction(repr(value)) if isinstance(value, float) else Fraction(value)
+
+
+@dataclass(frozen=True)
+class Affine:
+    """The transform x -> x * scale + offset (floats or fractions)."""
+    scale: Number = 1.0
+    offset: Number = 0.0
+    
+    def __call__(self, value):
+        """Apply to a number or, elementwise, to a NumPy array."""
+        return value * self.scale + self.offset
+    
+    def then(self, other: "Affine") -> "Affine":
+        """The transform that applies self, then other."""
+        return Affine(self.scale * other.scale, self.offset * other.scale + other.offset)
+    
+    def inverse(self) -> "Affine":
+        """The transform that undoes this one."""
+        return Affine(1 / self.scale, -self.offset / self.scale)
+
+
+class UnitRegistry:
+    """
+    Units grouped by dimension, with a transform for every reachable pair.
+    
+    Conversions are added between neighbouring units only (e.g. 12 in per
+    ft and 3 ft per yd); the registry derives the rest (36 in per yd).
+    """
+    
+    def __init__(self):
+        """Initialize an empty registry."""
+        self.dimensions: Dict[str, str] = {}
+        self._edges: Dict[str, Dict[str, Affine]] = {}
+        self._transforms: Dict[Tuple[str, str], Affine] = {}
+    
+    def define(self, unit: str, dimension: str) -> None:
+        """
+        Add a unit.
+        
+        Args:
+            unit: Symbol such as "km" or "F"
+            dimension: What it measures, such as "length"
+        """
+        if unit in self.dimensions:
+            raise ValueError(f"Unit already defined: {unit}")
+        self.dimensions[unit] = dimension
+        self._edges[unit] = {}
+        self._transforms[(unit, unit)] = Affine()
+    
+    def add_conversion(self, source: str, target: str, scale: float, offset: float = 0.0) -> None:
+        """
+        Connect two units: target = source * scale + offset.
+        
+        The reverse direction is added too, and transforms between every
+        pair of units are recomputed.
+        
+        Raises:
+            ValueError: If a unit is unknown or the dimensions differ
+        """
+        self._check(source, target)
+        if scale == 0:
+            raise ValueError("Conversion scale cannot be zero")
+        forward = Affine(_exact(scale), _exact(offset))
+        self._edges[source][target] = forward
+        self._edges[target][source] = forward.inverse()
+        self._compose()
+    
+    def _compose(self) -> None:
+        """Compose edge transforms along search paths from every unit."""
+        transforms = {}
+        for start in self._edges:
+            reached = {start: Affine(Fraction(1), Fraction(0))}
+            queue = deque([start])
+            while queue:
+                unit = queue.popleft()
+                for neighbour, step in self._edges[unit].items():
+                    if neighbour not in reached:
+                        reached[neighbour] = reached[unit].then(step)
+                        queue.append(neighbour)
+            for unit, transform in reached.items():
+                transforms[(start, unit)] = Affine(float(transform.scale), float(transform.offset))
+        self._transforms = transforms
+    
+    def _check(self, source: str, target: str) -> None:
+        for unit in (source, target):
+            if unit not in self.dimensions:
+                raise ValueError(f"Unknown unit: {unit}")
+        if self.dimensions[source] != self.dimensions[target]:
+            raise ValueError(
+                f"Cannot convert {self.dimensions[source]} ({source}) to "
+                f"{self.dimensions[target]} ({target})"
+            )
+    
+    def units(self, dimension: str) -> List[str]:
+        """Units of one dimension, in definition order."""
+        return [unit for unit, kind in self.dimensions.items() if kind == dimension]
+    
+    def transform(self, source: str, target: str) -> Affine:
+        """
+        The precomputed transform from source to target units.
+        
+        Raises:
+            ValueError: If a unit is unknown, the dimensions differ, or no
+                chain of conversions connects them
+        """
+        transform = self._transforms.get((source, target))
+        if transform is None:
+            self._check(source, target)
+            raise ValueError(f"No conversion from {source} to {target}")
+        return transform
+    
+    def convert(self, value: Number, source: str, target: str) -> float:
+        """Convert one value."""
+        return float(self.transform(source, target)(value))
+    
+    def convert_many(self, values, source: str, target: str):
+        """
+        Convert many values at once.
+        
+        NumPy arrays (and, when NumPy is installed, any sequence) are
+        converted in one vectorized multiply-add; without NumPy a list is
+        returned.
+        
+        Args:
+            values: Numbers (any iterable, or a NumPy array)
+            source: Unit of the values
+            target: Unit wanted
+            
+        Returns:
+            Array (or list) of converted values
+        """
+        transform = self.transform(source, target)
+        if type(values).__module__ != "numpy":
+            try:
+                import numpy as np
+            except ImportError:
+                return [transform(value) for value in values]
+            if not hasattr(values, "__len__"):
+                values = list(values)  # np.asarray would wrap an iterator as one object
+            values = np.asarray(values, dtype=float)
+        return transform(values)
+
+
+def default_registry() -> UnitRegistry:
+    """Registry of the length, weight and temperature units the calculator knows."""
+    registry = UnitRegistry()
+    for unit in ("m", "km", "cm", "mm", "in", "ft", "yd", "mi"):
+        registry.define(unit, "length")
+    for unit in ("kg", "g", "mg", "lb", "oz"):
+        registry.define(unit, "weight")
+    for unit in ("C", "F", "K", "R"):
+        registry.define(unit, "temperature")
+    
+    # Length (international yard and pound: exact definitions)
+    registry.add_conversion("km", "m", 1000)
+    registry.add_conversion("m", "cm", 100)
+    registry.add_conversion("cm", "mm", 10)
+    registry.add_conversion("in", "cm", 2.54)
+    registry.add_conversion("ft", "in", 12)
+    registry.add_conversion("yd", "ft", 3)
+    registry.add_conversion("mi", "yd", 1760)
+    
+    # Weight
+    registry.add_conversion("kg", "g", 1000)
+    registry.add_conversion("g", "mg", 1000)
+    registry.add_conversion("lb", "kg", 0.45359237)
+    registry.add_conversion("lb", "oz", 16)
+    
+    # Temperature
+    registry.add_conversion("C", "F", Fraction(9, 5), 32)
+    registry.add_conversion("C", "K", 1, 273.15)
+    registry.add_conversion("F", "R", 1, 459.67)
+    return registry
+
+
+UNITS = default_registry()